@@ -0,0 +1,7 @@
+"""benchmarks of timeout-executor.
+
+run with `python -m benchmarks --output result.json`.
+nothing is imported here, because subprocess imports `benchmarks.cases`.
+"""
+
+from __future__ import annotations
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from benchmarks.runner import (
+    BACKENDS,
+    CONCURRENCY,
+    PAYLOAD_SIZES,
+    SUITES,
+    compare,
+    run_benchmarks,
+)
+
+
+def main(argv: list[str] | None = None) -> int:
+    """run benchmarks from command line"""
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks", description="benchmark timeout-executor"
+    )
+    parser.add_argument("-o", "--output", type=Path, help="write json report")
+    parser.add_argument("-n", "--repeat", type=int, default=20)
+    parser.add_argument(
+        "-b", "--backend", action="append", choices=sorted(BACKENDS), default=None
+    )
+    parser.add_argument("-s", "--suite", action="append", choices=SUITES, default=None)
+    parser.add_argument("-c", "--concurrency", type=int, action="append", default=None)
+    parser.add_argument("--payload-size", type=int, action="append", default=None)
+    parser.add_argument(
+        "--compare", type=Path, help="compare with json report of previous run"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=None,
+        help="exit with 1 if median of any benchmark is slower by this ratio",
+    )
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(
+        backends=args.backend,
+        suites=args.suite or SUITES,
+        repeat=args.repeat,
+        concurrency=args.concurrency or CONCURRENCY,
+        payload_sizes=args.payload_size or PAYLOAD_SIZES,
+    )
+    text = json.dumps(report, indent=2)
+    if args.output is None:
+        sys.stdout.write(text + "\n")
+    else:
+        args.output.write_text(text)
+
+    if args.compare is None:
+        return 0
+
+    baseline = json.loads(args.compare.read_text())
+    regressed = False
+    for key, before, after, ratio in compare(baseline, report):
+        sys.stderr.write(
+            f"{ratio:6.2f}x {before * 1000:10.2f}ms -> {after * 1000:10.2f}ms  {key}\n"
+        )
+        if args.threshold is not None and ratio > args.threshold:
+            regressed = True
+    return int(regressed)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,36 @@
+"""functions run in subprocess"""
+
+from __future__ import annotations
+
+from typing import Any
+
+
+def noop() -> None:
+    """fixed cost of a call"""
+
+
+async def noop_async() -> None:
+    """fixed cost of a call with event loop"""
+
+
+def compute(size: int) -> int:
+    """cpu bound work"""
+    return sum(x * x for x in range(size))
+
+
+async def sleep_async(delay: float) -> float:
+    """io bound work"""
+    import anyio
+
+    await anyio.sleep(delay)
+    return delay
+
+
+def echo(value: Any) -> Any:
+    """argument is sent back as result"""
+    return value
+
+
+def raise_error(message: str) -> None:
+    """error is serialized with traceback"""
+    raise ValueError(message)
@@ -0,0 +1,286 @@
+from __future__ import annotations
+
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from dataclasses import dataclass, field
+from functools import partial
+from importlib.util import find_spec
+from typing import TYPE_CHECKING, Any, Callable
+
+import anyio
+
+from benchmarks import cases
+from timeout_executor import TimeoutExecutor
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Iterable
+
+__all__ = ["BACKENDS", "SUITES", "BenchResult", "compare", "run_benchmarks"]
+
+FORMAT_VERSION = 1
+TIMEOUT = 60
+OUTPUT = "capture"
+"""output of subprocess is not forwarded, but drained as usual"""
+BACKENDS: dict[str, tuple[str, dict[str, Any]]] = {
+    "asyncio": ("asyncio", {"use_uvloop": False}),
+    "asyncio-uvloop": ("asyncio", {"use_uvloop": True}),
+    "trio": ("trio", {"restrict_keyboard_interrupt_to_checkpoints": True}),
+}
+"""same as `anyio_backend` fixture of tests"""
+SUITES = ("latency", "throughput", "payload", "jinja", "error", "sync")
+CONCURRENCY = (1, 2, 4, 8)
+PAYLOAD_SIZES = (1 << 10, 1 << 20, 1 << 24)
+
+
+@dataclass(frozen=True)
+class BenchResult:
+    """samples of one benchmark.
+
+    each sample is the seconds taken by `count` calls.
+    """
+
+    name: str
+    backend: str
+    params: dict[str, Any] = field(default_factory=dict)
+    samples: list[float] = field(default_factory=list)
+    count: int = 1
+
+    @property
+    def key(self) -> str:
+        """identity compared between runs"""
+        params = json.dumps(self.params, sort_keys=True)
+        return f"{self.name}[{self.backend}]{params}"
+
+    def summary(self) -> dict[str, float]:
+        """statistics in seconds per call"""
+        values = sorted(x / self.count for x in self.samples)
+        return {
+            "mean": statistics.fmean(values),
+            "median": statistics.median(values),
+            "p95": values[min(len(values) - 1, int(len(values) * 0.95))],
+            "min": values[0],
+            "max": values[-1],
+            "stdev": statistics.stdev(values) if len(values) > 1 else 0.0,
+            "per_second": self.count * len(values) / sum(self.samples),
+        }
+
+    def to_dict(self) -> dict[str, Any]:
+        """json serializable form"""
+        return {
+            "key": self.key,
+            "name": self.name,
+            "backend": self.backend,
+            "params": self.params,
+            "count": self.count,
+            "samples": self.samples,
+            **self.summary(),
+        }
+
+
+def available_backends() -> list[str]:
+    """backends installed in current environment"""
+    backends = ["asyncio"]
+    if find_spec("uvloop") is not None:
+        backends.append("asyncio-uvloop")
+    if find_spec("trio") is not None:
+        backends.append("trio")
+    return backends
+
+
+def run_benchmarks(
+    backends: Iterable[str] | None = None,
+    suites: Iterable[str] = SUITES,
+    repeat: int = 20,
+    concurrency: Iterable[int] = CONCURRENCY,
+    payload_sizes: Iterable[int] = PAYLOAD_SIZES,
+) -> dict[str, Any]:
+    """run benchmarks and return json serializable report.
+
+    Args:
+        backends: names of `BACKENDS`. `None` means all installed backends.
+        suites: names of `SUITES`
+        repeat: number of samples of each benchmark
+        concurrency: numbers of concurrent calls for throughput
+        payload_sizes: sizes of argument and result in bytes
+
+    Returns:
+        report with environment and results
+    """
+    suites = tuple(suites)
+    for suite in suites:
+        if suite not in SUITES:
+            error_msg = f"invalid suite: {suite!r}"
+            raise ValueError(error_msg)
+    backends = available_backends() if backends is None else list(backends)
+
+    results: list[BenchResult] = []
+    if "sync" in suites:
+        results.extend(_sync_suite(repeat))
+    async_suites = [x for x in suites if x != "sync"]
+    for backend in backends:
+        if not async_suites:
+            break
+        name, options = BACKENDS[backend]
+        bench = partial(
+            _async_suites,
+            backend,
+            async_suites,
+            repeat,
+            tuple(concurrency),
+            tuple(payload_sizes),
+        )
+        results.extend(anyio.run(bench, backend=name, backend_options=options))
+
+    return {
+        "version": FORMAT_VERSION,
+        "environment": environment(),
+        "results": [x.to_dict() for x in results],
+    }
+
+
+def environment() -> dict[str, Any]:
+    """information to compare reports fairly"""
+    from importlib.metadata import PackageNotFoundError, version
+
+    try:
+        package_version = version("timeout-executor")
+    except PackageNotFoundError:  # pragma: no cover
+        package_version = "unknown"
+    return {
+        "timeout_executor": package_version,
+        "python": sys.version.split()[0],
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "time": time.time(),
+    }
+
+
+def compare(
+    baseline: dict[str, Any], current: dict[str, Any], stat: str = "median"
+) -> list[tuple[str, float, float, float]]:
+    """compare two reports.
+
+    Returns:
+        key, baseline value, current value and ratio (current / baseline)
+        of benchmarks found in both reports
+    """
+    old = {x["key"]: x[stat] for x in baseline["results"]}
+    result: list[tuple[str, float, float, float]] = []
+    for row in current["results"]:
+        if row["key"] not in old:
+            continue
+        before, after = old[row["key"]], row[stat]
+        result.append((row["key"], before, after, after / before if before else 0.0))
+    return result
+
+
+async def _async_suites(
+    backend: str,
+    suites: list[str],
+    repeat: int,
+    concurrency: tuple[int, ...],
+    payload_sizes: tuple[int, ...],
+) -> list[BenchResult]:
+    results: list[BenchResult] = []
+    executor: TimeoutExecutor[Any] = TimeoutExecutor(TIMEOUT, output=OUTPUT)
+    if "latency" in suites:
+        for name, func, args in (
+            ("noop", cases.noop, ()),
+            ("noop_async", cases.noop_async, ()),
+            ("compute", cases.compute, (100_000,)),
+            ("sleep_async", cases.sleep_async, (0.01,)),
+        ):
+            samples = await _measure(repeat, partial(_call, executor, func, *args))
+            results.append(BenchResult("latency", backend, {"func": name}, samples))
+
+    if "throughput" in suites:
+        for size in concurrency:
+            samples = await _measure(
+                repeat, partial(_call_many, executor, size, cases.noop)
+            )
+            results.append(
+                BenchResult(
+                    "throughput", backend, {"concurrency": size}, samples, count=size
+                )
+            )
+
+    if "payload" in suites:
+        for size in payload_sizes:
+            value = b"x" * size
+            samples = await _measure(
+                repeat, partial(_call, executor, cases.echo, value)
+            )
+            results.append(BenchResult("payload", backend, {"size": size}, samples))
+
+    if "jinja" in suites:
+        for use_jinja in (False, True):
+            jinja_executor: TimeoutExecutor[Any] = TimeoutExecutor(
+                TIMEOUT, use_jinja=use_jinja, output=OUTPUT
+            )
+            samples = await _measure(repeat, partial(_call, jinja_executor, cases.noop))
+            results.append(
+                BenchResult("jinja", backend, {"use_jinja": use_jinja}, samples)
+            )
+
+    if "error" in suites:
+        samples = await _measure(
+            repeat, partial(_call_error, executor, cases.raise_error, "error")
+        )
+        results.append(BenchResult("error", backend, {}, samples))
+
+    return results
+
+
+def _sync_suite(repeat: int) -> list[BenchResult]:
+    executor: TimeoutExecutor[Any] = TimeoutExecutor(TIMEOUT, output=OUTPUT)
+    results: list[BenchResult] = []
+    for name, func in (("noop", cases.noop), ("noop_async", cases.noop_async)):
+        executor.apply(func).result()
+        samples: list[float] = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            executor.apply(func).result()
+            samples.append(time.perf_counter() - start)
+        results.append(BenchResult("apply", "sync", {"func": name}, samples))
+    return results
+
+
+async def _measure(repeat: int, func: Callable[[], Awaitable[Any]]) -> list[float]:
+    # first call is not measured, it warms up caches
+    await func()
+    samples: list[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await func()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+async def _call(
+    executor: TimeoutExecutor[Any], func: Callable[..., Any], *args: Any
+) -> Any:
+    result = await executor.delay(func, *args)
+    return await result.delay()
+
+
+async def _call_many(
+    executor: TimeoutExecutor[Any], size: int, func: Callable[..., Any]
+) -> None:
+    async with anyio.create_task_group() as task_group:
+        for _ in range(size):
+            task_group.start_soon(_call, executor, func)
+
+
+async def _call_error(
+    executor: TimeoutExecutor[Any], func: Callable[..., Any], *args: Any
+) -> None:
+    try:
+        await _call(executor, func, *args)
+    except ValueError:
+        return
+    raise RuntimeError("error is not raised")
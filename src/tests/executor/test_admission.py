@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import threading
+
+import anyio
+import pytest
+
+from timeout_executor import QueueFullError, TimeoutExecutor
+from timeout_executor.admission import Admission
+
+pytestmark = pytest.mark.anyio
+
+
+def sleep(x: float) -> float:
+    import time
+
+    time.sleep(x)
+    return x
+
+
+def test_max_concurrency():
+    executor = TimeoutExecutor(30, max_concurrency=2)
+    admission = executor.admission
+    assert admission is not None
+    results = [executor.apply(sleep, 0.5) for _ in range(3)]
+    assert results[0].is_done or results[1].is_done
+    assert admission.running <= 2
+    assert [result.result() for result in results] == [0.5] * 3
+    assert admission.running == 0
+
+
+async def test_max_concurrency_async():
+    executor = TimeoutExecutor(30, max_concurrency=1)
+    admission = executor.admission
+    assert admission is not None
+    values: list[float] = []
+
+    async def run(x: float) -> None:
+        result = await executor.delay(sleep, x)
+        values.append(await result.delay())
+
+    async with anyio.create_task_group() as task_group:
+        for x in (0.3, 0.1):
+            task_group.start_soon(run, x)
+            await anyio.sleep(0.05)
+        assert admission.running == 1
+    assert values == [0.3, 0.1]
+    assert admission.running == 0
+
+
+def test_queue_full():
+    executor = TimeoutExecutor(30, max_concurrency=1, max_queue=0)
+    result = executor.apply(sleep, 1)
+    with pytest.raises(QueueFullError):
+        executor.apply(sleep, 0)
+    assert result.result() == 1
+    assert executor.apply(sleep, 0).result() == 0
+
+
+def test_queue_timeout():
+    executor = TimeoutExecutor(30, max_concurrency=1, queue_timeout=0.2)
+    result = executor.apply(sleep, 3)
+    with pytest.raises(TimeoutError):
+        executor.apply(sleep, 0)
+    admission = executor.admission
+    assert admission is not None
+    assert admission.queued == 0
+    result.wait(do_async=False)
+
+
+async def test_queue_timeout_async():
+    executor = TimeoutExecutor(30, max_concurrency=1, queue_timeout=0.2)
+    result = await executor.delay(sleep, 3)
+    with pytest.raises(TimeoutError):
+        await executor.delay(sleep, 0)
+    admission = executor.admission
+    assert admission is not None
+    assert admission.queued == 0
+    await result.wait()
+
+
+def test_fifo():
+    admission = Admission(1)
+    admission.acquire()
+    order: list[int] = []
+
+    def acquire(index: int) -> None:
+        admission.acquire()
+        order.append(index)
+
+    threads = []
+    for index in range(3):
+        thread = threading.Thread(target=acquire, args=(index,))
+        thread.start()
+        threads.append(thread)
+        while admission.queued <= index:
+            threading.Event().wait(0.01)
+
+    for thread in threads:
+        admission.release()
+        thread.join(5)
+    assert order == [0, 1, 2]
+    assert admission.running == 1
+
+
+async def test_cancel_waiter():
+    admission = Admission(1)
+    admission.acquire()
+    with anyio.move_on_after(0.1):
+        await admission.acquire_async()
+    assert admission.queued == 0
+    admission.release()
+    assert admission.running == 0
+
+
+@pytest.mark.parametrize(
+    ("kwargs", "match"),
+    [
+        ({"max_concurrency": 0}, "max concurrency must be positive"),
+        ({"max_concurrency": 1, "max_queue": -1}, "max queue must not be negative"),
+        (
+            {"max_concurrency": 1, "queue_timeout": -1},
+            "queue timeout must not be negative",
+        ),
+        ({"max_queue": 1}, "require max concurrency"),
+    ],
+)
+def test_invalid_admission(kwargs: dict[str, float], match: str):
+    with pytest.raises(ValueError, match=match):
+        TimeoutExecutor(1, **kwargs)  # type: ignore
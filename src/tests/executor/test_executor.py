@@ -1,12 +1,14 @@
 from __future__ import annotations
 
 import os
+import threading
 import uuid
 from collections.abc import Awaitable
 from itertools import product
-from typing import Any
+from typing import Any, Literal
 
 import pytest
+from typing_extensions import override
 
 from tests.executor.base import BaseExecutorTest
 from timeout_executor import AsyncResult, TimeoutExecutor
@@ -220,3 +222,25 @@ def test_environment_variable():
 
     result = TimeoutExecutor(1).apply(func)
     assert result.result() is True
+
+
+class ThreadRecorder:
+    """record thread where the value is serialized"""
+
+    def __init__(self) -> None:
+        self.threads: list[int] = []
+
+    @override
+    def __reduce__(self) -> tuple[Any, ...]:
+        self.threads.append(threading.get_ident())
+        return (int, (0,))
+
+
+@pytest.mark.parametrize("transport", ["file", "pipe"])
+async def test_delay_serialize_in_thread(transport: Literal["file", "pipe"]):
+    recorder = ThreadRecorder()
+    executor = TimeoutExecutor(10, transport=transport)
+    result = await executor.delay(BaseExecutorTest.sample_func, recorder)
+    assert await result.delay() == ((0,), {})
+    assert recorder.threads
+    assert threading.get_ident() not in recorder.threads
@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import os
+import uuid
+from collections.abc import Generator
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from tests.executor.base import BaseExecutorTest
+from timeout_executor import AsyncResult, TimeoutExecutor
+from timeout_executor.forkserver import ForkedProcess, ForkServer
+
+pytestmark = pytest.mark.anyio
+
+PRELOAD_MODULE = "colorsys"
+
+
+@pytest.fixture
+def executor() -> Generator[TimeoutExecutor[Any], None, None]:
+    with TimeoutExecutor(
+        1, start_method="forkserver", preload=[PRELOAD_MODULE]
+    ) as executor:
+        yield executor
+
+
+def get_pid() -> int:
+    import os
+
+    return os.getpid()
+
+
+def is_preloaded() -> bool:
+    import sys
+
+    return PRELOAD_MODULE in sys.modules
+
+
+def get_env(key: str) -> str | None:
+    import os
+
+    return os.environ.get(key)
+
+
+def sleep(x: float) -> float:
+    import time
+
+    time.sleep(x)
+    return x
+
+
+def test_apply(executor: TimeoutExecutor[Any]):
+    result = executor.apply(BaseExecutorTest.sample_func, 1, x=2)
+    assert isinstance(result, AsyncResult)
+    assert isinstance(result._process, ForkedProcess)  # noqa: SLF001
+    assert result.result() == ((1,), {"x": 2})
+    assert result._process.returncode == 0  # noqa: SLF001
+
+
+async def test_delay(executor: TimeoutExecutor[Any]):
+    result = await executor.delay(BaseExecutorTest.sample_async_func, 1, x=2)
+    assert isinstance(result, AsyncResult)
+    assert await result.delay() == ((1,), {"x": 2})
+
+
+def test_preload(executor: TimeoutExecutor[Any]):
+    assert executor.apply(is_preloaded).result() is True
+    with TimeoutExecutor(1) as spawn_executor:
+        assert spawn_executor.apply(is_preloaded).result() is False
+
+
+def test_process_per_call(executor: TimeoutExecutor[Any]):
+    pids = {executor.apply(get_pid).result() for _ in range(3)}
+    assert os.getpid() not in pids
+    assert len(pids) == 3
+
+
+def test_error(executor: TimeoutExecutor[Any]):
+    def func() -> None:
+        raise RuntimeError("error")
+
+    result = executor.apply(func)
+    with pytest.raises(RuntimeError, match="error"):
+        result.result()
+    assert result._process.wait(1) == 1  # noqa: SLF001
+
+
+def test_timeout(executor: TimeoutExecutor[Any]):
+    result = executor.apply(sleep, 10)
+    with pytest.raises(TimeoutError):
+        result.result()
+    assert result._terminator.is_active is True  # noqa: SLF001
+    assert result._process.wait(1) < 0  # noqa: SLF001
+
+
+def test_environment_variable(executor: TimeoutExecutor[Any]):
+    key, value = "E" + uuid.uuid4().hex.upper(), str(uuid.uuid4())
+    executor.apply(get_pid).result()  # fork server already started
+    os.environ[key] = value
+    try:
+        result = executor.apply(get_env, key)
+        assert result.result() == value
+    finally:
+        os.environ.pop(key)
+
+
+def test_initializer(executor: TimeoutExecutor[Any]):
+    def init(value: str) -> None:
+        import os
+
+        os.environ["_TIMEOUT_EXECUTOR_FORKSERVER_TEST"] = value
+
+    def get_value() -> str | None:
+        import os
+
+        return os.environ.get("_TIMEOUT_EXECUTOR_FORKSERVER_TEST")
+
+    forkserver = executor.forkserver
+    executor.set_initializer(init, "init")
+    assert executor.apply(get_value).result() == "init"
+    assert executor.forkserver is forkserver
+    executor.unset_initializer()
+    assert executor.apply(get_value).result() is None
+
+
+def test_shutdown(executor: TimeoutExecutor[Any]):
+    forkserver = executor.forkserver
+    result = executor.apply(sleep, 0.2)
+    executor.shutdown()
+    assert forkserver.closed
+    assert result.result() == 0.2
+    with pytest.raises(RuntimeError, match="fork server is closed"):
+        forkserver.submit(Path("unused"), None)
+    assert executor.forkserver is not forkserver
+
+
+def test_invalid_preload():
+    with pytest.raises(ValueError, match="invalid module name"):
+        ForkServer(["a,b"])
+
+
+def test_invalid_start_method():
+    with pytest.raises(ValueError, match="invalid start method"):
+        TimeoutExecutor(1, start_method="fork")  # type: ignore
+
+
+def test_forkserver_with_pool():
+    with pytest.raises(ValueError, match="does not support worker pool"):
+        TimeoutExecutor(1, start_method="forkserver", pool_size=1)
+
+
+def test_forkserver_with_jinja():
+    with pytest.raises(ValueError, match="does not support forkserver"):
+        TimeoutExecutor(1, start_method="forkserver", use_jinja=True)
+
+
+def test_no_forkserver():
+    with pytest.raises(AttributeError, match="no fork server"):
+        TimeoutExecutor(1).forkserver  # noqa: B018
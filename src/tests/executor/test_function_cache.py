@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+from typing import Any
+
+import cloudpickle
+import pytest
+
+from timeout_executor import TimeoutExecutor
+from timeout_executor.executor import (
+    Executor,
+    _dumps_function,
+    dumps_function,
+    jinja_script,
+)
+
+pytestmark = pytest.mark.anyio
+
+
+class CallableObject:
+    def __call__(self) -> int:
+        return 1
+
+
+def create_counter() -> Any:
+    calls: list[int] = []
+
+    def counter() -> int:
+        calls.append(1)
+        return len(calls)
+
+    return counter
+
+
+def test_cache_function():
+    func = create_counter()
+    payload = dumps_function(func)
+    assert dumps_function(func) is payload
+    assert cloudpickle.loads(payload)() == 1
+
+
+def test_cache_by_identity():
+    first, second = create_counter(), create_counter()
+    assert dumps_function(first) is not dumps_function(second)
+
+
+def test_not_cache_callable_object():
+    func = CallableObject()
+    hits = _dumps_function.cache_info().hits
+    assert dumps_function(func) is not dumps_function(func)
+    assert _dumps_function.cache_info().hits == hits
+
+
+def test_cache_size():
+    maxsize = _dumps_function.cache_info().maxsize
+    assert maxsize is not None
+    for _ in range(maxsize + 1):
+        dumps_function(create_counter())
+    assert _dumps_function.cache_info().currsize == maxsize
+
+
+def create_reader(config: dict[str, int]) -> Any:
+    def read() -> int:
+        return config["value"]
+
+    return read
+
+
+@pytest.mark.parametrize("cache_function", [False, True])
+def test_worker_isolated_function(cache_function: bool):  # noqa: FBT001
+    func = create_counter()
+    with TimeoutExecutor(10, pool_size=1, cache_function=cache_function) as executor:
+        assert [executor.apply(func).result() for _ in range(3)] == [1, 1, 1]
+
+
+def test_not_cache_by_default():
+    config = {"value": 1}
+    func = create_reader(config)
+    executor = TimeoutExecutor(10)
+    assert not executor.cache_function
+    assert executor.apply(func).result() == 1
+    config["value"] = 2
+    assert executor.apply(func).result() == 2
+
+
+def test_cache_function_freezes_state():
+    config = {"value": 1}
+    func = create_reader(config)
+    executor = TimeoutExecutor(10, cache_function=True)
+    assert executor.apply(func).result() == 1
+    config["value"] = 2
+    assert executor.apply(func).result() == 1
+
+
+@pytest.mark.parametrize("cache_function", [False, True])
+def test_function_payload(cache_function: bool):  # noqa: FBT001
+    executor = Executor(10, square, cache_function=cache_function)
+    payload = cloudpickle.loads(executor._dump_args(None, 3))[0]  # noqa: SLF001
+    if cache_function:
+        assert payload == dumps_function(square)
+    else:
+        assert payload is square
+    assert executor.apply(3).result() == 9
+
+
+def test_process_per_call():
+    func = create_counter()
+    executor = TimeoutExecutor(1)
+    assert [executor.apply(func).result() for _ in range(3)] == [1, 1, 1]
+
+
+def square(x: int) -> int:
+    return x * x
+
+
+def test_cache_jinja_script():
+    script = jinja_script(square)
+    assert jinja_script(square) == script
+    assert script.suffix == ".pyc"
+    assert script.exists()
+
+
+def test_compile_removed_jinja_script():
+    script = jinja_script(square)
+    script.unlink()
+    assert jinja_script(square) == script
+    assert script.exists()
+    assert TimeoutExecutor(10, use_jinja=True).apply(square, 3).result() == 9
+
+
+def make_square() -> Any:
+    def square(x: int) -> int:
+        return x * x
+
+    return square
+
+
+def test_jinja_script_by_source():
+    first, second = make_square(), make_square()
+    assert first is not second
+    assert jinja_script(first) == jinja_script(second)
+
+
+async def test_jinja_reuse_script():
+    executor = TimeoutExecutor(10, use_jinja=True)
+    results = [await executor.delay(square, x) for x in range(3)]
+    assert [await result.delay() for result in results] == [0, 1, 4]
+    assert jinja_script(square).exists()
+
+
+def test_jinja_script_with_initializer():
+    executor = TimeoutExecutor(10, use_jinja=True)
+    executor.set_initializer(square, 2)
+    assert executor.apply(square, 3).result() == 9
+    assert jinja_script(square, square) != jinja_script(square)
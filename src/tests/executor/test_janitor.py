@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import gc
+import os
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from timeout_executor import TimeoutExecutor
+from timeout_executor.janitor import (
+    NAMESPACE,
+    base_dir,
+    get_janitor,
+    process_dir,
+    sweep,
+)
+
+pytestmark = pytest.mark.anyio
+
+
+def sleep(x: float) -> float:
+    import time
+
+    time.sleep(x)
+    return x
+
+
+def crash() -> None:
+    import os
+
+    os._exit(1)
+
+
+FORK_SCRIPT = """
+import os, sys
+from timeout_executor.janitor import process_dir
+path = process_dir(sys.argv[1])
+pid = os.fork()
+if pid == 0:
+    sys.exit(0)
+os.waitpid(pid, 0)
+print(path, path.is_dir())
+"""
+
+
+def dead_pid() -> int:
+    process = subprocess.Popen([sys.executable, "-c", "pass"])  # noqa: S603
+    process.wait()
+    return process.pid
+
+
+def task_dirs(temp_dir: Path) -> list[Path]:
+    assert get_janitor().flush(10)
+    return [x for x in process_dir(temp_dir).iterdir() if x.name != "jinja"]
+
+
+def test_invalid_temp_dir(tmp_path: Path):
+    file = tmp_path / "file"
+    file.touch()
+    with pytest.raises(ValueError, match="temp dir is not a directory"):
+        TimeoutExecutor(1, temp_dir=file)
+
+
+def test_process_dir(tmp_path: Path):
+    path = process_dir(tmp_path)
+    assert path == tmp_path / "timeout_executor" / f"{NAMESPACE}-{os.getpid()}"
+    assert path.is_dir()
+    assert process_dir(tmp_path) is path
+
+
+def test_sweep(tmp_path: Path):
+    base = base_dir(tmp_path)
+    pid = dead_pid()
+    stale = base / f"{NAMESPACE}-{pid}"
+    (stale / "task").mkdir(parents=True)
+    alive = base / f"{NAMESPACE}-{os.getpid()}"
+    other = base / "other"
+    other_namespace = base / f"{'0' * len(NAMESPACE)}-{pid}"
+    for path in (alive, other, other_namespace):
+        path.mkdir()
+
+    assert sweep(base) == [stale]
+    assert not stale.exists()
+    assert alive.exists()
+    assert other.exists()
+    assert other_namespace.exists()
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="fork is not supported")
+def test_forked_process_keep_process_dir(tmp_path: Path):
+    output = subprocess.check_output(  # noqa: S603
+        [sys.executable, "-c", FORK_SCRIPT, str(tmp_path)], text=True
+    )
+    path, is_dir = output.split()
+    assert is_dir == "True"
+    assert not Path(path).exists()
+
+
+def test_sweep_on_start(tmp_path: Path):
+    stale = base_dir(tmp_path) / f"{NAMESPACE}-{dead_pid()}"
+    stale.mkdir(parents=True)
+    executor = TimeoutExecutor(10, temp_dir=tmp_path)
+    assert executor.apply(sleep, 0).result() == 0
+    assert get_janitor().flush(10)
+    assert not stale.exists()
+
+
+@pytest.mark.parametrize(
+    "kwargs", [{}, {"use_jinja": True}, {"start_method": "forkserver"}]
+)
+def test_remove_after_result(tmp_path: Path, kwargs: dict[str, Any]):
+    with TimeoutExecutor(10, temp_dir=tmp_path, **kwargs) as executor:
+        assert executor.apply(sleep, 0).result() == 0
+    assert not task_dirs(tmp_path)
+
+
+def test_remove_after_timeout(tmp_path: Path):
+    executor = TimeoutExecutor(0.5, temp_dir=tmp_path, kill_grace=0)
+    result = executor.apply(sleep, 10)
+    with pytest.raises(TimeoutError):
+        result.result()
+    assert not task_dirs(tmp_path)
+
+
+def test_remove_after_crash(tmp_path: Path):
+    executor = TimeoutExecutor(10, temp_dir=tmp_path)
+    result = executor.apply(crash)
+    with pytest.raises(FileNotFoundError):
+        result.result()
+    assert not task_dirs(tmp_path)
+
+
+def test_remove_dropped_result(tmp_path: Path):
+    executor = TimeoutExecutor(10, temp_dir=tmp_path)
+    result = executor.apply(sleep, 0)
+    assert result._terminator.wait_callbacks(10)  # noqa: SLF001
+    output_file = result._executor_args.output_file  # noqa: SLF001
+    assert output_file is not None
+    temp_dir = output_file.parent
+    del result
+    end = time.monotonic() + 10
+    while temp_dir.exists():
+        assert time.monotonic() < end
+        gc.collect()
+        assert get_janitor().flush(10)
+
+
+def test_pool_init_file(tmp_path: Path):
+    executor = TimeoutExecutor(10, pool_size=1, temp_dir=tmp_path)
+    executor.set_initializer(sleep, 0)
+    with executor:
+        assert executor.apply(sleep, 0).result() == 0
+        assert task_dirs(tmp_path)
+    end = time.monotonic() + 10
+    while task_dirs(tmp_path) and time.monotonic() < end:
+        time.sleep(0.05)
+    assert not task_dirs(tmp_path)
+
+
+def test_single_thread(tmp_path: Path):
+    executor = TimeoutExecutor(10, temp_dir=tmp_path)
+    results = [executor.apply(sleep, 0) for _ in range(4)]
+    for result in results:
+        assert result.result() == 0
+    names = [x.name for x in threading.enumerate()]
+    assert names.count("timeout-executor-janitor") == 1
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+from typing import Any
+
+import pytest
+
+from timeout_executor import CpuLimitExceeded, MemoryLimitExceeded, TimeoutExecutor
+from timeout_executor.limits import ResourceLimits
+
+pytestmark = pytest.mark.anyio
+
+MAX_MEMORY = 512 << 20
+
+
+def allocate(size: int) -> int:
+    return len(bytearray(size))
+
+
+def spin() -> None:
+    while True:
+        pass
+
+
+def open_files(size: int) -> int:
+    import os
+
+    fds: list[int] = []
+    try:
+        for _ in range(size):
+            fds.append(os.open(os.devnull, os.O_RDONLY))  # noqa: PERF401
+    finally:
+        for fd in fds:
+            os.close(fd)
+    return size
+
+
+def get_limits() -> dict[str, tuple[int, int]]:
+    import resource
+
+    return {
+        name: resource.getrlimit(getattr(resource, name))
+        for name in ("RLIMIT_AS", "RLIMIT_CPU", "RLIMIT_NOFILE")
+    }
+
+
+def test_to_env():
+    assert ResourceLimits().to_env() == ""
+    assert ResourceLimits(1024, None, 16).to_env() == "RLIMIT_AS=1024,RLIMIT_NOFILE=16"
+
+
+@pytest.mark.parametrize(
+    ("kwargs", "error_msg"),
+    [
+        ({"max_memory": 0}, "max memory must be positive"),
+        ({"max_cpu_time": -1}, "max cpu time must be positive"),
+        ({"max_open_files": 1, "pool_size": 1}, "worker pool does not support"),
+    ],
+)
+def test_invalid_limits(kwargs: dict[str, Any], error_msg: str):
+    with pytest.raises(ValueError, match=error_msg):
+        TimeoutExecutor(1, **kwargs)
+
+
+def test_no_limits():
+    assert TimeoutExecutor(1).limits is None
+    executor = TimeoutExecutor(1, max_cpu_time=10)
+    assert executor.limits == ResourceLimits(max_cpu_time=10)
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [{}, {"transport": "pipe"}, {"start_method": "forkserver"}, {"use_jinja": True}],
+    ids=["spawn", "pipe", "forkserver", "jinja"],
+)
+async def test_apply_limits(kwargs: dict[str, Any]):
+    with TimeoutExecutor(
+        10, max_memory=MAX_MEMORY, max_cpu_time=10, max_open_files=64, **kwargs
+    ) as executor:
+        result = await executor.delay(get_limits)
+        limits = await result.delay()
+    assert limits["RLIMIT_AS"] == (MAX_MEMORY, MAX_MEMORY)
+    assert limits["RLIMIT_CPU"] == (10, 11)
+    assert limits["RLIMIT_NOFILE"] == (64, 64)
+
+
+@pytest.mark.parametrize(
+    "kwargs", [{}, {"start_method": "forkserver"}], ids=["spawn", "forkserver"]
+)
+async def test_memory_limit(kwargs: dict[str, Any]):
+    with TimeoutExecutor(10, max_memory=MAX_MEMORY, **kwargs) as executor:
+        result = await executor.delay(allocate, MAX_MEMORY * 2)
+        with pytest.raises(MemoryLimitExceeded, match="memory limit exceeded"):
+            await result.delay()
+
+        result = await executor.delay(allocate, 1 << 20)
+        assert await result.delay() == 1 << 20
+
+
+@pytest.mark.parametrize(
+    "kwargs", [{}, {"start_method": "forkserver"}], ids=["spawn", "forkserver"]
+)
+async def test_cpu_limit(kwargs: dict[str, Any]):
+    with TimeoutExecutor(10, max_cpu_time=1, **kwargs) as executor:
+        result = await executor.delay(spin)
+        with pytest.raises(CpuLimitExceeded, match="cpu time limit exceeded"):
+            await result.delay()
+    assert not result._terminator.is_active  # noqa: SLF001
+
+
+def test_open_files_limit():
+    executor = TimeoutExecutor(10, max_open_files=32)
+    with pytest.raises(OSError, match="Too many open files"):
+        executor.apply(open_files, 64).result()
+    assert executor.apply(open_files, 8).result() == 8
@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+import os
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from timeout_executor import QueueFullError, TimeoutExecutor
+from timeout_executor.batch import Batch
+
+pytestmark = pytest.mark.anyio
+
+
+def square(x: int) -> int:
+    return x * x
+
+
+async def square_async(x: int) -> int:
+    return x * x
+
+
+def sleep(x: float) -> float:
+    import time
+
+    time.sleep(x)
+    return x
+
+
+def fail_on_zero(x: int) -> int:
+    if x == 0:
+        raise ValueError("zero")
+    return x
+
+
+def get_pid(x: Any) -> int:  # noqa: ARG001
+    import os
+
+    return os.getpid()
+
+
+def counted(items: list[int], consumed: list[int]) -> Iterator[int]:
+    for item in items:
+        consumed.append(item)
+        yield item
+
+
+def test_map():
+    executor = TimeoutExecutor(5)
+    assert list(executor.map(square, range(5), concurrency=2)) == [0, 1, 4, 9, 16]
+
+
+async def test_map_async():
+    executor = TimeoutExecutor(5)
+    results = [x async for x in executor.map_async(square_async, range(5))]
+    assert results == [0, 1, 4, 9, 16]
+
+
+def test_map_unordered():
+    executor = TimeoutExecutor(5)
+    results = list(executor.map(sleep, [1, 0.1], concurrency=2, ordered=False))
+    assert results == [0.1, 1]
+
+
+async def test_map_async_unordered():
+    executor = TimeoutExecutor(5)
+    results = [
+        x
+        async for x in executor.map_async(sleep, [1, 0.1], concurrency=2, ordered=False)
+    ]
+    assert results == [0.1, 1]
+
+
+def test_lazy_input():
+    executor = TimeoutExecutor(5)
+    consumed: list[int] = []
+    iterator = executor.map(square, counted(list(range(10)), consumed), concurrency=2)
+    assert consumed == []
+    assert next(iterator) == 0
+    assert len(consumed) <= 3
+    assert list(iterator) == [x * x for x in range(1, 10)]
+
+
+def test_concurrency():
+    executor = TimeoutExecutor(5)
+    batch: Batch[float] = Batch(executor, sleep, [0.5] * 4, 2)
+    iterator = iter(batch)
+    next(iterator)
+    assert len(batch._running) <= 2  # noqa: SLF001
+    assert list(iterator) == [0.5] * 3
+
+
+def test_timeout_per_item():
+    executor = TimeoutExecutor(2)
+    iterator = executor.map(sleep, [0, 10])
+    assert next(iterator) == 0
+    with pytest.raises(TimeoutError):
+        next(iterator)
+
+
+def test_error_terminates_running():
+    executor = TimeoutExecutor(5)
+    batch: Batch[int] = Batch(executor, fail_on_zero, [0, 1, 2], 3)
+    with pytest.raises(ValueError, match="zero"):
+        list(batch)
+    assert not batch._running  # noqa: SLF001
+
+
+def test_close_early():
+    executor = TimeoutExecutor(5)
+    batch: Batch[float] = Batch(executor, sleep, [0, 10, 10], 3)
+    iterator = iter(batch)
+    assert next(iterator) == 0
+    running = list(batch._running)  # noqa: SLF001
+    iterator.close()  # type: ignore
+    assert not batch._running  # noqa: SLF001
+    for result in running:
+        assert result._process.wait(1) is not None  # noqa: SLF001
+
+
+def test_map_with_pool():
+    with TimeoutExecutor(5, pool_size=2) as executor:
+        pids = set(executor.map(get_pid, range(6)))
+    assert os.getpid() not in pids
+    assert len(pids) <= 2
+
+
+def test_invalid_concurrency():
+    executor = TimeoutExecutor(1)
+    with pytest.raises(ValueError, match="concurrency must be positive"):
+        executor.map(square, range(1), concurrency=0)
+
+
+def count_running(path: str) -> int:
+    import time
+    import uuid
+    from pathlib import Path
+
+    file = Path(path) / uuid.uuid4().hex
+    file.touch()
+    time.sleep(0.3)
+    count = len(list(Path(path).iterdir()))
+    file.unlink()
+    return count
+
+
+def peak_running(path: str) -> int:
+    import time
+    import uuid
+    from pathlib import Path
+
+    file = Path(path) / uuid.uuid4().hex
+    file.touch()
+    peak = 0
+    for _ in range(10):
+        peak = max(peak, len(list(Path(path).iterdir())))
+        time.sleep(0.05)
+    file.unlink()
+    return peak
+
+
+@pytest.mark.parametrize("ordered", [True, False])
+def test_map_peak_concurrency(tmp_path: Path, ordered: bool):  # noqa: FBT001
+    executor = TimeoutExecutor(10)
+    items = [str(tmp_path)] * 6
+    values = list(executor.map(peak_running, items, concurrency=2, ordered=ordered))
+    assert len(values) == 6
+    assert max(values) <= 2
+
+
+@pytest.mark.parametrize("ordered", [True, False])
+async def test_map_async_peak_concurrency(tmp_path: Path, ordered: bool):  # noqa: FBT001
+    executor = TimeoutExecutor(10)
+    items = [str(tmp_path)] * 6
+    values = [
+        x
+        async for x in executor.map_async(
+            peak_running, items, concurrency=2, ordered=ordered
+        )
+    ]
+    assert len(values) == 6
+    assert max(values) <= 2
+
+
+def test_map_max_concurrency(tmp_path: Path):
+    executor = TimeoutExecutor(10, max_concurrency=1, metrics=True)
+    values = list(executor.map(count_running, [str(tmp_path)] * 4, concurrency=4))
+    assert values == [1, 1, 1, 1]
+    assert executor.metrics is not None
+    assert executor.metrics.submitted.value == 4
+
+
+async def test_map_async_max_concurrency(tmp_path: Path):
+    executor = TimeoutExecutor(10, max_concurrency=1)
+    items = [str(tmp_path)] * 4
+    values = [x async for x in executor.map_async(count_running, items, concurrency=4)]
+    assert values == [1, 1, 1, 1]
+
+
+def test_map_queue_full():
+    executor = TimeoutExecutor(10, max_concurrency=1, max_queue=0, metrics=True)
+    with pytest.raises(QueueFullError):
+        list(executor.map(sleep, [0.5] * 2, concurrency=2))
+    assert executor.metrics is not None
+    assert executor.metrics.rejected.value == 1
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+from typing import Any
+
+import pytest
+
+from timeout_executor import Metrics, QueueFullError, TimeoutExecutor, export_prometheus
+from timeout_executor.metrics import Histogram
+
+pytestmark = pytest.mark.anyio
+
+
+def sleep(x: float) -> float:
+    import time
+
+    time.sleep(x)
+    return x
+
+
+def raise_error() -> None:
+    raise ValueError("error")
+
+
+def test_histogram():
+    histogram = Histogram("value", "help", [1, 10])
+    for value in (0.5, 1, 5, 100):
+        histogram.observe(value)
+    samples = list(histogram.samples())
+    assert samples == [
+        ("_bucket", {"le": "1"}, 2),
+        ("_bucket", {"le": "10"}, 3),
+        ("_bucket", {"le": "+Inf"}, 4),
+        ("_sum", {}, 106.5),
+        ("_count", {}, 4),
+    ]
+
+
+def test_export_format():
+    first, second = Metrics({"name": "first"}), Metrics({"name": 'se"cond'})
+    first.submitted.inc(2)
+    second.input_bytes.observe(300)
+    text = export_prometheus(first, second)
+    lines = text.splitlines()
+
+    assert text.endswith("\n")
+    assert lines.count("# TYPE timeout_executor_tasks_submitted_total counter") == 1
+    assert 'timeout_executor_tasks_submitted_total{name="first"} 2' in lines
+    assert 'timeout_executor_tasks_submitted_total{name="se\\"cond"} 0' in lines
+    assert "# TYPE timeout_executor_input_bytes histogram" in lines
+    assert 'timeout_executor_input_bytes_bucket{name="se\\"cond",le="256"} 0' in lines
+    assert 'timeout_executor_input_bytes_bucket{name="se\\"cond",le="1024"} 1' in lines
+    assert 'timeout_executor_input_bytes_count{name="first"} 0' in lines
+    assert first.export() == export_prometheus(first)
+
+
+def test_disabled():
+    executor = TimeoutExecutor(1)
+    assert executor.metrics is None
+    executor = TimeoutExecutor(1, metrics=True)
+    assert isinstance(executor.metrics, Metrics)
+    metrics = Metrics()
+    assert TimeoutExecutor(1, metrics=metrics).metrics is metrics
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [{}, {"transport": "pipe"}, {"pool_size": 1}],
+    ids=["spawn", "pipe", "pool"],
+)
+async def test_counts(kwargs: dict[str, Any]):
+    executor = TimeoutExecutor(2, metrics=True, **kwargs)
+    metrics = executor.metrics
+    assert metrics is not None
+
+    success = await executor.delay(sleep, 0.1)
+    assert await success.delay() == 0.1
+    error = await executor.delay(raise_error)
+    with pytest.raises(ValueError, match="error"):
+        await error.delay()
+    timeout = await executor.delay(sleep, 10)
+    with pytest.raises(TimeoutError):
+        await timeout.delay()
+    for result in (success, error, timeout):
+        assert result._terminator.wait_callbacks(10)  # noqa: SLF001
+    executor.shutdown()
+
+    assert metrics.submitted.value == 3
+    assert metrics.succeeded.value == 1
+    assert metrics.failed.value == 1
+    assert metrics.timed_out.value == 1
+    assert metrics.in_flight.value == 0
+    assert metrics.spawn_seconds.count == 3
+    assert metrics.run_seconds.count == 3
+    assert metrics.run_seconds.sum >= 2.1
+    assert metrics.input_bytes.count == 3
+    assert metrics.output_bytes.count == 2
+
+
+def test_in_flight():
+    executor = TimeoutExecutor(10, metrics=True)
+    metrics = executor.metrics
+    assert metrics is not None
+    result = executor.apply(sleep, 0.5)
+    assert metrics.in_flight.value == 1
+    result.result()
+    assert result._terminator.wait_callbacks(10)  # noqa: SLF001
+    assert metrics.in_flight.value == 0
+
+
+def test_rejected_and_queue_depth():
+    executor = TimeoutExecutor(10, max_concurrency=1, max_queue=0, metrics=True)
+    metrics = executor.metrics
+    assert metrics is not None
+    result = executor.apply(sleep, 0.5)
+    with pytest.raises(QueueFullError):
+        executor.apply(sleep, 0.5)
+    assert "timeout_executor_queue_depth 0" in metrics.export().splitlines()
+    result.result()
+
+    assert metrics.rejected.value == 1
+    assert metrics.submitted.value == 1
@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any
+
+import anyio
+import pytest
+from typing_extensions import override
+
+from timeout_executor import TimeoutExecutor
+from timeout_executor.handle import ProcessHandle
+from timeout_executor.monitor import ProcessMonitor
+
+pytestmark = pytest.mark.anyio
+
+
+def sleep(x: float) -> float:
+    import time
+
+    time.sleep(x)
+    return x
+
+
+class FakeHandle(ProcessHandle):
+    __slots__ = ()
+
+    @override
+    def send_signal(self, sig: int) -> None:
+        self._set_returncode(-sig)
+
+
+class FakeTerminator:
+    def __init__(self, timeout: float, terminated: list[Any]) -> None:
+        self.timeout = timeout
+        self.callback_args = self
+        self.executor_args = self
+        self.process = FakeHandle()
+        self.output = None
+        self.transport = None
+        self.terminated = terminated
+        self.exited = threading.Event()
+
+    def _on_deadline(self) -> None:
+        self.terminated.append((self, time.monotonic()))
+        self.process.terminate()
+
+    def _on_exit(self) -> None:
+        self.exited.set()
+
+    def _notify_exit(self) -> None:
+        pass
+
+
+def test_constant_thread_count():
+    executor = TimeoutExecutor(30)
+    executor.apply(sleep, 0).result()
+    count = threading.active_count()
+    results = [executor.apply(sleep, 0.5) for _ in range(4)]
+    assert threading.active_count() <= count
+    assert [result.result() for result in results] == [0.5] * 4
+
+
+def test_deadline_without_waiter():
+    executor = TimeoutExecutor(1)
+    result = executor.apply(sleep, 10)
+    process = result._process  # noqa: SLF001
+    assert process.wait(5) < 0
+    assert result._terminator.is_active  # noqa: SLF001
+    with pytest.raises(TimeoutError):
+        result.result()
+
+
+def test_callbacks_after_exit():
+    processes: list[Any] = []
+    executor = TimeoutExecutor(5)
+    executor.add_callback(lambda args: processes.append(args.process))
+    result = executor.apply(sleep, 0.1)
+    assert result._terminator.wait_callbacks(5)  # noqa: SLF001
+    assert processes == [result._process]  # noqa: SLF001
+
+
+def test_callback_error():
+    def callback(args: Any) -> None:  # noqa: ARG001
+        raise RuntimeError("error")
+
+    executor = TimeoutExecutor(5)
+    executor.add_callback(callback)
+    result = executor.apply(sleep, 0)
+    assert result._terminator.wait_callbacks(5)  # noqa: SLF001
+    executor.remove_callback(callback)
+    assert executor.apply(sleep, 0).result() == 0
+
+
+def test_handle_exit_callback():
+    calls: list[int] = []
+    handle = ProcessHandle()
+    handle._add_exit_callback(lambda: calls.append(1))  # noqa: SLF001
+    assert calls == []
+    handle._set_returncode(0)  # noqa: SLF001
+    assert calls == [1]
+    handle._add_exit_callback(lambda: calls.append(2))  # noqa: SLF001
+    assert calls == [1, 2]
+
+
+def test_deadline_order():
+    monitor = ProcessMonitor()
+    terminated: list[Any] = []
+    timeouts = [0.05 * (x % 7) + 0.1 for x in range(100)]
+    start = time.monotonic()
+    terminators = [FakeTerminator(timeout, terminated) for timeout in timeouts]
+    for terminator in terminators:
+        monitor.register(terminator)  # type: ignore
+    for terminator in terminators:
+        assert terminator.exited.wait(5)
+
+    assert len(terminated) == len(timeouts)
+    assert [x.timeout for x, _ in terminated] == sorted(timeouts)
+    for terminator, at in terminated:
+        assert at >= start + terminator.timeout
+    assert 0 <= monitor.max_jitter < 1
+    assert len(monitor) == 0
+
+
+def test_ended_before_deadline():
+    monitor = ProcessMonitor()
+    terminated: list[Any] = []
+    terminators = [FakeTerminator(0.3, terminated) for _ in range(100)]
+    for terminator in terminators:
+        monitor.register(terminator)  # type: ignore
+    for terminator in terminators:
+        terminator.process._set_returncode(0)  # noqa: SLF001
+    for terminator in terminators:
+        assert terminator.exited.wait(5)
+    time.sleep(0.5)
+    assert terminated == []
+    assert monitor.max_jitter == 0
+
+
+async def test_wait_without_thread():
+    executor = TimeoutExecutor(30)
+    await (await executor.delay(sleep, 0)).delay()
+    count = threading.active_count()
+    results = [await executor.delay(sleep, 0.5) for _ in range(4)]
+    counts: list[int] = []
+
+    async def wait(result: Any) -> None:
+        await result.wait()
+        counts.append(threading.active_count())
+
+    async with anyio.create_task_group() as task_group:
+        for result in results:
+            task_group.start_soon(wait, result)
+        await anyio.sleep(0.1)
+        counts.append(threading.active_count())
+
+    assert max(counts) <= count
+    assert [await result.delay() for result in results] == [0.5] * 4
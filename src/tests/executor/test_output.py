@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+from typing import Any
+
+import pytest
+
+from timeout_executor import TimeoutExecutor
+
+pytestmark = pytest.mark.anyio
+
+
+def chatty(size: int) -> int:
+    import sys
+
+    line = "x" * 99 + "\n"
+    for _ in range(size):
+        sys.stdout.write(line)
+    sys.stderr.write("error\n")
+    return size
+
+
+def print_lines(count: int, delay: float) -> int:
+    import sys
+    import time
+
+    for index in range(count):
+        sys.stdout.write(f"{index}\n")
+        sys.stdout.flush()
+        time.sleep(delay)
+    return count
+
+
+def test_drain_large_output():
+    # 1MiB of output is larger than pipe buffer
+    executor = TimeoutExecutor(30, output="capture", output_tail=10)
+    result = executor.apply(chatty, 10_000)
+    assert result.result() == 10_000
+    # last lines of stdout and stderr
+    assert result.stdout == ("x" * 99 + "\n") * 9
+    assert result.stderr == "error\n"
+
+
+def test_forward(capsys: pytest.CaptureFixture[str]):
+    executor = TimeoutExecutor(30)
+    assert executor.apply(chatty, 2).result() == 2
+    captured = capsys.readouterr()
+    assert captured.out == ("x" * 99 + "\n") * 2
+    assert captured.err == "error\n"
+
+
+def test_capture(capsys: pytest.CaptureFixture[str]):
+    executor = TimeoutExecutor(30, output="capture")
+    result = executor.apply(chatty, 2)
+    assert result.result() == 2
+    assert result.stdout == ("x" * 99 + "\n") * 2
+    assert capsys.readouterr().out == ""
+
+
+@pytest.mark.parametrize("output", ["discard", "inherit"])
+def test_not_captured(output: str):
+    executor = TimeoutExecutor(30, output=output)  # type: ignore
+    result = executor.apply(chatty, 2)
+    assert result.result() == 2
+    assert result.stdout == ""
+    assert result._terminator.output is None  # noqa: SLF001
+
+
+def test_output_callback():
+    lines: list[tuple[str, str]] = []
+    executor = TimeoutExecutor(30, output="capture")
+    executor.add_output_callback(lambda name, line: lines.append((name, line)))
+    result = executor.apply(chatty, 2)
+    assert result.result() == 2
+    assert lines == [
+        ("stdout", "x" * 99 + "\n"),
+        ("stdout", "x" * 99 + "\n"),
+        ("stderr", "error\n"),
+    ]
+
+
+async def test_iter_output():
+    executor = TimeoutExecutor(30, output="capture")
+    result = await executor.delay(print_lines, 3, 0.1)
+    lines = [line async for line in result.iter_output()]
+    assert lines == [("stdout", "0\n"), ("stdout", "1\n"), ("stdout", "2\n")]
+    assert await result.delay() == 3
+
+
+def test_invalid_output():
+    with pytest.raises(ValueError, match="invalid output"):
+        TimeoutExecutor(1, output="file")  # type: ignore
+    with pytest.raises(ValueError, match="output tail must be positive"):
+        TimeoutExecutor(1, output_tail=0)
+
+
+@pytest.mark.parametrize(
+    ("kwargs", "name"),
+    [
+        ({"pool_size": 1}, "worker pool"),
+        ({"start_method": "forkserver"}, "forkserver start method"),
+    ],
+    ids=["pool", "forkserver"],
+)
+def test_output_not_piped(kwargs: dict[str, Any], name: str):
+    for output in ("capture", "discard"):
+        with pytest.raises(ValueError, match=f"{name} does not support {output}"):
+            TimeoutExecutor(1, output=output, **kwargs)
+    with pytest.raises(ValueError, match=f"{name} does not support output tail"):
+        TimeoutExecutor(1, output_tail=10, **kwargs)
+
+    with TimeoutExecutor(10, **kwargs) as executor:
+        with pytest.raises(ValueError, match=f"{name} does not support output call"):
+            executor.add_output_callback(print)
+        assert executor.apply(chatty, 1).result() == 1
+    with TimeoutExecutor(10, output="inherit", **kwargs) as executor:
+        assert executor.apply(chatty, 1).result() == 1
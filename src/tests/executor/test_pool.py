@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import os
+import time
+from collections.abc import Generator
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from tests.executor.base import BaseExecutorTest
+from timeout_executor import AsyncResult, TimeoutExecutor
+from timeout_executor.pool import PooledProcess
+
+pytestmark = pytest.mark.anyio
+
+POOL_SIZE = 2
+
+
+@pytest.fixture
+def executor() -> Generator[TimeoutExecutor[Any], None, None]:
+    with TimeoutExecutor(5, pool_size=POOL_SIZE) as executor:
+        yield executor
+
+
+def get_pid() -> int:
+    import os
+
+    return os.getpid()
+
+
+def sleep(x: float) -> float:
+    import time
+
+    time.sleep(x)
+    return x
+
+
+def sample_init(value: str) -> None:
+    import os
+
+    os.environ["_TIMEOUT_EXECUTOR_POOL_TEST"] = value
+
+
+def get_init_value() -> str:
+    import os
+
+    return os.environ.get("_TIMEOUT_EXECUTOR_POOL_TEST", "")
+
+
+def test_apply(executor: TimeoutExecutor[Any]):
+    result = executor.apply(BaseExecutorTest.sample_func, 1, x=2)
+    assert isinstance(result, AsyncResult)
+    assert result.result() == ((1,), {"x": 2})
+
+
+async def test_delay(executor: TimeoutExecutor[Any]):
+    result = await executor.delay(BaseExecutorTest.sample_async_func, 1, x=2)
+    assert isinstance(result, AsyncResult)
+    assert await result.delay() == ((1,), {"x": 2})
+
+
+def test_worker_reused(executor: TimeoutExecutor[Any]):
+    pids = {executor.apply(get_pid).result() for _ in range(POOL_SIZE * 3)}
+    assert os.getpid() not in pids
+    assert len(pids) <= POOL_SIZE
+
+
+def test_error(executor: TimeoutExecutor[Any]):
+    def func() -> None:
+        raise RuntimeError("error")
+
+    result = executor.apply(func)
+    with pytest.raises(RuntimeError, match="error"):
+        result.result()
+    assert executor.apply(get_pid).result() != os.getpid()
+
+
+def test_timeout_respawn_worker(executor: TimeoutExecutor[Any]):
+    result = executor.apply(sleep, 10)
+    process = result._process  # noqa: SLF001
+    assert isinstance(process, PooledProcess)
+    with pytest.raises(TimeoutError):
+        result.result()
+    assert result._terminator.is_active is True  # noqa: SLF001
+
+    pids = {executor.apply(get_pid).result() for _ in range(POOL_SIZE * 3)}
+    assert process.pid not in pids
+
+
+def test_pending_task(executor: TimeoutExecutor[Any]):
+    executor.apply(get_pid).result()  # wait for workers to start
+    start = time.perf_counter()
+    results = [executor.apply(sleep, 0.2) for _ in range(POOL_SIZE * 2)]
+    assert [result.result() for result in results] == [0.2] * (POOL_SIZE * 2)
+    assert time.perf_counter() - start >= 0.4
+
+
+def test_pending_task_timeout():
+    with TimeoutExecutor(0.5, pool_size=1) as executor:
+        running = executor.apply(sleep, 10)
+        pending = executor.apply(sleep, 0)
+        with pytest.raises(TimeoutError):
+            pending.result()
+        with pytest.raises(TimeoutError):
+            running.result()
+        assert executor.apply(get_pid).result() != os.getpid()
+
+
+def test_initializer(executor: TimeoutExecutor[Any]):
+    executor.set_initializer(sample_init, "init")
+    results = [executor.apply(get_init_value) for _ in range(POOL_SIZE * 2)]
+    assert [result.result() for result in results] == ["init"] * (POOL_SIZE * 2)
+
+    executor.unset_initializer()
+    assert executor.apply(get_init_value).result() == ""
+
+
+def test_callback(executor: TimeoutExecutor[Any]):
+    processes: list[Any] = []
+    executor.add_callback(lambda args: processes.append(args.process))
+    result = executor.apply(get_pid)
+    result.result()
+    assert result._terminator.wait_callbacks(1)  # noqa: SLF001
+    assert len(processes) == 1
+    assert isinstance(processes[0], PooledProcess)
+    assert processes[0].returncode == 0
+
+
+def test_shutdown(executor: TimeoutExecutor[Any]):
+    pool = executor.pool
+    result = executor.apply(sleep, 0.2)
+    executor.shutdown()
+    assert pool.closed
+    assert result.result() == 0.2
+    with pytest.raises(RuntimeError, match="pool is closed"):
+        pool.submit(Path("unused"))
+    assert executor.apply(get_pid).result() != os.getpid()
+
+
+def test_invalid_pool_size():
+    with pytest.raises(ValueError, match="pool size must be positive"):
+        TimeoutExecutor(1, pool_size=0)
+
+
+def test_pool_with_jinja():
+    with pytest.raises(ValueError, match="does not support worker pool"):
+        TimeoutExecutor(1, pool_size=1, use_jinja=True)
+
+
+def test_no_pool():
+    with pytest.raises(AttributeError, match="no worker pool"):
+        TimeoutExecutor(1).pool  # noqa: B018
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import resource
+import subprocess
+import sys
+import time
+from typing import Any
+
+import pytest
+
+from timeout_executor import TimeoutExecutor
+from timeout_executor.rusage import ResourceUsage, reap
+from timeout_executor.types import CallbackArgs
+
+pytestmark = pytest.mark.anyio
+
+SIZE = 64 << 20
+
+
+def compute(x: int) -> int:
+    return sum(range(x))
+
+
+def allocate(size: int) -> int:
+    return len(bytearray(size))
+
+
+def sleep(x: float) -> float:
+    import time
+
+    time.sleep(x)
+    return x
+
+
+def test_from_rusage():
+    usage = ResourceUsage.from_rusage(resource.getrusage(resource.RUSAGE_SELF))
+    assert usage.max_rss > 1 << 20
+    assert usage.cpu_time == usage.user_time + usage.system_time
+    assert ResourceUsage.from_fields([str(x) for x in usage]) == usage
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [{}, {"transport": "pipe"}, {"start_method": "forkserver"}],
+    ids=["spawn", "pipe", "forkserver"],
+)
+async def test_rusage(kwargs: dict[str, Any]):
+    with TimeoutExecutor(10, **kwargs) as executor:
+        result = await executor.delay(allocate, SIZE)
+        assert await result.delay() == SIZE
+        assert result._terminator.wait_callbacks(10)  # noqa: SLF001
+
+    usage = result.rusage
+    assert usage is not None
+    assert usage.max_rss >= SIZE
+    assert usage.minor_faults > 0
+    assert usage.cpu_time > 0
+
+
+def test_rusage_of_cpu_time():
+    executor = TimeoutExecutor(10)
+    result = executor.apply(compute, 10_000_000)
+    result.result()
+    usage = result.rusage
+    assert usage is not None
+    assert usage.user_time > 0.1
+
+
+def test_rusage_of_timeout():
+    executor = TimeoutExecutor(0.5)
+    result = executor.apply(sleep, 10)
+    with pytest.raises(TimeoutError):
+        result.result()
+    assert result._terminator.wait_callbacks(10)  # noqa: SLF001
+    assert result.rusage is not None
+
+
+def test_rusage_in_callback():
+    values: list[ResourceUsage | None] = []
+
+    def callback(args: CallbackArgs[Any, Any]) -> None:
+        values.append(args.rusage)
+
+    executor = TimeoutExecutor(10)
+    executor.add_callback(callback)
+    result = executor.apply(compute, 10)
+    result.result()
+    assert result._terminator.wait_callbacks(10)  # noqa: SLF001
+    assert values == [result.rusage]
+    assert values[0] is not None
+
+
+def test_rusage_of_pool():
+    with TimeoutExecutor(10, pool_size=1) as executor:
+        result = executor.apply(compute, 10)
+        assert result.result() == 45
+        assert result.rusage is None
+
+
+def test_reap_without_waitpid_lock():
+    process = subprocess.Popen([sys.executable, "-c", "pass"])  # noqa: S603
+    del process._waitpid_lock  # noqa: SLF001  # pyright: ignore[reportAttributeAccessIssue]
+    while (usage := reap(process)) is None:
+        assert process.returncode is None
+        time.sleep(0.01)
+    assert process.returncode == 0
+    assert usage.cpu_time >= 0
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import gc
+import pickle
+import time
+from pathlib import Path
+from typing import Any
+
+import cloudpickle
+import pytest
+
+from timeout_executor import TimeoutExecutor
+from timeout_executor.janitor import get_janitor
+from timeout_executor.shm import (
+    SEGMENT_PREFIX,
+    dumps,
+    manifest_path,
+    remove_segments,
+    segment_dir,
+)
+
+pytestmark = pytest.mark.anyio
+
+THRESHOLD = 1 << 10
+
+
+def segments() -> set[str]:
+    # segments not loaded are removed by janitor thread
+    assert get_janitor().flush(10)
+    return {
+        path.name
+        for path in Path(segment_dir()).iterdir()
+        if path.name.startswith(SEGMENT_PREFIX)
+    }
+
+
+def buffer_size(value: Any) -> int:
+    return len(memoryview(value))
+
+
+def double(value: Any) -> Any:
+    return value * 2
+
+
+def sleep(x: float, *args: Any) -> float:  # noqa: ARG001
+    import time
+
+    time.sleep(x)
+    return x
+
+
+@pytest.fixture(
+    params=[{}, {"transport": "pipe"}, {"pool_size": 1}, {"start_method": "forkserver"}]
+)
+def executor(request: pytest.FixtureRequest):
+    with TimeoutExecutor(1, shm_threshold=THRESHOLD, **request.param) as executor:
+        yield executor
+
+
+def test_dumps_small_buffer():
+    value = pickle.PickleBuffer(bytearray(b"x" * (THRESHOLD - 1)))
+    created: list[str] = []
+    payload = dumps(value, THRESHOLD, created)
+    assert not created
+    assert bytes(cloudpickle.loads(payload)) == bytes(value)
+
+
+def test_dumps_large_buffer():
+    data = bytearray(b"x" * THRESHOLD)
+    created: list[str] = []
+    payload = dumps([pickle.PickleBuffer(data), "value"], THRESHOLD, created)
+    assert len(created) == 1
+    assert Path(created[0]).exists()
+    assert len(payload) < len(data)
+
+    view, value = cloudpickle.loads(payload)
+    assert value == "value"
+    assert bytes(view) == bytes(data)
+    assert not Path(created[0]).exists()
+    # copy on write
+    view[0] = ord("y")
+    assert data[0] == ord("x")
+
+
+def test_remove_listed_segments():
+    prefix = f"{SEGMENT_PREFIX}test_manifest_"
+    manifest = manifest_path(prefix)
+    value = pickle.PickleBuffer(bytearray(b"x" * THRESHOLD))
+    created: list[str] = []
+    for _ in range(2):
+        dumps(value, THRESHOLD, created, prefix=prefix, manifest=manifest)
+    unlisted = Path(segment_dir()) / f"{prefix}unlisted"
+    unlisted.touch()
+    try:
+        assert Path(manifest).read_text().split() == [
+            Path(path).name for path in created
+        ]
+        remove_segments(prefix)
+        assert not any(Path(path).exists() for path in created)
+        assert not Path(manifest).exists()
+        # names not listed are not scanned
+        assert unlisted.exists()
+    finally:
+        unlisted.unlink()
+
+
+def test_args_through_shm(executor: TimeoutExecutor[Any]):
+    data = bytearray(b"x" * (THRESHOLD * 4))
+    before = segments()
+    result = executor.apply(buffer_size, pickle.PickleBuffer(data))
+    assert result.result() == len(data)
+    assert segments() == before
+
+
+def test_numpy_array(executor: TimeoutExecutor[Any]):
+    np = pytest.importorskip("numpy")
+
+    array = np.arange(THRESHOLD * 4, dtype=np.int64)
+    before = segments()
+    result = executor.apply(double, array)
+    value = result.result()
+    np.testing.assert_array_equal(value, array * 2)
+    assert value.flags.writeable
+    assert segments() == before
+
+
+def make_buffer(size: int) -> Any:
+    import pickle
+
+    return pickle.PickleBuffer(bytearray(b"x" * size))
+
+
+def test_result_buffer_through_shm(executor: TimeoutExecutor[Any]):
+    before = segments()
+    result = executor.apply(make_buffer, THRESHOLD * 4)
+    assert bytes(result.result()) == b"x" * (THRESHOLD * 4)
+    assert segments() == before
+
+
+def test_segments_removed_when_result_not_loaded():
+    executor = TimeoutExecutor(10, shm_threshold=THRESHOLD)
+    result = executor.apply(make_buffer, THRESHOLD * 4)
+    result.wait(do_async=False)
+    prefix = result._executor_args.executor.segment_prefix  # noqa: SLF001
+    assert prefix is not None
+    assert any(name.startswith(prefix) for name in segments())
+
+    assert result._terminator.wait_callbacks(10)  # noqa: SLF001
+    del result
+    end = time.monotonic() + 10
+    while any(name.startswith(prefix) for name in segments()):
+        assert time.monotonic() < end
+        gc.collect()
+        assert get_janitor().flush(10)
+
+
+def test_segments_removed_after_timeout():
+    data = bytearray(b"x" * (THRESHOLD * 4))
+    with TimeoutExecutor(0.5, shm_threshold=THRESHOLD) as executor:
+        before = segments()
+        result = executor.apply(sleep, 10, pickle.PickleBuffer(data))
+        with pytest.raises(TimeoutError):
+            result.result()
+        assert segments() == before
+
+
+def test_invalid_threshold():
+    with pytest.raises(ValueError, match="shm threshold must be positive"):
+        TimeoutExecutor(1, shm_threshold=0)
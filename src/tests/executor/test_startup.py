@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import pytest
+
+from timeout_executor import TimeoutExecutor, profile_startup
+from timeout_executor.startup import ImportTime, parse_import_time
+
+pytestmark = pytest.mark.anyio
+
+
+def interpreter_flags() -> tuple[int, int]:
+    import sys
+
+    return sys.flags.isolated, sys.flags.no_site
+
+
+def run_event_loop() -> int:
+    import asyncio
+
+    async def one() -> int:
+        return 1
+
+    return asyncio.run(one())
+
+
+async def sleep_async(x: float) -> float:
+    import anyio
+
+    await anyio.sleep(x)
+    return x
+
+
+def test_parse_import_time():
+    lines = [
+        "import time: self [us] | cumulative | imported package",
+        "import time:       100 |        100 |     _json",
+        "import time:       200 |        300 |   json.decoder",
+        "import time:        50 |        350 | json",
+        "hello",
+    ]
+    assert parse_import_time(lines) == [
+        ImportTime("_json", 100, 100, 2),
+        ImportTime("json.decoder", 200, 300, 1),
+        ImportTime("json", 50, 350, 0),
+    ]
+
+
+def test_profile_startup():
+    report = profile_startup()
+    assert report.elapsed > 0
+    assert report.import_us > 0
+    assert "timeout_executor.subprocess" in report.modules()
+    assert report.top(1)[0].depth == 0
+    assert report.format().startswith("elapsed: ")
+
+
+@pytest.mark.parametrize("python_flags", [(), ("-I", "-S")])
+def test_python_flags(python_flags: tuple[str, ...]):
+    executor = TimeoutExecutor(30, python_flags=python_flags)
+    assert executor.python_flags == python_flags
+    expected = (1, 1) if python_flags else (0, 0)
+    assert executor.apply(interpreter_flags).result() == expected
+
+
+def test_sync_function_without_event_loop():
+    executor = TimeoutExecutor(30)
+    assert executor.apply(run_event_loop).result() == 1
+
+
+async def test_async_function():
+    executor = TimeoutExecutor(30, python_flags=["-I"])
+    result = await executor.delay(sleep_async, 0.1)
+    assert await result.delay() == 0.1
+
+
+@pytest.mark.parametrize(
+    ("kwargs", "match"),
+    [
+        ({"python_flags": ["I"]}, "invalid python flag"),
+        ({"python_flags": ["-I"], "pool_size": 1}, "worker pool"),
+        ({"python_flags": ["-I"], "start_method": "forkserver"}, "forkserver"),
+        ({"python_flags": ["-I"], "use_jinja": True}, "jinja"),
+    ],
+)
+def test_invalid_python_flags(kwargs: dict[str, object], match: str):
+    with pytest.raises(ValueError, match=match):
+        TimeoutExecutor(1, **kwargs)  # type: ignore
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import time
+from collections.abc import AsyncIterator, Iterator
+from typing import Any
+
+import pytest
+
+from timeout_executor import TimeoutExecutor
+
+pytestmark = pytest.mark.anyio
+
+
+def count(size: int, delay: float = 0) -> Iterator[int]:
+    import time
+
+    for index in range(size):
+        yield index
+        time.sleep(delay)
+    return size
+
+
+async def count_async(size: int) -> AsyncIterator[int]:
+    from anyio.lowlevel import checkpoint
+
+    for index in range(size):
+        yield index
+        await checkpoint()
+
+
+def fail_after(size: int) -> Iterator[int]:
+    yield from range(size)
+    raise ValueError(size)
+
+
+async def collect(result: Any, values: list[Any]) -> None:
+    async for x in result.iter_values():
+        values.append(x)  # noqa: PERF401
+
+
+@pytest.fixture(params=[False, True], ids=["spawn", "jinja"])
+def executor(request: pytest.FixtureRequest) -> TimeoutExecutor[Any]:
+    return TimeoutExecutor(10, use_jinja=request.param)
+
+
+async def test_stream_items(executor: TimeoutExecutor[Any]):
+    result = await executor.delay(count, 3)
+    assert [x async for x in result.iter_values()] == [0, 1, 2]
+    assert await result.delay() == 3
+
+
+async def test_stream_async_generator(executor: TimeoutExecutor[Any]):
+    result = await executor.delay(count_async, 3)
+    assert [x async for x in result.iter_values()] == [0, 1, 2]
+    assert await result.delay() is None
+
+
+async def test_first_item_before_end():
+    executor = TimeoutExecutor(10)
+    result = await executor.delay(count, 3, 1)
+    iterator = result.iter_values()
+    assert await iterator.__anext__() == 0
+    start = time.monotonic()
+    assert await iterator.__anext__() == 1
+    assert time.monotonic() - start > 0.5
+    assert not result.is_done
+    assert [x async for x in iterator] == [2]
+
+
+async def test_stream_timeout():
+    executor = TimeoutExecutor(1)
+    result = await executor.delay(count, 100, 0.1)
+    values: list[int] = []
+    with pytest.raises(TimeoutError):
+        await collect(result, values)
+    assert values
+    assert values == list(range(len(values)))
+
+
+async def test_stop_early():
+    executor = TimeoutExecutor(10)
+    result = await executor.delay(count, 10_000_000)
+    async for x in result.iter_values():
+        if x == 2:
+            break
+    assert await result.delay() is None
+
+
+async def test_stream_error():
+    executor = TimeoutExecutor(10)
+    result = await executor.delay(fail_after, 2)
+    values: list[int] = []
+    with pytest.raises(ValueError, match="2"):
+        await collect(result, values)
+    assert values == [0, 1]
+
+
+async def test_result_without_items():
+    executor = TimeoutExecutor(10)
+    result = await executor.delay(count, 100_000)
+    assert await result.delay() is None
+
+
+async def test_stream_with_pool():
+    with TimeoutExecutor(10, pool_size=1) as executor:
+        result = await executor.delay(count, 3)
+        assert [x async for x in result.iter_values()] == [0, 1, 2]
+        assert await result.delay() == 3
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import signal
+import time
+from pathlib import Path
+from typing import Any
+
+import psutil
+import pytest
+
+from timeout_executor import TimeoutExecutor
+
+pytestmark = pytest.mark.anyio
+
+GRACE = 0.5
+
+
+def ignore_sigterm(x: float) -> float:
+    import signal
+    import time
+
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    time.sleep(x)
+    return x
+
+
+def spawn_child(pid_file: str, ignore: bool) -> None:  # noqa: FBT001
+    import subprocess
+    import sys
+    import time
+    from pathlib import Path
+
+    code = "import time;time.sleep(100)"
+    if ignore:
+        code = "import signal;signal.signal(signal.SIGTERM, signal.SIG_IGN);" + code
+    process = subprocess.Popen([sys.executable, "-c", code])  # noqa: S603
+    Path(pid_file).write_text(str(process.pid))
+    time.sleep(100)
+
+
+def wait_for_exit(pid: int, timeout: float) -> bool:
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        try:
+            process = psutil.Process(pid)
+            if process.status() == psutil.STATUS_ZOMBIE:
+                return True
+        except psutil.NoSuchProcess:
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def read_pid(pid_file: Path, timeout: float) -> int:
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        if pid_file.exists() and pid_file.read_text():
+            return int(pid_file.read_text())
+        time.sleep(0.05)
+    raise TimeoutError(timeout)
+
+
+def test_invalid_kill_grace():
+    with pytest.raises(ValueError, match="kill grace must not be negative"):
+        TimeoutExecutor(1, kill_grace=-1)
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [{}, {"start_method": "forkserver"}, {"pool_size": 1}],
+    ids=["spawn", "forkserver", "pool"],
+)
+def test_kill_after_grace(kwargs: dict[str, Any]):
+    with TimeoutExecutor(1, kill_grace=GRACE, **kwargs) as executor:
+        result = executor.apply(ignore_sigterm, 100)
+        start = time.monotonic()
+        with pytest.raises(TimeoutError):
+            result.result()
+        assert result._terminator.wait_callbacks(10)  # noqa: SLF001
+        assert time.monotonic() - start >= GRACE
+    assert result._process.returncode == -signal.SIGKILL  # noqa: SLF001
+
+
+@pytest.mark.parametrize("ignore", [False, True], ids=["sigterm", "sigkill"])
+@pytest.mark.parametrize(
+    "kwargs", [{}, {"start_method": "forkserver"}], ids=["spawn", "forkserver"]
+)
+def test_kill_descendants(tmp_path: Path, kwargs: dict[str, Any], ignore: bool):  # noqa: FBT001
+    pid_file = tmp_path / "pid"
+    with TimeoutExecutor(2, kill_grace=GRACE, **kwargs) as executor:
+        result = executor.apply(spawn_child, str(pid_file), ignore)
+        pid = read_pid(pid_file, 10)
+        with pytest.raises(TimeoutError):
+            result.result()
+    assert wait_for_exit(pid, GRACE + 5)
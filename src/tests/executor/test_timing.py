@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+from typing import Any
+
+import cloudpickle
+import pytest
+
+from timeout_executor import TimeoutExecutor
+from timeout_executor.timing import PHASES, Timing, pack_marks, unpack_marks
+
+pytestmark = pytest.mark.anyio
+
+
+def sleep(x: float) -> float:
+    import time
+
+    time.sleep(x)
+    return x
+
+
+def test_pack_marks():
+    marks = {"ready": 1.0, "run_start": 2.0, "run_end": 3.0}
+    value = cloudpickle.dumps([1, 2]) + pack_marks(marks)
+    assert cloudpickle.loads(value) == [1, 2]
+    assert unpack_marks(value) == marks
+    assert unpack_marks(cloudpickle.dumps([1, 2])) == {}
+
+
+def test_missing_phase():
+    timing = Timing()
+    start = timing.marks["start"]
+    timing.update({"serialized": start + 1, "run_end": start + 3})
+    phases = timing.phases()
+    assert phases["serialize"] == 1
+    assert phases["spawn"] is None
+    assert phases["run"] == 2
+    assert timing.total == 3
+
+
+@pytest.mark.parametrize(
+    ("kwargs", "missing"),
+    [
+        ({}, set()),
+        ({"transport": "pipe"}, {"cleanup"}),
+        ({"pool_size": 1}, {"read_input", "initializer"}),
+        ({"use_jinja": True}, set()),
+    ],
+    ids=["spawn", "pipe", "pool", "jinja"],
+)
+async def test_phases(kwargs: dict[str, Any], missing: set[str]):
+    executor = TimeoutExecutor(10, **kwargs)
+    result = await executor.delay(sleep, 0.2)
+    assert await result.delay() == 0.2
+    executor.shutdown()
+
+    phases = result.timing.phases()
+    assert set(phases) == set(PHASES)
+    assert {name for name, value in phases.items() if value is None} == missing
+    assert phases["run"] is not None
+    assert phases["run"] >= 0.2
+    assert result.timing.total >= sum(x for x in phases.values() if x is not None)
+
+
+def test_phases_of_timeout():
+    executor = TimeoutExecutor(0.5)
+    result = executor.apply(sleep, 10)
+    with pytest.raises(TimeoutError):
+        result.result()
+    phases = result.timing.phases()
+    assert phases["spawn"] is not None
+    assert phases["run"] is None
+    assert phases["load"] is None
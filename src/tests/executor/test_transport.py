@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any
+
+import anyio
+import pytest
+
+from tests.executor.base import BaseExecutorTest
+from timeout_executor import AsyncResult, TimeoutExecutor
+from timeout_executor.transport import PipeTransport
+
+pytestmark = pytest.mark.anyio
+
+
+def sleep(x: float) -> float:
+    import time
+
+    time.sleep(x)
+    return x
+
+
+def exit_without_result() -> None:
+    import os
+
+    os._exit(0)
+
+
+def set_env(key: str, value: str) -> None:
+    import os
+
+    os.environ[key] = value
+
+
+def get_env(key: str) -> str | None:
+    import os
+
+    return os.environ.get(key)
+
+
+def temp_dirs() -> set[str]:
+    return {
+        path.name
+        for path in Path(tempfile.gettempdir()).iterdir()
+        if path.name.startswith("timeout_executor")
+    }
+
+
+@pytest.fixture(params=[{}, {"pool_size": 1}, {"use_jinja": True}])
+def executor(request: pytest.FixtureRequest):
+    with TimeoutExecutor(1, transport="pipe", **request.param) as executor:
+        yield executor
+
+
+def test_apply(executor: TimeoutExecutor[Any]):
+    result = executor.apply(BaseExecutorTest.sample_func, 1, x=2)
+    assert isinstance(result, AsyncResult)
+    assert isinstance(result._executor_args.transport, PipeTransport)  # noqa: SLF001
+    assert result._executor_args.input_file is None  # noqa: SLF001
+    assert result._executor_args.output_file is None  # noqa: SLF001
+    assert result.result() == ((1,), {"x": 2})
+
+
+async def test_delay(executor: TimeoutExecutor[Any]):
+    result = await executor.delay(BaseExecutorTest.sample_async_func, 1, x=2)
+    assert await result.delay() == ((1,), {"x": 2})
+
+
+def test_large_payload(executor: TimeoutExecutor[Any]):
+    # larger than pipe buffer
+    payload = b"x" * (1 << 20)
+    result = executor.apply(BaseExecutorTest.sample_func, payload)
+    assert result.result() == ((payload,), {})
+
+
+def test_error(executor: TimeoutExecutor[Any]):
+    def func() -> None:
+        raise RuntimeError("error")
+
+    result = executor.apply(func)
+    with pytest.raises(RuntimeError, match="error"):
+        result.result()
+
+
+def test_timeout(executor: TimeoutExecutor[Any]):
+    result = executor.apply(sleep, 10)
+    with pytest.raises(TimeoutError):
+        result.result()
+
+
+def test_initializer(executor: TimeoutExecutor[Any]):
+    if executor.use_jinja:
+        pytest.skip("jinja executor does not indent initializer code")
+    executor.set_initializer(set_env, "_TIMEOUT_EXECUTOR_TRANSPORT_TEST", "init")
+    result = executor.apply(get_env, "_TIMEOUT_EXECUTOR_TRANSPORT_TEST")
+    assert result.result() == "init"
+
+
+def test_no_temp_files():
+    with TimeoutExecutor(1, transport="pipe") as executor:
+        before = temp_dirs()
+        result = executor.apply(BaseExecutorTest.sample_func, 1)
+        assert temp_dirs() == before
+        assert result.result() == ((1,), {})
+
+
+def test_exit_without_result():
+    with TimeoutExecutor(1, transport="pipe") as executor:
+        result = executor.apply(exit_without_result)
+        with pytest.raises(EOFError, match="without result"):
+            result.result()
+
+
+def test_no_thread_per_task():
+    with TimeoutExecutor(30, transport="pipe") as executor:
+        executor.apply(sleep, 0).result()
+        count = threading.active_count()
+        # larger than pipe buffer, written by process monitor
+        payload = b"x" * (1 << 20)
+        results = [
+            executor.apply(BaseExecutorTest.sample_func, payload) for _ in range(4)
+        ]
+        assert threading.active_count() <= count
+        assert [result.result() for result in results] == [((payload,), {})] * 4
+
+
+async def test_wait_output_without_thread():
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    with TimeoutExecutor(30, transport="pipe") as executor:
+        result = await executor.delay(sleep, 0.5)
+        transport = result._executor_args.transport  # noqa: SLF001
+        assert transport is not None
+        async with anyio.create_task_group() as task_group:
+            task_group.start_soon(transport.wait_output)
+            task_group.start_soon(result.delay)
+            await anyio.sleep(0.2)
+            assert limiter.borrowed_tokens == 0
+    assert await result.delay() == 0.5
+
+
+def test_invalid_transport():
+    with pytest.raises(ValueError, match="invalid transport"):
+        TimeoutExecutor(1, transport="socket")  # type: ignore
+
+
+def test_forkserver_with_pipe():
+    with pytest.raises(ValueError, match="does not support pipe transport"):
+        TimeoutExecutor(1, start_method="forkserver", transport="pipe")
@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any
+
+import anyio
+import pytest
+
+from timeout_executor import (
+    ALL_COMPLETED,
+    FIRST_COMPLETED,
+    FIRST_EXCEPTION,
+    AsyncResult,
+    TimeoutExecutor,
+    as_completed,
+    as_completed_async,
+    wait,
+    wait_async,
+)
+
+pytestmark = pytest.mark.anyio
+
+
+def sleep(x: float) -> float:
+    import time
+
+    time.sleep(x)
+    return x
+
+
+def fail_after(x: float) -> None:
+    import time
+
+    time.sleep(x)
+    raise ValueError(x)
+
+
+def test_as_completed():
+    executor = TimeoutExecutor(5)
+    results = [executor.apply(sleep, x) for x in (1.5, 0.1, 0.8)]
+    values = [result.result() for result in as_completed(results)]
+    assert values == [0.1, 0.8, 1.5]
+
+
+async def test_as_completed_async():
+    executor = TimeoutExecutor(5)
+    results = [await executor.delay(sleep, x) for x in (1.5, 0.1, 0.8)]
+    values = [await result.delay() async for result in as_completed_async(results)]
+    assert values == [0.1, 0.8, 1.5]
+
+
+def test_as_completed_timeout():
+    executor = TimeoutExecutor(5)
+    results = [executor.apply(sleep, x) for x in (0, 3)]
+    iterator = as_completed(results, timeout=2)
+    assert next(iterator).result() == 0
+    with pytest.raises(TimeoutError, match="1 results are not completed"):
+        next(iterator)
+
+
+def test_as_completed_done_results():
+    executor = TimeoutExecutor(5)
+    result = executor.apply(sleep, 0)
+    assert result.result() == 0
+    assert result.is_done
+    assert list(as_completed([result, result])) == [result]
+
+
+def test_single_waiter_thread():
+    executor = TimeoutExecutor(5)
+    results = [executor.apply(sleep, 0.5) for _ in range(4)]
+    count = threading.active_count()
+    done, not_done = wait(results, timeout=0)
+    assert threading.active_count() <= count
+    assert not done
+    assert not_done == set(results)
+    done, not_done = wait(results)
+    assert done == set(results)
+    assert not not_done
+
+
+def test_wait_first_completed():
+    executor = TimeoutExecutor(5)
+    fast, slow = executor.apply(sleep, 0.1), executor.apply(sleep, 2)
+    done, not_done = wait([fast, slow], return_when=FIRST_COMPLETED)
+    assert done == {fast}
+    assert not_done == {slow}
+
+
+def test_wait_first_exception():
+    executor = TimeoutExecutor(5)
+    ok, error, slow = (
+        executor.apply(sleep, 0.1),
+        executor.apply(fail_after, 0.5),
+        executor.apply(sleep, 3),
+    )
+    done, not_done = wait([ok, error, slow], return_when=FIRST_EXCEPTION)
+    assert done == {ok, error}
+    assert not_done == {slow}
+    with pytest.raises(ValueError, match="0.5"):
+        error.result()
+
+
+async def test_wait_async_all_completed():
+    executor = TimeoutExecutor(5)
+    results = [await executor.delay(sleep, x) for x in (0.1, 0.2)]
+    done, not_done = await wait_async(results, return_when=ALL_COMPLETED)
+    assert done == set(results)
+    assert not not_done
+
+
+async def test_wait_async_first_completed():
+    executor = TimeoutExecutor(5)
+    fast, slow = await executor.delay(sleep, 0.1), await executor.delay(sleep, 2)
+    done, not_done = await wait_async([fast, slow], return_when=FIRST_COMPLETED)
+    assert done == {fast}
+    assert not_done == {slow}
+
+
+def test_wait_timeout():
+    executor = TimeoutExecutor(5)
+    fast, slow = executor.apply(sleep, 0), executor.apply(sleep, 3)
+    done, not_done = wait([fast, slow], timeout=2)
+    assert done == {fast}
+    assert not_done == {slow}
+
+
+def test_invalid_return_when():
+    with pytest.raises(ValueError, match="invalid return condition"):
+        wait([], return_when="ANY")  # type: ignore
+
+
+def ignore_sigterm(x: float) -> float:
+    import signal
+    import time
+
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    time.sleep(x)
+    return x
+
+
+def terminating_result(executor: TimeoutExecutor) -> AsyncResult[..., Any]:
+    result = executor.apply(ignore_sigterm, 100)
+    end = time.monotonic() + 10
+    while not result._terminator.is_active and time.monotonic() < end:  # noqa: SLF001
+        time.sleep(0.05)
+    assert result._terminator.is_active  # noqa: SLF001
+    assert not result.is_done
+    return result
+
+
+def test_wait_terminating_result():
+    executor = TimeoutExecutor(0.5, kill_grace=1)
+    result = terminating_result(executor)
+    done, not_done = wait([result], timeout=10)
+    assert done == {result}
+    assert not not_done
+
+
+def test_as_completed_terminating_result():
+    executor = TimeoutExecutor(0.5, kill_grace=1)
+    result = terminating_result(executor)
+    assert list(as_completed([result], timeout=10)) == [result]
+    with pytest.raises(TimeoutError):
+        result.result()
+
+
+async def test_as_completed_async_cancel():
+    executor = TimeoutExecutor(10)
+    result = await executor.delay(sleep, 2)
+    start = time.monotonic()
+    with anyio.move_on_after(0.5):
+        async for _ in as_completed_async([result]):
+            pytest.fail("process should be running")
+    assert time.monotonic() - start < 1.5
+    # nothing is left behind to take the result
+    assert [x async for x in as_completed_async([result], timeout=10)] == [result]
+    assert await result.delay() == 2
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import threading
+from typing import Any
+
+import pytest
+
+from timeout_executor import MemoryLimitExceeded, TimeoutExecutor
+from timeout_executor.watchdog import get_watchdog
+
+pytestmark = pytest.mark.anyio
+
+MAX_RSS = 256 << 20
+
+
+def hold(size: int, seconds: float) -> int:
+    import time
+
+    value = bytearray(size)
+    for index in range(0, size, 4096):
+        value[index] = 1
+    time.sleep(seconds)
+    return len(value)
+
+
+def hold_in_child(size: int, seconds: float) -> int:
+    import subprocess
+    import sys
+
+    code = (
+        f"import time;value = bytearray({size});"
+        f"[value.__setitem__(i, 1) for i in range(0, {size}, 4096)];"
+        f"time.sleep({seconds})"
+    )
+    return subprocess.call([sys.executable, "-c", code])  # noqa: S603
+
+
+@pytest.mark.parametrize(
+    ("kwargs", "error_msg"),
+    [
+        ({"max_rss": 0}, "max rss must be positive"),
+        ({"rss_interval": 0}, "rss interval must be positive"),
+    ],
+)
+def test_invalid_rss(kwargs: dict[str, Any], error_msg: str):
+    with pytest.raises(ValueError, match=error_msg):
+        TimeoutExecutor(1, **kwargs)
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [{}, {"transport": "pipe"}, {"pool_size": 1}, {"start_method": "forkserver"}],
+    ids=["spawn", "pipe", "pool", "forkserver"],
+)
+async def test_kill_over_budget(kwargs: dict[str, Any]):
+    with TimeoutExecutor(10, max_rss=MAX_RSS, rss_interval=0.05, **kwargs) as executor:
+        result = await executor.delay(hold, MAX_RSS * 2, 10)
+        with pytest.raises(MemoryLimitExceeded, match="rss limit exceeded"):
+            await result.delay()
+        assert not result._terminator.is_active  # noqa: SLF001
+
+        result = await executor.delay(hold, 1 << 20, 0)
+        assert await result.delay() == 1 << 20
+
+
+def test_descendants():
+    executor = TimeoutExecutor(10, max_rss=MAX_RSS, rss_interval=0.05)
+    result = executor.apply(hold_in_child, MAX_RSS * 2, 10)
+    with pytest.raises(MemoryLimitExceeded):
+        result.result()
+
+
+def test_single_thread():
+    executor = TimeoutExecutor(10, max_rss=MAX_RSS)
+    results = [executor.apply(hold, 1 << 20, 3) for _ in range(4)]
+    assert len(get_watchdog()) >= len(results)
+    names = [x.name for x in threading.enumerate()]
+    assert names.count("timeout-executor-rss") == 1
+    for result in results:
+        assert result.result() == 1 << 20
@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+from benchmarks.__main__ import main
+from benchmarks.runner import compare, run_benchmarks
+
+
+def test_report():
+    report = run_benchmarks(backends=["asyncio"], suites=["latency", "error"], repeat=1)
+    assert report["version"] == 1
+    assert report["environment"]["python"]
+    results = report["results"]
+    assert {x["name"] for x in results} == {"latency", "error"}
+    assert all(x["median"] > 0 for x in results)
+    json.dumps(report)
+
+    ratios = [ratio for _, _, _, ratio in compare(report, report)]
+    assert len(ratios) == len(results)
+    assert all(ratio == 1 for ratio in ratios)
+
+
+def test_command(tmp_path: Path):
+    output = tmp_path / "bench.json"
+    args = ["-n", "1", "-b", "asyncio", "-s", "throughput", "-c", "2"]
+    assert main([*args, "-o", str(output)]) == 0
+    report = json.loads(output.read_text())
+    assert [x["params"] for x in report["results"]] == [{"concurrency": 2}]
+    assert report["results"][0]["count"] == 2
+
+    assert main([*args, "--compare", str(output), "--threshold", "1000"]) == 0
+
+
+def test_invalid_suite():
+    with pytest.raises(ValueError, match="invalid suite"):
+        run_benchmarks(suites=["unknown"])
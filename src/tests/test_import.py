@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import subprocess
+import sys
+
+import pytest
+
+import timeout_executor
+from timeout_executor import profile_startup
+
+HEAVY_MODULES = ("anyio", "cloudpickle", "psutil", "async_wrapper", "logging.config")
+
+
+def run_python(code: str, *flags: str) -> subprocess.CompletedProcess[str]:
+    return subprocess.run(  # noqa: S603
+        [sys.executable, *flags, "-c", code], capture_output=True, text=True, check=True
+    )
+
+
+def test_lazy_attribute():
+    from timeout_executor.main import TimeoutExecutor
+
+    assert timeout_executor.TimeoutExecutor is TimeoutExecutor
+    assert set(timeout_executor.__all__) <= set(dir(timeout_executor))
+    with pytest.raises(AttributeError):
+        _ = timeout_executor.undefined_name
+
+
+def test_import_without_heavy_modules():
+    code = (
+        "import sys\n"
+        "from timeout_executor import TimeoutExecutor\n"
+        "TimeoutExecutor(1)\n"
+        f"print(*[x for x in {HEAVY_MODULES!r} if x in sys.modules])"
+    )
+    assert run_python(code).stdout.strip() == ""
+
+
+def test_import_package_without_heavy_modules():
+    # import time is checked by what is imported, not by wall clock
+    modules = ("anyio", "cloudpickle", "psutil", "jinja2")
+    code = (
+        "import sys\n"
+        "import timeout_executor\n"
+        f"print(*[x for x in {modules!r} if x in sys.modules])"
+    )
+    assert run_python(code).stdout.strip() == ""
+
+
+def test_subprocess_without_heavy_modules():
+    modules = profile_startup().modules()
+    assert not modules & {"anyio", "psutil", "async_wrapper", "tblib"}
@@ -1,23 +1,87 @@
 from __future__ import annotations
 
-from typing import Any
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
 
-from timeout_executor.executor import apply_func, delay_func
-from timeout_executor.main import TimeoutExecutor
-from timeout_executor.result import AsyncResult
+# `wait` is also the name of a submodule, which would shadow the function
+# once the submodule is imported. it is light, so it is imported eagerly.
+from timeout_executor.wait import (
+    ALL_COMPLETED,
+    FIRST_COMPLETED,
+    FIRST_EXCEPTION,
+    as_completed,
+    as_completed_async,
+    wait,
+    wait_async,
+)
 
-__all__ = ["TimeoutExecutor", "AsyncResult", "apply_func", "delay_func"]
+if TYPE_CHECKING:
+    from timeout_executor.admission import QueueFullError
+    from timeout_executor.executor import apply_func, delay_func
+    from timeout_executor.limits import CpuLimitExceeded, MemoryLimitExceeded
+    from timeout_executor.main import TimeoutExecutor
+    from timeout_executor.metrics import Metrics, export_prometheus
+    from timeout_executor.result import AsyncResult
+    from timeout_executor.rusage import ResourceUsage
+    from timeout_executor.startup import profile_startup
+
+__all__ = [
+    "TimeoutExecutor",
+    "AsyncResult",
+    "apply_func",
+    "delay_func",
+    "as_completed",
+    "as_completed_async",
+    "wait",
+    "wait_async",
+    "FIRST_COMPLETED",
+    "FIRST_EXCEPTION",
+    "ALL_COMPLETED",
+    "QueueFullError",
+    "profile_startup",
+    "Metrics",
+    "export_prometheus",
+    "ResourceUsage",
+    "MemoryLimitExceeded",
+    "CpuLimitExceeded",
+]
 
 __version__: str
 
+# public names are imported on first access,
+# so importing the package does not import anyio, cloudpickle or psutil.
+_LAZY_MODULES: dict[str, str] = {
+    "TimeoutExecutor": "timeout_executor.main",
+    "AsyncResult": "timeout_executor.result",
+    "apply_func": "timeout_executor.executor",
+    "delay_func": "timeout_executor.executor",
+    "QueueFullError": "timeout_executor.admission",
+    "profile_startup": "timeout_executor.startup",
+    "Metrics": "timeout_executor.metrics",
+    "export_prometheus": "timeout_executor.metrics",
+    "ResourceUsage": "timeout_executor.rusage",
+    "MemoryLimitExceeded": "timeout_executor.limits",
+    "CpuLimitExceeded": "timeout_executor.limits",
+}
+
+
+def __getattr__(name: str) -> Any:
+    module = _LAZY_MODULES.get(name)
+    if module is not None:
+        value = getattr(import_module(module), name)
+        globals()[name] = value
+        return value
 
-def __getattr__(name: str) -> Any:  # pragma: no cover
-    from importlib.metadata import version
+    if name == "__version__":  # pragma: no cover
+        from importlib.metadata import version
 
-    if name == "__version__":
         _version = version("timeout-executor")
         globals()["__version__"] = _version
         return _version
 
     error_msg = f"The attribute named {name!r} is undefined."
     raise AttributeError(error_msg)
+
+
+def __dir__() -> list[str]:
+    return sorted({*globals(), *__all__})
@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import os
+import threading
+from collections import deque
+from functools import partial
+from typing import Any, Callable
+
+import anyio
+from typing_extensions import override
+
+from timeout_executor.logging import logger
+
+__all__ = ["Admission", "QueueFullError"]
+
+
+class QueueFullError(RuntimeError):
+    """too many calls are waiting for admission"""
+
+
+class Waiter:
+    """call waiting in admission queue"""
+
+    __slots__ = ("granted", "wake")
+
+    def __init__(self, wake: Callable[[], Any]) -> None:
+        self.granted = False
+        self.wake = wake
+
+
+class Admission:
+    """limit number of running processes.
+
+    calls over the limit wait in a fifo queue,
+    and a released slot is handed over to the oldest waiter.
+    """
+
+    __slots__ = (
+        "_limit",
+        "_max_queue",
+        "_queue_timeout",
+        "_lock",
+        "_running",
+        "_waiters",
+    )
+
+    def __init__(
+        self,
+        limit: int,
+        max_queue: int | None = None,
+        queue_timeout: float | None = None,
+    ) -> None:
+        if limit < 1:
+            error_msg = f"max concurrency must be positive: {limit}"
+            raise ValueError(error_msg)
+        if max_queue is not None and max_queue < 0:
+            error_msg = f"max queue must not be negative: {max_queue}"
+            raise ValueError(error_msg)
+        if queue_timeout is not None and queue_timeout < 0:
+            error_msg = f"queue timeout must not be negative: {queue_timeout}"
+            raise ValueError(error_msg)
+        self._limit = limit
+        self._max_queue = max_queue
+        self._queue_timeout = queue_timeout
+        self._lock = threading.Lock()
+        self._running = 0
+        self._waiters: deque[Waiter] = deque()
+
+    @property
+    def limit(self) -> int:
+        """max number of running processes"""
+        return self._limit
+
+    @property
+    def max_queue(self) -> int | None:
+        """max number of waiting calls. `None` means unbounded."""
+        return self._max_queue
+
+    @property
+    def queue_timeout(self) -> float | None:
+        """max time to wait in queue. `None` means no deadline."""
+        return self._queue_timeout
+
+    @property
+    def running(self) -> int:
+        """number of admitted calls"""
+        return self._running
+
+    @property
+    def queued(self) -> int:
+        """number of waiting calls"""
+        return len(self._waiters)
+
+    def acquire(self) -> None:
+        """wait for a slot.
+
+        Raises:
+            QueueFullError: if queue is full
+            TimeoutError: if no slot is released until queue timeout
+        """
+        event = threading.Event()
+        waiter = self._enqueue(event.set)
+        if waiter is None:
+            return
+        if event.wait(self._queue_timeout) or self._withdraw(waiter):
+            return
+        raise TimeoutError(self._queue_timeout)
+
+    async def acquire_async(self) -> None:
+        """wait for a slot without blocking event loop.
+
+        Raises:
+            QueueFullError: if queue is full
+            TimeoutError: if no slot is released until queue timeout
+        """
+        if self._acquire_nowait():
+            return
+        read_fd, write_fd = os.pipe()
+        try:
+            waiter = self._enqueue(partial(os.write, write_fd, b"\0"))
+            if waiter is None:
+                return
+            try:
+                with anyio.fail_after(self._queue_timeout):
+                    await anyio.wait_readable(read_fd)
+            except TimeoutError as exc:
+                if not self._withdraw(waiter):
+                    raise TimeoutError(self._queue_timeout) from exc
+            except BaseException:
+                if self._withdraw(waiter):
+                    self.release()
+                raise
+        finally:
+            os.close(read_fd)
+            os.close(write_fd)
+
+    def release(self) -> None:
+        """release a slot, handing it over to the oldest waiter"""
+        with self._lock:
+            if self._waiters:
+                waiter = self._waiters.popleft()
+                waiter.granted = True
+                waiter.wake()
+                return
+            self._running -= 1
+        logger.debug("%r release", self)
+
+    def _acquire_nowait(self) -> bool:
+        with self._lock:
+            if self._running < self._limit and not self._waiters:
+                self._running += 1
+                return True
+        return False
+
+    def _enqueue(self, wake: Callable[[], Any]) -> Waiter | None:
+        with self._lock:
+            if self._running < self._limit and not self._waiters:
+                self._running += 1
+                return None
+            if self._max_queue is not None and len(self._waiters) >= self._max_queue:
+                error_msg = f"admission queue is full: {self._max_queue}"
+                raise QueueFullError(error_msg)
+            waiter = Waiter(wake)
+            self._waiters.append(waiter)
+        logger.debug("%r enqueue", self)
+        return waiter
+
+    def _withdraw(self, waiter: Waiter) -> bool:
+        """remove waiter from queue.
+
+        Returns:
+            true if a slot was handed over before removal
+        """
+        with self._lock:
+            if waiter.granted:
+                return True
+            self._waiters.remove(waiter)
+        return False
+
+    @override
+    def __repr__(self) -> str:
+        return (
+            f"<{type(self).__name__}: running: {self._running}/{self._limit}, "
+            f"queued: {len(self._waiters)}>"
+        )
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+from collections import deque
+from typing import TYPE_CHECKING, Any, Callable, Generic
+
+from typing_extensions import TypeVar, override
+
+from timeout_executor.executor import apply_func, delay_func
+from timeout_executor.logging import logger
+from timeout_executor.wait import Watcher
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator, Iterable, Iterator
+
+    from timeout_executor.main import TimeoutExecutor
+    from timeout_executor.result import AsyncResult
+
+__all__ = []
+
+T = TypeVar("T", infer_variance=True)
+
+SENTINEL = object()
+
+
+class Batch(Generic[T]):
+    """run function for each item with bounded concurrency.
+
+    items are consumed lazily.
+    at most `concurrency` processes are running at the same time.
+    """
+
+    __slots__ = (
+        "_executor",
+        "_func",
+        "_items",
+        "_concurrency",
+        "_ordered",
+        "_running",
+        "_watcher",
+    )
+
+    def __init__(
+        self,
+        executor: TimeoutExecutor[Any],
+        func: Callable[[Any], Any],
+        items: Iterable[Any],
+        concurrency: int,
+        *,
+        ordered: bool = True,
+    ) -> None:
+        if concurrency < 1:
+            error_msg = f"concurrency must be positive: {concurrency}"
+            raise ValueError(error_msg)
+        self._executor = executor
+        self._func = func
+        self._items = iter(items)
+        self._concurrency = concurrency
+        self._ordered = ordered
+        self._running: deque[AsyncResult[Any, T]] = deque()
+        self._watcher = Watcher()
+
+    def __iter__(self) -> Iterator[T]:
+        try:
+            self._fill()
+            while self._running:
+                result = self._pop()
+                # keep processes busy while loading the result
+                self._fill()
+                yield result.result()
+        finally:
+            self._close()
+
+    async def __aiter__(self) -> AsyncIterator[T]:
+        try:
+            await self._fill_async()
+            while self._running:
+                result = await self._pop_async()
+                await self._fill_async()
+                yield await result.delay()
+        finally:
+            self._close()
+
+    def _next_item(self) -> Any:
+        if len(self._running) >= self._concurrency:
+            return SENTINEL
+        return next(self._items, SENTINEL)
+
+    def _fill(self) -> None:
+        # admission control of executor applies to each item
+        while (item := self._next_item()) is not SENTINEL:
+            self._append(apply_func(self._executor, self._func, item))
+
+    async def _fill_async(self) -> None:
+        while (item := self._next_item()) is not SENTINEL:
+            self._append(await delay_func(self._executor, self._func, item))
+
+    def _append(self, result: AsyncResult[Any, T]) -> None:
+        self._running.append(result)
+        self._watcher.add(result)
+
+    def _pop(self) -> AsyncResult[Any, T]:
+        # every process ends before its deadline, so this does not block forever
+        if not self._ordered:
+            result = self._watcher.get()
+            if result is None:  # pragma: no cover
+                raise RuntimeError("there is no running process")
+            self._running.remove(result)
+            return result
+        # head is running until its process ends,
+        # so the next item starts after that
+        result = self._running[0]
+        while result in self._watcher.pending:
+            self._watcher.get()
+        return self._running.popleft()
+
+    async def _pop_async(self) -> AsyncResult[Any, T]:
+        if not self._ordered:
+            result = await self._watcher.get_async()
+            if result is None:  # pragma: no cover
+                raise RuntimeError("there is no running process")
+            self._running.remove(result)
+            return result
+        result = self._running[0]
+        while result in self._watcher.pending:
+            await self._watcher.get_async()
+        return self._running.popleft()
+
+    def _close(self) -> None:
+        self._watcher.close()
+        if not self._running:
+            return
+        logger.debug("%r terminate %d running processes", self, len(self._running))
+        while self._running:
+            result = self._running.popleft()
+            result._terminator.close("batch")  # noqa: SLF001
+
+    @override
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__}: concurrency: {self._concurrency}>"
@@ -0,0 +1,51 @@
+"""lean entry point of subprocess.
+
+only using in subprocess.
+it is run by path instead of `-c`,
+so nothing is imported before the task needs it.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+
+__all__ = []
+
+# same as `timeout_executor.const.TIMEOUT_EXECUTOR_SYS_PATH`.
+# const can not be imported before `sys.path` is restored.
+SYS_PATH_ENV = "_TIMEOUT_EXECUTOR_SYS_PATH"
+
+
+def main() -> None:
+    restore_sys_path()
+
+    from timeout_executor.subprocess import run_in_subprocess
+
+    run_in_subprocess()
+
+
+def restore_sys_path() -> None:
+    """use `sys.path` of parent process.
+
+    directory of this file has modules named like stdlib (ex: logging, types),
+    so it is removed from `sys.path`.
+    paths of parent process are added,
+    so the task can be loaded even with `-I` or `-S`.
+    """
+    here = os.path.dirname(os.path.abspath(__file__))  # noqa: PTH100, PTH120
+    sys.path[:] = [
+        path
+        for path in sys.path
+        if os.path.abspath(path or os.curdir) != here  # noqa: PTH100
+    ]
+    parent_path = os.environ.get(SYS_PATH_ENV, "")
+    if not parent_path:
+        return
+    for path in parent_path.split(os.pathsep):
+        if path not in sys.path:
+            sys.path.append(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,28 @@
 from __future__ import annotations
 
-__all__ = ["TIMEOUT_EXECUTOR_INPUT_FILE", "SUBPROCESS_COMMAND"]
+__all__ = [
+    "TIMEOUT_EXECUTOR_INPUT_FILE",
+    "SUBPROCESS_COMMAND",
+    "WORKER_COMMAND",
+    "FORKSERVER_COMMAND",
+]
 TIMEOUT_EXECUTOR_INPUT_FILE = "_TIMEOUT_EXECUTOR_INPUT_FILE"
 TIMEOUT_EXECUTOR_INIT_FILE = "_TIMEOUT_EXECUTOR_INIT_FILE"
+TIMEOUT_EXECUTOR_INPUT_FD = "_TIMEOUT_EXECUTOR_INPUT_FD"
+TIMEOUT_EXECUTOR_STREAM_FD = "_TIMEOUT_EXECUTOR_STREAM_FD"
+TIMEOUT_EXECUTOR_WORKER_FDS = "_TIMEOUT_EXECUTOR_WORKER_FDS"
+TIMEOUT_EXECUTOR_FORKSERVER_FDS = "_TIMEOUT_EXECUTOR_FORKSERVER_FDS"
+TIMEOUT_EXECUTOR_PRELOAD = "_TIMEOUT_EXECUTOR_PRELOAD"
+TIMEOUT_EXECUTOR_SYS_PATH = "_TIMEOUT_EXECUTOR_SYS_PATH"
+TIMEOUT_EXECUTOR_LIMITS = "_TIMEOUT_EXECUTOR_LIMITS"
+RSS_INTERVAL = 0.1
+"""default seconds between samples of rss of a process"""
+KILL_GRACE = 1.0
+"""default seconds between SIGTERM and SIGKILL"""
 SUBPROCESS_COMMAND = (
     "from timeout_executor.subprocess import run_in_subprocess;run_in_subprocess()"
 )
+WORKER_COMMAND = "from timeout_executor.subprocess import run_in_worker;run_in_worker()"
+FORKSERVER_COMMAND = (
+    "from timeout_executor.subprocess import run_in_forkserver;run_in_forkserver()"
+)
@@ -1,32 +1,44 @@
 from __future__ import annotations
 
+import hashlib
 import os
+import py_compile
 import shlex
 import subprocess
 import sys
-import tempfile
 import textwrap
 from collections import deque
 from contextlib import suppress
-from functools import partial
+from functools import lru_cache, partial
 from itertools import chain
 from pathlib import Path
 from types import FunctionType
-from typing import TYPE_CHECKING, Any, Callable, Generic, overload
+from typing import TYPE_CHECKING, Any, Callable, ClassVar, Generic, Literal, overload
 from uuid import UUID, uuid4
 
-import anyio
 import cloudpickle
+from async_wrapper import sync_to_async
 from typing_extensions import ParamSpec, Self, TypeVar, override
 
+from timeout_executor.admission import QueueFullError
 from timeout_executor.const import (
-    SUBPROCESS_COMMAND,
+    KILL_GRACE,
+    RSS_INTERVAL,
     TIMEOUT_EXECUTOR_INIT_FILE,
+    TIMEOUT_EXECUTOR_INPUT_FD,
     TIMEOUT_EXECUTOR_INPUT_FILE,
+    TIMEOUT_EXECUTOR_LIMITS,
+    TIMEOUT_EXECUTOR_STREAM_FD,
+    TIMEOUT_EXECUTOR_SYS_PATH,
 )
+from timeout_executor.janitor import process_dir
 from timeout_executor.logging import logger
+from timeout_executor.output import OUTPUT_TAIL, ProcessOutput, forward
 from timeout_executor.result import AsyncResult
+from timeout_executor.stream import ItemStream, is_stream_function
 from timeout_executor.terminate import Terminator
+from timeout_executor.timing import Timing
+from timeout_executor.transport import PipeTransport
 from timeout_executor.types import (
     Callback,
     CallbackArgs,
@@ -38,7 +50,17 @@ from timeout_executor.types import (
 if TYPE_CHECKING:
     from collections.abc import Awaitable, Iterable
 
+    import anyio
+    import jinja2
+
+    from timeout_executor.admission import Admission
+    from timeout_executor.forkserver import ForkedProcess, ForkServer
+    from timeout_executor.limits import ResourceLimits
     from timeout_executor.main import TimeoutExecutor
+    from timeout_executor.metrics import Metrics
+    from timeout_executor.output import OutputCallback, OutputMode
+    from timeout_executor.pool import PooledProcess, WorkerPool
+    from timeout_executor.types import ProcessType
 
 __all__ = ["apply_func", "delay_func"]
 
@@ -47,6 +69,9 @@ T = TypeVar("T", infer_variance=True)
 P2 = ParamSpec("P2")
 T2 = TypeVar("T2", infer_variance=True)
 _RM_DECORATORS: frozenset[str] = frozenset(["staticmethod", "lru_cache", "cache"])
+BOOTSTRAP_FILE = Path(__file__).with_name("bootstrap.py")
+FUNCTION_CACHE_SIZE = 128
+SCRIPT_CACHE_SIZE = 128
 
 
 class Executor(Callback[P, T], Generic[P, T]):
@@ -58,14 +83,45 @@ class Executor(Callback[P, T], Generic[P, T]):
         "_init_callbacks",
         "_callbacks",
         "_initializer",
+        "_transport",
+        "_shm_threshold",
+        "_segments",
+        "_output",
+        "_output_tail",
+        "_output_callbacks",
+        "_python_flags",
+        "_metrics",
+        "_limits",
+        "_max_rss",
+        "_rss_interval",
+        "_kill_grace",
+        "_temp_dir",
+        "_cache_function",
     )
 
-    def __init__(
+    process_group: ClassVar[bool] = True
+    """process leads its own process group, killed as a whole"""
+
+    def __init__(  # noqa: PLR0913
         self,
         timeout: float,
         func: Callable[P, T],
         callbacks: Callable[[], Iterable[ProcessCallback[P, T]]] | None = None,
         initializer: InitializerArgs[..., Any] | None = None,
+        *,
+        transport: Literal["file", "pipe"] = "file",
+        shm_threshold: int | None = None,
+        output: OutputMode = "forward",
+        output_tail: int = OUTPUT_TAIL,
+        output_callbacks: Callable[[], Iterable[OutputCallback]] | None = None,
+        python_flags: Iterable[str] = (),
+        metrics: Metrics | None = None,
+        limits: ResourceLimits | None = None,
+        max_rss: int | None = None,
+        rss_interval: float = RSS_INTERVAL,
+        kill_grace: float = KILL_GRACE,
+        temp_dir: Path | None = None,
+        cache_function: bool = False,
     ) -> None:
         self._timeout = timeout
         self._func = func
@@ -74,17 +130,58 @@ class Executor(Callback[P, T], Generic[P, T]):
         self._init_callbacks = callbacks
         self._callbacks: deque[ProcessCallback[P, T]] = deque()
         self._initializer = initializer
+        self._transport = transport
+        self._shm_threshold = shm_threshold
+        self._segments: list[str] = []
+        self._output: OutputMode = output
+        self._output_tail = output_tail
+        self._output_callbacks = output_callbacks
+        self._python_flags = tuple(python_flags)
+        self._metrics = metrics
+        self._limits = limits
+        self._max_rss = max_rss
+        self._rss_interval = rss_interval
+        self._kill_grace = kill_grace
+        self._temp_dir = temp_dir
+        self._cache_function = cache_function
 
     @property
     def unique_id(self) -> UUID:
         return self._unique_id
 
+    @property
+    def metrics(self) -> Metrics | None:
+        return self._metrics
+
+    @property
+    def limits(self) -> ResourceLimits | None:
+        return self._limits
+
+    @property
+    def kill_grace(self) -> float:
+        return self._kill_grace
+
+    @property
+    def temp_dir(self) -> Path | None:
+        return self._temp_dir
+
+    @property
+    def segment_prefix(self) -> str | None:
+        """prefix of shared memory segments created by subprocess"""
+        if self._shm_threshold is None:
+            return None
+        from timeout_executor.shm import SEGMENT_PREFIX
+
+        return f"{SEGMENT_PREFIX}{self.unique_id.hex}_"
+
+    def _limits_env(self) -> dict[str, str]:
+        if self._limits is None:
+            return {}
+        return {TIMEOUT_EXECUTOR_LIMITS: self._limits.to_env()}
+
     def _create_temp_files(self) -> tuple[Path, Path, Path]:
         """create temp files for input, output and init"""
-        temp_dir = Path(tempfile.gettempdir()) / "timeout_executor"
-        temp_dir.mkdir(exist_ok=True)
-
-        unique_dir = temp_dir / str(self.unique_id)
+        unique_dir = process_dir(self._temp_dir) / str(self.unique_id)
         unique_dir.mkdir(exist_ok=False)
 
         input_file = unique_dir / "input.b"
@@ -93,28 +190,67 @@ class Executor(Callback[P, T], Generic[P, T]):
 
         return input_file, output_file, init_file
 
+    def _create_transport(self) -> PipeTransport:
+        """create pipes for input and output"""
+        transport = PipeTransport()
+        transport.open()
+        return transport
+
     def _command(self, stacklevel: int = 2) -> list[str]:
         """create subprocess command"""
-        command = f'{sys.executable} -c "{SUBPROCESS_COMMAND}"'
-        logger.debug("%r command: %s", self, command, stacklevel=stacklevel)
-        return shlex.split(command)
+        command = [sys.executable, *self._python_flags, str(BOOTSTRAP_FILE)]
+        logger.debug("%r command: %s", self, shlex.join(command), stacklevel=stacklevel)
+        return command
 
     async def _command_async(self, stacklevel: int = 2) -> list[str]:
         """create subprocess command"""
         raise NotImplementedError
 
     def _dump_args(
-        self, output_file: Path | anyio.Path, *args: P.args, **kwargs: P.kwargs
+        self,
+        output_file: Path | anyio.Path | int | None,
+        *args: P.args,
+        **kwargs: P.kwargs,
     ) -> bytes:
         """dump args and output file path to input file"""
-        input_args = (self._func, args, kwargs, str(output_file))
+        # cached payload is pickled once more in input args,
+        # so pickle the function directly if it is not cached
+        func_payload = (
+            dumps_function(self._func) if self._cache_function else self._func
+        )
+        input_args = (
+            func_payload,
+            args,
+            kwargs,
+            _output_target(output_file),
+            self._shm_threshold,
+            self.segment_prefix,
+        )
         logger.debug("%r before dump input args", self)
-        input_args_as_bytes = cloudpickle.dumps(input_args)
+        input_args_as_bytes = self._dumps(input_args)
         logger.debug(
             "%r after dump input args :: size: %d", self, len(input_args_as_bytes)
         )
+        if self._metrics is not None:
+            self._metrics.input_bytes.observe(len(input_args_as_bytes))
         return input_args_as_bytes
 
+    def _dumps(self, value: Any) -> bytes:
+        """dump value. large buffers are placed in shared memory if enabled."""
+        if self._shm_threshold is None:
+            return cloudpickle.dumps(value)
+        from timeout_executor.shm import dumps
+
+        return dumps(value, self._shm_threshold, self._segments)
+
+    def _remove_segments(self, *args: Any, **kwargs: Any) -> None:  # noqa: ARG002
+        # segments are removed by child process after loading.
+        # remove the rest if child process ended before loading.
+        from timeout_executor.shm import remove_segment
+
+        while self._segments:
+            remove_segment(self._segments.pop())
+
     def _dump_initializer(self) -> bytes | None:
         if self._initializer is None:
             logger.debug("%r initializer is None", self)
@@ -131,54 +267,117 @@ class Executor(Callback[P, T], Generic[P, T]):
         )
         return init_args_as_bytes
 
-    def _create_process(
+    def _create_process(  # noqa: PLR0913
         self,
         command: list[str],
-        input_file: Path | anyio.Path,
+        input_file: Path | anyio.Path | None,
         init_file: Path | anyio.Path | None,
         stacklevel: int = 2,
-    ) -> subprocess.Popen[str]:
+        transport: PipeTransport | None = None,
+        stream: ItemStream | None = None,
+    ) -> ProcessType:
         """create new process"""
         logger.debug("%r before create new process", self, stacklevel=stacklevel)
-        process = subprocess.Popen(  # noqa: S603
-            command,
-            env=os.environ
-            | {
+        if transport is None:
+            env = {
                 TIMEOUT_EXECUTOR_INPUT_FILE: str(input_file),
                 TIMEOUT_EXECUTOR_INIT_FILE: "" if init_file is None else str(init_file),
-            },
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-        )
+            }
+            pass_fds: tuple[int, ...] = ()
+        else:
+            pass_fds = transport.child_fds
+            env = {TIMEOUT_EXECUTOR_INPUT_FD: str(pass_fds[0])}
+        if stream is not None:
+            pass_fds = (*pass_fds, stream.child_fd)
+            env[TIMEOUT_EXECUTOR_STREAM_FD] = str(stream.child_fd)
+        # child may not find modules of parent (ex: `-I`, `-S`)
+        env[TIMEOUT_EXECUTOR_SYS_PATH] = os.pathsep.join(sys.path)
+        env.update(self._limits_env())
+        try:
+            process = subprocess.Popen(  # noqa: S603
+                command,
+                env=os.environ | env,
+                stdout=self._output_pipe(),
+                stderr=self._output_pipe(),
+                text=True,
+                pass_fds=pass_fds,
+                # descendants are killed with the process
+                start_new_session=True,
+            )
+        except BaseException:
+            if transport is not None:
+                transport.close()
+            if stream is not None:
+                stream.close()
+            raise
+        if transport is not None:
+            transport.start()
+        if stream is not None:
+            stream.start()
         logger.debug("%r process: %d", self, process.pid, stacklevel=stacklevel)
         return process
 
-    def _create_executor_args(
+    def _create_stream(self) -> ItemStream | None:
+        """create pipe for items if function is generator"""
+        if not is_stream_function(self._func):
+            return None
+        stream = ItemStream()
+        stream.open()
+        return stream
+
+    def _output_pipe(self) -> int | None:
+        if self._output == "inherit":
+            return None
+        if self._output == "discard":
+            return subprocess.DEVNULL
+        return subprocess.PIPE
+
+    def _create_output(self, process: ProcessType) -> ProcessOutput | None:
+        """drain stdout and stderr of process"""
+        if process.stdout is None and process.stderr is None:
+            return None
+        callbacks: list[OutputCallback] = []
+        if self._output == "forward":
+            callbacks.append(forward)
+        if self._output_callbacks is not None:
+            callbacks.extend(self._output_callbacks())
+        return ProcessOutput(
+            process.stdout, process.stderr, self._output_tail, callbacks
+        )
+
+    def _create_executor_args(  # noqa: PLR0913
         self,
-        input_file: Path | anyio.Path,
-        output_file: Path | anyio.Path,
+        input_file: Path | anyio.Path | None,
+        output_file: Path | anyio.Path | None,
         init_file: Path | anyio.Path | None,
+        transport: PipeTransport | None,
         terminator: Terminator[P, T],
+        stream: ItemStream | None = None,
+        timing: Timing | None = None,
     ) -> ExecutorArgs[P, T]:
         """create executor args"""
         return ExecutorArgs(
             executor=self,
             func_name=self._func_name,
             terminator=terminator,
-            input_file=Path(input_file),
-            output_file=Path(output_file),
+            input_file=Path(input_file) if input_file is not None else None,
+            output_file=Path(output_file) if output_file is not None else None,
             init_file=Path(init_file) if init_file is not None else None,
             timeout=self._timeout,
+            transport=transport,
+            stream=stream,
+            timing=Timing() if timing is None else timing,
         )
 
-    def _init_process(
+    def _init_process(  # noqa: PLR0913
         self,
         command: list[str],
-        input_file: Path | anyio.Path,
-        output_file: Path | anyio.Path,
+        input_file: Path | anyio.Path | None,
+        output_file: Path | anyio.Path | None,
         init_file: Path | anyio.Path | None,
         stacklevel: int = 2,
+        transport: PipeTransport | None = None,
+        timing: Timing | None = None,
     ) -> AsyncResult[P, T]:
         """init process.
 
@@ -197,71 +396,126 @@ class Executor(Callback[P, T], Generic[P, T]):
         8. run terminator
         """
         logger.debug("%r before init process", self, stacklevel=stacklevel)
+        stream = self._create_stream()
         executor_args_builder = partial(
-            self._create_executor_args, input_file, output_file, init_file
+            self._create_executor_args,
+            input_file,
+            output_file,
+            init_file,
+            transport,
+            stream=stream,
+            timing=timing,
         )
         terminator = Terminator(executor_args_builder, self.callbacks)
         process = self._create_process(
-            command, input_file, init_file, stacklevel=stacklevel + 1
+            command,
+            input_file,
+            init_file,
+            stacklevel=stacklevel + 1,
+            transport=transport,
+            stream=stream,
         )
+        terminator.executor_args.timing.mark("spawned")
         result: AsyncResult[P, T] = AsyncResult(process, terminator.executor_args)
         terminator.callback_args = CallbackArgs(process=process, result=result)
+        terminator.output = self._create_output(process)
         terminator.start()
+        if self._max_rss is not None:
+            from timeout_executor.watchdog import get_watchdog
+
+            get_watchdog().register(terminator, self._max_rss, self._rss_interval)
+        if self._metrics is not None:
+            self._metrics._on_start(result)  # noqa: SLF001
         logger.debug("%r after init process", self, stacklevel=stacklevel)
         return result
 
-    def apply(self, *args: P.args, **kwargs: P.kwargs) -> AsyncResult[P, T]:
-        """run function with deadline"""
+    def _prepare_transport(self, *args: P.args, **kwargs: P.kwargs) -> PipeTransport:
+        """create pipes and dump args to send"""
+        transport = self._create_transport()
+        try:
+            transport.input_args = self._dump_args(transport.output_fd, *args, **kwargs)
+            transport.init_args = self._dump_initializer()
+        except BaseException:
+            transport.close()
+            raise
+        return transport
+
+    def _prepare_files(
+        self, timing: Timing, *args: P.args, **kwargs: P.kwargs
+    ) -> tuple[Path, Path, Path | None]:
+        """create temp files and write args and initializer"""
         input_file, output_file, init_file = self._create_temp_files()
         input_args_as_bytes = self._dump_args(output_file, *args, **kwargs)
+        init_args_as_bytes = self._dump_initializer()
+        timing.mark("serialized")
 
         logger.debug("%r before write input file", self)
         with input_file.open("wb+") as file:
             file.write(input_args_as_bytes)
         logger.debug("%r after write input file", self)
 
-        init_args_as_bytes = self._dump_initializer()
         if init_args_as_bytes is None:
-            init_file = None
-        else:
-            logger.debug("%r before write init file", self)
-            with init_file.open("wb+") as file:
-                file.write(init_args_as_bytes)
-            logger.debug("%r after write init file", self)
+            timing.mark("input_written")
+            return input_file, output_file, None
+
+        logger.debug("%r before write init file", self)
+        with init_file.open("wb+") as file:
+            file.write(init_args_as_bytes)
+        logger.debug("%r after write init file", self)
+        timing.mark("input_written")
+        return input_file, output_file, init_file
 
+    def apply(self, *args: P.args, **kwargs: P.kwargs) -> AsyncResult[P, T]:
+        """run function with deadline"""
+        timing = Timing()
+        if self._transport == "pipe":
+            command = self._command(stacklevel=2)
+            transport = self._prepare_transport(*args, **kwargs)
+            timing.mark("serialized")
+            # written by transport while the process starts
+            timing.mark("input_written")
+            return self._init_process(
+                command, None, None, None, transport=transport, timing=timing
+            )
+
+        input_file, output_file, init_file = self._prepare_files(
+            timing, *args, **kwargs
+        )
         command = self._command(stacklevel=2)
-        return self._init_process(command, input_file, output_file, init_file)
+        return self._init_process(
+            command, input_file, output_file, init_file, timing=timing
+        )
 
     async def delay(self, *args: P.args, **kwargs: P.kwargs) -> AsyncResult[P, T]:
         """run function with deadline"""
-        input_file, output_file, init_file = self._create_temp_files()
-        input_file, output_file, init_file = (
-            anyio.Path(input_file),
-            anyio.Path(output_file),
-            anyio.Path(init_file),
-        )
-        input_args_as_bytes = self._dump_args(output_file, *args, **kwargs)
-
-        logger.debug("%r before write input file", self)
-        async with await input_file.open("wb+") as file:
-            await file.write(input_args_as_bytes)
-        logger.debug("%r after write input file", self)
+        timing = Timing()
+        if self._transport == "pipe":
+            try:
+                command = await self._command_async(stacklevel=2)
+            except NotImplementedError:
+                command = self._command(stacklevel=2)
+            # serialized in a thread: event loop is not blocked by payload size
+            transport = await sync_to_async(self._prepare_transport)(*args, **kwargs)
+            timing.mark("serialized")
+            # written by transport while the process starts
+            timing.mark("input_written")
+            return self._init_process(
+                command, None, None, None, transport=transport, timing=timing
+            )
 
-        init_args_as_bytes = self._dump_initializer()
-        if init_args_as_bytes is None:
-            init_file = None
-        else:
-            logger.debug("%r before write init file", self)
-            async with await init_file.open("wb+") as file:
-                await file.write(init_args_as_bytes)
-            logger.debug("%r after write init file", self)
+        # serialized and written in one step in a thread
+        input_file, output_file, init_file = await sync_to_async(self._prepare_files)(
+            timing, *args, **kwargs
+        )
 
         try:
             command = await self._command_async(stacklevel=2)
         except NotImplementedError:
             command = self._command(stacklevel=2)
 
-        return self._init_process(command, input_file, output_file, init_file)
+        return self._init_process(
+            command, input_file, output_file, init_file, timing=timing
+        )
 
     @override
     def __repr__(self) -> str:
@@ -269,9 +523,12 @@ class Executor(Callback[P, T], Generic[P, T]):
 
     @override
     def callbacks(self) -> Iterable[ProcessCallback[P, T]]:
-        if self._init_callbacks is None:
-            return self._callbacks.copy()
-        return chain(self._init_callbacks(), self._callbacks.copy())
+        callbacks: Iterable[ProcessCallback[P, T]] = self._callbacks.copy()
+        if self._init_callbacks is not None:
+            callbacks = chain(self._init_callbacks(), callbacks)
+        if self._segments:
+            callbacks = chain([self._remove_segments], callbacks)
+        return callbacks
 
     @override
     def add_callback(self, callback: ProcessCallback[P, T]) -> Self:
@@ -286,31 +543,31 @@ class Executor(Callback[P, T], Generic[P, T]):
 
 
 class JinjaExecutor(Executor[P, T], Generic[P, T]):
-    __slots__ = (*Executor.__slots__, "_j2_script")
-    _j2_script: Path | None
-
-    def __init__(self, *args: Any, **kwargs: Any) -> None:
-        super().__init__(*args, **kwargs)
-        self._j2_script = None
-
-    def _cleanup(self, *args: Any, **kwargs: Any) -> None:  # noqa: ARG002
-        if self._j2_script is None:
-            return
-        with suppress(FileNotFoundError):
-            self._j2_script.unlink()
-        self._j2_script = None
+    __slots__ = Executor.__slots__
 
     @override
     def _dump_args(
-        self, output_file: Path | anyio.Path, *args: P.args, **kwargs: P.kwargs
+        self,
+        output_file: Path | anyio.Path | int | None,
+        *args: P.args,
+        **kwargs: P.kwargs,
     ) -> bytes:
         """dump args and output file path to input file"""
-        input_args = (None, args, kwargs, str(output_file))
+        input_args = (
+            None,
+            args,
+            kwargs,
+            _output_target(output_file),
+            self._shm_threshold,
+            self.segment_prefix,
+        )
         logger.debug("%r before dump input args", self)
-        input_args_as_bytes = cloudpickle.dumps(input_args)
+        input_args_as_bytes = self._dumps(input_args)
         logger.debug(
             "%r after dump input args :: size: %d", self, len(input_args_as_bytes)
         )
+        if self._metrics is not None:
+            self._metrics.input_bytes.observe(len(input_args_as_bytes))
         return input_args_as_bytes
 
     @override
@@ -327,70 +584,108 @@ class JinjaExecutor(Executor[P, T], Generic[P, T]):
         return init_args_as_bytes
 
     @override
-    def callbacks(self) -> Iterable[Callable[[CallbackArgs[P, T]], Any]]:
-        callbacks = super().callbacks()
-        return chain([self._cleanup], callbacks)
+    def _command(self, stacklevel: int = 2) -> list[str]:
+        init_func = None if self._initializer is None else self._initializer.function
+        script = jinja_script(self._func, init_func, self._temp_dir)
+        command = [sys.executable, str(script)]
+        logger.debug("%r command: %s", self, shlex.join(command), stacklevel=stacklevel)
+        return command
+
+    @override
+    async def _command_async(self, stacklevel: int = 2) -> list[str]:
+        # rendering and compiling do not block event loop
+        return await sync_to_async(self._command)(stacklevel=stacklevel + 1)
+
+
+class PoolExecutor(Executor[P, T], Generic[P, T]):
+    __slots__ = (*Executor.__slots__, "_pool")
+
+    # worker process is shared by tasks
+    process_group: ClassVar[bool] = False
+
+    def __init__(self, *args: Any, pool: WorkerPool, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._pool = pool
 
     @override
     def _command(self, stacklevel: int = 2) -> list[str]:
-        j2_script = self._render_jinja_subprocess()
-        self._j2_script = Path(tempfile.gettempdir()) / str(uuid4())
-        with self._j2_script.open("w+") as file:
-            file.write(j2_script)
-        command = f"{sys.executable} {self._j2_script}"
-        logger.debug("%r command: %s", self, command, stacklevel=stacklevel)
-        return shlex.split(command)
+        command = self._pool.command
+        logger.debug("%r command: %s", self, shlex.join(command), stacklevel=stacklevel)
+        return command
 
     @override
-    async def _command_async(self, stacklevel: int = 2) -> list[str]:
-        j2_script = await self._render_async_jinja_subprocess()
-        self._j2_script = Path(tempfile.gettempdir()) / str(uuid4())
-        async with await anyio.Path(self._j2_script).open("w+") as file:
-            await file.write(j2_script)
-        command = f"{sys.executable} {self._j2_script}"
-        logger.debug("%r command: %s", self, command, stacklevel=stacklevel)
-        return shlex.split(command)
-
-    def _prepare_func_code(self) -> tuple[str, str, str, str]:
-        if self._initializer is None:
-            init_func_code = "    def empty_initializer(): pass"
-            init_func_name = "empty_initializer"
-        else:
-            init_func_code, init_func_name = parse_func_code(self._initializer.function)
-        func_code, func_name = parse_func_code(self._func)
-        func_code = textwrap.indent(func_code, "    ")
-
-        return init_func_code, init_func_name, func_code, func_name
-
-    def _render_jinja_subprocess(self) -> str:
-        import jinja2
-
-        init_func_code, init_func_name, func_code, func_name = self._prepare_func_code()
-        with Path(__file__).with_name("subprocess_jinja.py").open("r") as file:
-            source = file.read()
-        return jinja2.Template(source).render(
-            func_code=func_code,
-            func_name=func_name,
-            init_func_code=init_func_code,
-            init_func_name=init_func_name,
+    def _dump_initializer(self) -> bytes | None:
+        # initializer runs once per worker, not per task
+        return None
+
+    @override
+    def _create_transport(self) -> PipeTransport:
+        # payload is sent through worker pipes
+        return PipeTransport()
+
+    @override
+    def _create_stream(self) -> None:
+        # items are collected in worker and sent with the result
+        return None
+
+    @override
+    def _create_process(
+        self,
+        command: list[str],
+        input_file: Path | anyio.Path | None,
+        init_file: Path | anyio.Path | None,
+        stacklevel: int = 2,
+        transport: PipeTransport | None = None,
+        stream: ItemStream | None = None,
+    ) -> PooledProcess:
+        """submit task to worker pool"""
+        logger.debug("%r before submit task", self, stacklevel=stacklevel)
+        process = self._pool.submit(
+            None if input_file is None else Path(input_file), transport
         )
+        logger.debug("%r submit task: %r", self, process, stacklevel=stacklevel)
+        return process
+
+
+class ForkServerExecutor(Executor[P, T], Generic[P, T]):
+    __slots__ = (*Executor.__slots__, "_forkserver")
+
+    def __init__(self, *args: Any, forkserver: ForkServer, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._forkserver = forkserver
 
-    async def _render_async_jinja_subprocess(self) -> str:
-        import jinja2
-
-        init_func_code, init_func_name, func_code, func_name = self._prepare_func_code()
-        async with (
-            await anyio.Path(__file__)
-            .with_name("subprocess_jinja.py")
-            .open("r") as file
-        ):
-            source = await file.read()
-        return await jinja2.Template(source, enable_async=True).render_async(
-            func_code=func_code,
-            func_name=func_name,
-            init_func_code=init_func_code,
-            init_func_name=init_func_name,
+    @override
+    def _command(self, stacklevel: int = 2) -> list[str]:
+        command = self._forkserver.command
+        logger.debug("%r command: %s", self, shlex.join(command), stacklevel=stacklevel)
+        return command
+
+    @override
+    def _create_stream(self) -> None:
+        # items are collected in forked process and sent with the result
+        return None
+
+    @override
+    def _create_process(
+        self,
+        command: list[str],
+        input_file: Path | anyio.Path | None,
+        init_file: Path | anyio.Path | None,
+        stacklevel: int = 2,
+        transport: PipeTransport | None = None,
+        stream: ItemStream | None = None,
+    ) -> ForkedProcess:
+        """fork new process from fork server"""
+        if input_file is None or transport is not None:
+            raise ValueError("fork server does not support pipe transport")
+        logger.debug("%r before fork new process", self, stacklevel=stacklevel)
+        process = self._forkserver.submit(
+            Path(input_file),
+            None if init_file is None else Path(init_file),
+            self._limits_env(),
         )
+        logger.debug("%r fork new process: %r", self, process, stacklevel=stacklevel)
+        return process
 
 
 @overload
@@ -428,23 +723,23 @@ def apply_func(
     Returns:
         async result container
     """
-    executor_type = (
-        JinjaExecutor
-        if not isinstance(timeout_or_executor, (int, float))
-        and timeout_or_executor.use_jinja
-        else Executor
-    )
-
-    if isinstance(timeout_or_executor, (float, int)):
-        executor = executor_type(timeout_or_executor, func)
-    else:
-        executor = executor_type(
-            timeout_or_executor.timeout,
-            func,
-            timeout_or_executor.callbacks,
-            timeout_or_executor.initializer,
-        )
-    return executor.apply(*args, **kwargs)
+    executor = _create_executor(timeout_or_executor, func)
+    admission = _admission(timeout_or_executor)
+    if admission is None:
+        return executor.apply(*args, **kwargs)
+
+    try:
+        admission.acquire()
+    except (QueueFullError, TimeoutError):
+        _reject(timeout_or_executor)
+        raise
+    try:
+        result = executor.apply(*args, **kwargs)
+    except BaseException:
+        admission.release()
+        raise
+    _release_on_exit(result, admission)
+    return result
 
 
 @overload
@@ -482,20 +777,164 @@ async def delay_func(
     Returns:
         async result container
     """
-    executor_type = (
-        JinjaExecutor
-        if not isinstance(timeout_or_executor, (int, float))
-        and timeout_or_executor.use_jinja
-        else Executor
+    executor = _create_executor(timeout_or_executor, func)
+    admission = _admission(timeout_or_executor)
+    if admission is None:
+        return await executor.delay(*args, **kwargs)
+
+    try:
+        await admission.acquire_async()
+    except (QueueFullError, TimeoutError):
+        _reject(timeout_or_executor)
+        raise
+    try:
+        result = await executor.delay(*args, **kwargs)
+    except BaseException:
+        admission.release()
+        raise
+    _release_on_exit(result, admission)
+    return result
+
+
+def _create_executor(
+    timeout_or_executor: float | TimeoutExecutor, func: Callable[P2, T2]
+) -> Executor[P2, T2]:
+    if isinstance(timeout_or_executor, (float, int)):
+        return Executor(timeout_or_executor, func)
+
+    args = (
+        timeout_or_executor.timeout,
+        func,
+        timeout_or_executor.callbacks,
+        timeout_or_executor.initializer,
     )
+    kwargs: dict[str, Any] = {
+        "transport": timeout_or_executor.transport,
+        "shm_threshold": timeout_or_executor.shm_threshold,
+        "output": timeout_or_executor.output,
+        "output_tail": timeout_or_executor.output_tail,
+        "output_callbacks": timeout_or_executor.output_callbacks,
+        "python_flags": timeout_or_executor.python_flags,
+        "metrics": timeout_or_executor.metrics,
+        "limits": timeout_or_executor.limits,
+        "max_rss": timeout_or_executor.max_rss,
+        "rss_interval": timeout_or_executor.rss_interval,
+        "kill_grace": timeout_or_executor.kill_grace,
+        "temp_dir": timeout_or_executor.temp_dir,
+        "cache_function": timeout_or_executor.cache_function,
+    }
+    if timeout_or_executor.use_jinja:
+        return JinjaExecutor(*args, **kwargs)
+    if timeout_or_executor.pool_size is not None:
+        return PoolExecutor(*args, pool=timeout_or_executor.pool, **kwargs)
+    if timeout_or_executor.start_method == "forkserver":
+        return ForkServerExecutor(
+            *args, forkserver=timeout_or_executor.forkserver, **kwargs
+        )
+    return Executor(*args, **kwargs)
 
+
+def _admission(timeout_or_executor: float | TimeoutExecutor) -> Admission | None:
     if isinstance(timeout_or_executor, (float, int)):
-        executor = executor_type(timeout_or_executor, func)
+        return None
+    return timeout_or_executor.admission
+
+
+def _reject(timeout_or_executor: float | TimeoutExecutor) -> None:
+    if isinstance(timeout_or_executor, (float, int)):
+        return
+    if timeout_or_executor.metrics is not None:
+        timeout_or_executor.metrics.rejected.inc()
+
+
+def _release_on_exit(result: AsyncResult[Any, Any], admission: Admission) -> None:
+    # released from process monitor as soon as the process ends
+    if not result._terminator._add_exit_waiter(admission.release):  # noqa: SLF001
+        admission.release()
+
+
+def dumps_function(func: Callable[..., Any]) -> bytes:
+    """dump function with cache.
+
+    payload of python function is cached by function identity,
+    so captured globals and closures are serialized once.
+    used only if `cache_function` is enabled.
+    """
+    if isinstance(func, FunctionType):
+        return _dumps_function(func)
+    return cloudpickle.dumps(func)
+
+
+@lru_cache(maxsize=FUNCTION_CACHE_SIZE)
+def _dumps_function(func: FunctionType) -> bytes:
+    return cloudpickle.dumps(func)
+
+
+def _output_target(output_file: Path | anyio.Path | int | None) -> str | int | None:
+    # int: fd of pipe in child process, None: decided by worker
+    if output_file is None or isinstance(output_file, int):
+        return output_file
+    return str(output_file)
+
+
+def jinja_script(
+    func: Callable[..., Any],
+    init_func: Callable[..., Any] | None = None,
+    temp_dir: Path | None = None,
+) -> Path:
+    """render and compile script of jinja executor.
+
+    compiled file is named by the digest of rendered source,
+    so scripts with the same source share one file.
+    file is compiled again if it was removed.
+    """
+    source, digest = _render_jinja_script(func, init_func)
+    script_name = f"{digest}.{sys.implementation.cache_tag}.pyc"
+    script = process_dir(temp_dir) / "jinja" / script_name
+    if script.exists():
+        return script
+
+    script.parent.mkdir(parents=True, exist_ok=True)
+    source_file = script.with_suffix(".py")
+    # written atomically: scripts may be compiled from many threads
+    temp_file = source_file.with_name(f"{uuid4().hex}.tmp")
+    temp_file.write_text(source)
+    temp_file.replace(source_file)
+    # child runs compiled code without parsing source again
+    py_compile.compile(str(source_file), cfile=str(script), doraise=True)
+    logger.debug("compile jinja script: %s", script)
+    return script
+
+
+@lru_cache(maxsize=SCRIPT_CACHE_SIZE)
+def _render_jinja_script(
+    func: Callable[..., Any], init_func: Callable[..., Any] | None
+) -> tuple[str, str]:
+    # source of a function object does not change
+    if init_func is None:
+        init_func_code = "    def empty_initializer(): pass"
+        init_func_name = "empty_initializer"
     else:
-        executor = executor_type(
-            timeout_or_executor.timeout, func, timeout_or_executor.callbacks
-        )
-    return await executor.delay(*args, **kwargs)
+        init_func_code, init_func_name = parse_func_code(init_func)
+        init_func_code = textwrap.indent(init_func_code, "    ")
+    func_code, func_name = parse_func_code(func)
+    func_code = textwrap.indent(func_code, "    ")
+
+    source = _jinja_template().render(
+        func_code=func_code,
+        func_name=func_name,
+        init_func_code=init_func_code,
+        init_func_name=init_func_name,
+    )
+    return source, hashlib.sha256(source.encode()).hexdigest()
+
+
+@lru_cache(maxsize=1)
+def _jinja_template() -> jinja2.Template:
+    import jinja2
+
+    source = Path(__file__).with_name("subprocess_jinja.py").read_text()
+    return jinja2.Template(source)
 
 
 def func_name(func: Callable[..., Any]) -> str:
@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import json
+import os
+import shlex
+import subprocess
+import sys
+import threading
+from contextlib import suppress
+from itertools import count
+from typing import TYPE_CHECKING
+
+from typing_extensions import override
+
+from timeout_executor.const import (
+    FORKSERVER_COMMAND,
+    TIMEOUT_EXECUTOR_FORKSERVER_FDS,
+    TIMEOUT_EXECUTOR_PRELOAD,
+)
+from timeout_executor.handle import ProcessHandle
+from timeout_executor.logging import logger
+from timeout_executor.rusage import ResourceUsage
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Mapping
+    from pathlib import Path
+    from typing import BinaryIO
+
+__all__ = ["ForkServer", "ForkedProcess"]
+
+
+class ForkedProcess(ProcessHandle):
+    """handle of a process forked from fork server"""
+
+    __slots__ = ("_signal",)
+
+    def __init__(self, args: list[str]) -> None:
+        super().__init__(args)
+        self._signal: int | None = None
+
+    @override
+    def send_signal(self, sig: int) -> None:
+        with self._lock:
+            if self._returncode is not None:
+                return
+            if self._pid == -1:
+                # not forked yet. send after fork.
+                self._signal = sig
+                return
+            with suppress(ProcessLookupError):
+                os.kill(self._pid, sig)
+
+    @override
+    def _set_pid(self, pid: int) -> None:
+        with self._lock:
+            super()._set_pid(pid)
+            if self._signal is not None:
+                with suppress(ProcessLookupError):
+                    os.kill(pid, self._signal)
+
+
+class ForkServer:
+    """long-lived process that forks a new process per task.
+
+    modules imported in fork server are shared with forked processes.
+    """
+
+    __slots__ = (
+        "_preload",
+        "_lock",
+        "_counter",
+        "_spawning",
+        "_running",
+        "_closed",
+        "_process",
+        "_requests",
+        "_events",
+        "_thread",
+        "command",
+    )
+
+    def __init__(self, preload: Iterable[str] = ()) -> None:
+        self._preload = tuple(preload)
+        for module in self._preload:
+            if not module or "," in module:
+                error_msg = f"invalid module name: {module!r}"
+                raise ValueError(error_msg)
+
+        self._lock = threading.RLock()
+        self._counter = count()
+        self._spawning: dict[int, ForkedProcess] = {}
+        self._running: dict[int, ForkedProcess] = {}
+        self._closed = False
+        self.command = shlex.split(f'{sys.executable} -c "{FORKSERVER_COMMAND}"')
+
+        request_read, request_write = os.pipe()
+        event_read, event_write = os.pipe()
+        env = os.environ | {
+            TIMEOUT_EXECUTOR_FORKSERVER_FDS: f"{request_read},{event_write}",
+            TIMEOUT_EXECUTOR_PRELOAD: ",".join(self._preload),
+        }
+        try:
+            self._process = subprocess.Popen(  # noqa: S603
+                self.command, env=env, pass_fds=(request_read, event_write)
+            )
+        except BaseException:
+            os.close(request_write)
+            os.close(event_read)
+            raise
+        finally:
+            os.close(request_read)
+            os.close(event_write)
+
+        self._requests: BinaryIO = os.fdopen(request_write, "wb")
+        self._events: BinaryIO = os.fdopen(event_read, "rb")
+        self._thread = threading.Thread(
+            target=self._watch, name=f"timeout-executor-forkserver-{self._process.pid}"
+        )
+        self._thread.daemon = True
+        self._thread.start()
+        logger.debug("%r start fork server", self)
+
+    @property
+    def preload(self) -> tuple[str, ...]:
+        """modules imported in fork server"""
+        return self._preload
+
+    @property
+    def closed(self) -> bool:
+        """fork server is closed or not"""
+        return self._closed
+
+    def submit(
+        self,
+        input_file: Path,
+        init_file: Path | None,
+        env: Mapping[str, str] | None = None,
+    ) -> ForkedProcess:
+        """fork new process to run task.
+
+        `env` is added to environment variables of forked process.
+        """
+        request_id = next(self._counter)
+        request = {
+            "id": request_id,
+            "input": str(input_file),
+            "init": "" if init_file is None else str(init_file),
+            "env": os.environ | dict(env or {}),
+        }
+        process = ForkedProcess(self.command)
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("fork server is closed")
+            self._spawning[request_id] = process
+            try:
+                self._requests.write(json.dumps(request).encode() + b"\n")
+                self._requests.flush()
+            except OSError:
+                self._spawning.pop(request_id)
+                raise
+        return process
+
+    def close(self) -> None:
+        """stop accepting tasks.
+
+        fork server exits after all forked processes end.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            with suppress(OSError):
+                self._requests.close()
+        logger.debug("%r closed", self)
+
+    def _watch(self) -> None:
+        try:
+            for line in self._events:
+                event, key, value, *fields = line.decode().split()
+                if event == "spawn":
+                    self._on_spawn(int(key), int(value))
+                else:
+                    self._on_exit(int(key), int(value), fields)
+        finally:
+            returncode = self._process.wait()
+            logger.debug("%r end fork server :: returncode: %d", self, returncode)
+            self._events.close()
+            self._on_server_exit(returncode)
+
+    def _on_spawn(self, request_id: int, pid: int) -> None:
+        with self._lock:
+            process = self._spawning.pop(request_id)
+            self._running[pid] = process
+        process._set_pid(pid)  # noqa: SLF001
+
+    def _on_exit(self, pid: int, returncode: int, fields: list[str]) -> None:
+        with self._lock:
+            process = self._running.pop(pid)
+        rusage = ResourceUsage.from_fields(fields) if fields else None
+        process._set_returncode(returncode, rusage)  # noqa: SLF001
+
+    def _on_server_exit(self, returncode: int) -> None:
+        with self._lock:
+            self._closed = True
+            with suppress(OSError):
+                self._requests.close()
+            processes = [*self._spawning.values(), *self._running.values()]
+            self._spawning.clear()
+            self._running.clear()
+
+        for process in processes:
+            # orphaned processes can not be reaped anymore
+            process.kill()
+            process._set_returncode(returncode or -1)  # noqa: SLF001
+
+    @override
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__}: {self._process.pid}>"
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import signal
+import subprocess
+import threading
+from typing import TYPE_CHECKING, Any, Callable
+
+from typing_extensions import override
+
+if TYPE_CHECKING:
+    from timeout_executor.rusage import ResourceUsage
+
+__all__ = ["ProcessHandle"]
+
+
+class ProcessHandle:
+    """popen-like handle of a task.
+
+    using when the task does not own its process (ex: pooled worker).
+    """
+
+    __slots__ = (
+        "args",
+        "_pid",
+        "_returncode",
+        "_rusage",
+        "_event",
+        "_lock",
+        "_exit_callbacks",
+    )
+
+    stdout: None = None
+    """output is not captured by handle"""
+    stderr: None = None
+    """output is not captured by handle"""
+
+    def __init__(self, args: Any = None) -> None:
+        self.args = args
+        self._pid = -1
+        self._returncode: int | None = None
+        self._rusage: ResourceUsage | None = None
+        self._event = threading.Event()
+        self._lock = threading.RLock()
+        self._exit_callbacks: list[Callable[[], Any]] = []
+
+    @property
+    def pid(self) -> int:
+        """pid of the process running the task"""
+        return self._pid
+
+    @property
+    def returncode(self) -> int | None:
+        """task return code. `None` until the task ends."""
+        return self._returncode
+
+    @property
+    def rusage(self) -> ResourceUsage | None:
+        """resource usage of the task. `None` if not available."""
+        return self._rusage
+
+    def poll(self) -> int | None:
+        """check if the task has ended"""
+        return self._returncode
+
+    def wait(self, timeout: float | None = None) -> int:
+        """wait for the task to end"""
+        if not self._event.wait(timeout):
+            raise subprocess.TimeoutExpired(self.args, timeout or 0)
+        return self._returncode  # pyright: ignore[reportReturnType]
+
+    def terminate(self) -> None:
+        """terminate the task"""
+        self.send_signal(signal.SIGTERM)
+
+    def kill(self) -> None:
+        """kill the task"""
+        self.send_signal(signal.SIGKILL)
+
+    def send_signal(self, sig: int) -> None:
+        """send signal to the task"""
+        raise NotImplementedError
+
+    def _set_pid(self, pid: int) -> None:
+        with self._lock:
+            self._pid = pid
+
+    def _set_returncode(
+        self, returncode: int, rusage: ResourceUsage | None = None
+    ) -> bool:
+        with self._lock:
+            if self._returncode is not None:
+                return False
+            self._rusage = rusage
+            self._returncode = returncode
+            callbacks, self._exit_callbacks = self._exit_callbacks, []
+        self._event.set()
+        for callback in callbacks:
+            callback()
+        return True
+
+    def _add_exit_callback(self, callback: Callable[[], Any]) -> None:
+        """run callback after the task ends"""
+        with self._lock:
+            if self._returncode is None:
+                self._exit_callbacks.append(callback)
+                return
+        callback()
+
+    @override
+    def __repr__(self) -> str:
+        return (
+            f"<{type(self).__name__}: pid: {self._pid}, "
+            f"returncode: {self._returncode}>"
+        )
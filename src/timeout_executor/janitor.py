@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import atexit
+import hashlib
+import os
+import queue
+import shutil
+import socket
+import tempfile
+import threading
+from contextlib import suppress
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable
+
+from psutil import pid_exists
+from typing_extensions import override
+
+from timeout_executor.logging import logger
+
+__all__ = ["Janitor", "get_janitor", "process_dir"]
+
+TEMP_DIR_NAME = "timeout_executor"
+
+
+class Janitor:
+    """remove temp files with a single thread.
+
+    removal is queued, so it does not block the caller,
+    and queued paths are removed in batches.
+    """
+
+    __slots__ = ("_queue", "_thread")
+
+    def __init__(self) -> None:
+        self._queue: queue.SimpleQueue[Callable[[], Any]] = queue.SimpleQueue()
+        self._thread = threading.Thread(
+            target=self._run, name="timeout-executor-janitor"
+        )
+        self._thread.daemon = True
+        self._thread.start()
+
+    def remove(self, path: Path) -> None:
+        """remove file or directory later"""
+        self._queue.put(partial(_remove, path))
+
+    def remove_segments(self, prefix: str) -> None:
+        """remove shared memory segments listed in manifest of prefix later"""
+        from timeout_executor.shm import remove_segments
+
+        self._queue.put(partial(remove_segments, prefix))
+
+    def sweep(self, base: Path) -> None:
+        """remove directories of ended processes in base directory later"""
+        self._queue.put(partial(sweep, base))
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """wait for queued removals to end.
+
+        Returns:
+            false if timeout
+        """
+        event = threading.Event()
+        self._queue.put(event.set)
+        return event.wait(timeout)
+
+    def _run(self) -> None:
+        while True:
+            jobs = [self._queue.get()]
+            while True:
+                try:
+                    jobs.append(self._queue.get_nowait())
+                except queue.Empty:  # noqa: PERF203
+                    break
+            for job in jobs:
+                try:
+                    job()
+                except Exception:  # noqa: BLE001, PERF203
+                    logger.exception("%r error when run %r", self, job)
+
+    @override
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__}>"
+
+
+def _remove(path: Path) -> None:
+    if path.is_dir():
+        shutil.rmtree(path, ignore_errors=True)
+    else:
+        path.unlink(missing_ok=True)
+
+
+def _namespace() -> str:
+    # pid is unique only in a pid namespace of a host.
+    # base directory can be shared with other containers or hosts.
+    key = socket.gethostname()
+    with suppress(OSError):
+        key += f":{Path('/proc/self/ns/pid').stat().st_ino}"
+    return hashlib.sha256(key.encode()).hexdigest()[:16]
+
+
+def _dir_name(pid: int) -> str:
+    return f"{NAMESPACE}-{pid}"
+
+
+def sweep(base: Path) -> list[Path]:
+    """remove directories of processes that do not exist anymore.
+
+    directories of other hosts or pid namespaces are not removed.
+
+    Returns:
+        removed directories
+    """
+    removed: list[Path] = []
+    if not base.is_dir():
+        return removed
+    for path in base.iterdir():
+        namespace, _, pid = path.name.rpartition("-")
+        if namespace != NAMESPACE or not pid.isdigit() or pid_exists(int(pid)):
+            continue
+        logger.debug("remove stale temp dir: %s", path)
+        shutil.rmtree(path, ignore_errors=True)
+        removed.append(path)
+    return removed
+
+
+def base_dir(root: str | os.PathLike[str] | None = None) -> Path:
+    """directory of temp files of all processes"""
+    return Path(tempfile.gettempdir() if root is None else root) / TEMP_DIR_NAME
+
+
+def process_dir(root: str | os.PathLike[str] | None = None) -> Path:
+    """directory of temp files of current process.
+
+    removed at exit. if the process crashed,
+    it is removed by the first process using the same base directory.
+    """
+    base = base_dir(root)
+    key = (base, os.getpid())
+    path = _process_dirs.get(key)
+    if path is not None:
+        return path
+    with _process_dirs_lock:
+        path = _process_dirs.get(key)
+        if path is not None:
+            return path
+        path = base / _dir_name(os.getpid())
+        path.mkdir(parents=True, exist_ok=True)
+        get_janitor().sweep(base)
+        _process_dirs[key] = path
+    return path
+
+
+def _remove_process_dirs() -> None:
+    # forked process inherits this hook, but not directories of parent process
+    pid = os.getpid()
+    for (_, owner), path in list(_process_dirs.items()):
+        if owner == pid:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+NAMESPACE = _namespace()
+_process_dirs: dict[tuple[Path, int], Path] = {}
+_process_dirs_lock = threading.Lock()
+_janitor: Janitor | None = None
+_janitor_lock = threading.Lock()
+
+
+def get_janitor() -> Janitor:
+    """janitor of current process.
+
+    janitor starts on first call.
+    """
+    global _janitor  # noqa: PLW0603
+    if _janitor is not None:
+        return _janitor
+    with _janitor_lock:
+        if _janitor is None:
+            _janitor = Janitor()
+    return _janitor
+
+
+def _reset_janitor() -> None:
+    # threads of parent process do not exist in forked process
+    global _janitor, _janitor_lock, _process_dirs_lock  # noqa: PLW0603
+    _janitor = None
+    _janitor_lock = threading.Lock()
+    _process_dirs_lock = threading.Lock()
+    _process_dirs.clear()
+
+
+atexit.register(_remove_process_dirs)
+if hasattr(os, "register_at_fork"):  # pragma: no branch
+    os.register_at_fork(after_in_child=_reset_janitor)
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+from typing import NamedTuple
+
+__all__ = ["ResourceLimits", "MemoryLimitExceeded", "CpuLimitExceeded"]
+
+_RESOURCES = {
+    "max_memory": "RLIMIT_AS",
+    "max_cpu_time": "RLIMIT_CPU",
+    "max_open_files": "RLIMIT_NOFILE",
+}
+"""field of limits and name of resource in `resource` module"""
+CPU_KILL_DELAY = 1
+"""seconds of cpu time between SIGXCPU and SIGKILL"""
+
+
+class MemoryLimitExceeded(MemoryError):  # noqa: N818
+    """process ran out of address space limited by `max_memory`"""
+
+
+class CpuLimitExceeded(TimeoutError):  # noqa: N818
+    """process used more cpu time than `max_cpu_time`"""
+
+
+class ResourceLimits(NamedTuple):
+    """limits of each process, applied before user code runs.
+
+    `None` means no limit.
+    """
+
+    max_memory: int | None = None
+    """max address space in bytes"""
+    max_cpu_time: int | None = None
+    """max cpu time in seconds"""
+    max_open_files: int | None = None
+    """max number of open file descriptors"""
+
+    def to_env(self) -> str:
+        """encode limits as environment variable of subprocess"""
+        return ",".join(
+            f"{_RESOURCES[name]}={value}"
+            for name, value in self._asdict().items()
+            if value is not None
+        )
+
+
+def apply_limits(value: str) -> None:
+    """set limits encoded by `ResourceLimits.to_env` to current process.
+
+    hard limits are also lowered, so user code can not raise them again.
+    """
+    if not value:
+        return
+    import resource
+
+    for item in value.split(","):
+        name, limit = item.split("=")
+        key = getattr(resource, name)
+        _, hard = resource.getrlimit(key)
+        soft = int(limit)
+        # SIGXCPU at soft limit, SIGKILL at hard limit
+        new_hard = soft + CPU_KILL_DELAY if key == resource.RLIMIT_CPU else soft
+        if hard != resource.RLIM_INFINITY:
+            soft, new_hard = min(soft, hard), min(new_hard, hard)
+        resource.setrlimit(key, (soft, new_hard))
@@ -1,35 +1,24 @@
 from __future__ import annotations
 
 import logging
-from logging.config import dictConfig
-from typing import Any
+import sys
 
 __all__ = ["logger"]
 
-LOGGING_CONFIG: dict[str, Any] = {
-    "version": 1,
-    "disable_existing_loggers": False,
-    "formatters": {
-        "timeout-executor.default": {
-            "()": "logging.Formatter",
-            "fmt": "%(levelname)s - %(asctime)s :: %(message)s",
-        }
-    },
-    "handlers": {
-        "timeout-executor.default": {
-            "formatter": "timeout-executor.default",
-            "class": "logging.StreamHandler",
-            "stream": "ext://sys.stderr",
-        }
-    },
-    "loggers": {
-        "timeout-executor": {
-            "handlers": ["timeout-executor.default"],
-            "level": "INFO",
-            "propagate": False,
-        }
-    },
-}
+LOGGER_NAME = "timeout-executor"
+LOG_FORMAT = "%(levelname)s - %(asctime)s :: %(message)s"
 
-dictConfig(LOGGING_CONFIG)
-logger = logging.getLogger("timeout-executor")
+
+def _create_logger() -> logging.Logger:
+    # same as `logging.config.dictConfig` without importing it
+    logger = logging.getLogger(LOGGER_NAME)
+    handler = logging.StreamHandler(sys.stderr)
+    handler.set_name("timeout-executor.default")
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    return logger
+
+
+logger = _create_logger()
@@ -1,18 +1,29 @@
 from __future__ import annotations
 
+import os
 from collections import deque
 from contextlib import suppress
 from importlib.util import find_spec
-from typing import TYPE_CHECKING, Any, Callable, Generic, overload
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Generic, Literal, overload
 
 from typing_extensions import ParamSpec, Self, TypeVar, override
 
-from timeout_executor.executor import apply_func, delay_func
+from timeout_executor.const import KILL_GRACE, RSS_INTERVAL
+from timeout_executor.output import OUTPUT_MODES, OUTPUT_TAIL
 from timeout_executor.types import Callback, InitializerArgs, ProcessCallback
 
 if TYPE_CHECKING:
-    from collections.abc import Awaitable, Iterable
-
+    from collections.abc import AsyncIterator, Awaitable, Iterable, Iterator
+    from types import TracebackType
+
+    from timeout_executor.admission import Admission
+    from timeout_executor.batch import Batch
+    from timeout_executor.forkserver import ForkServer
+    from timeout_executor.limits import ResourceLimits
+    from timeout_executor.metrics import Metrics
+    from timeout_executor.output import OutputCallback, OutputMode
+    from timeout_executor.pool import WorkerPool
     from timeout_executor.result import AsyncResult
 
 __all__ = ["TimeoutExecutor"]
@@ -25,12 +36,108 @@ AnyT = TypeVar("AnyT", infer_variance=True, default=Any)
 class TimeoutExecutor(Callback[Any, AnyT], Generic[AnyT]):
     """timeout executor"""
 
-    __slots__ = ("_timeout", "_callbacks", "initializer", "_use_jinja")
-
-    def __init__(self, timeout: float, *, use_jinja: bool = False) -> None:
+    __slots__ = (
+        "_timeout",
+        "_callbacks",
+        "initializer",
+        "_use_jinja",
+        "_pool_size",
+        "_pool",
+        "_start_method",
+        "_preload",
+        "_forkserver",
+        "_transport",
+        "_shm_threshold",
+        "_admission",
+        "_output",
+        "_output_tail",
+        "_output_callbacks",
+        "_python_flags",
+        "_metrics",
+        "_limits",
+        "_max_rss",
+        "_rss_interval",
+        "_kill_grace",
+        "_temp_dir",
+        "_cache_function",
+    )
+
+    def __init__(  # noqa: PLR0913
+        self,
+        timeout: float,
+        *,
+        use_jinja: bool = False,
+        pool_size: int | None = None,
+        start_method: Literal["spawn", "forkserver"] = "spawn",
+        preload: Iterable[str] = (),
+        transport: Literal["file", "pipe"] = "file",
+        shm_threshold: int | None = None,
+        max_concurrency: int | None = None,
+        max_queue: int | None = None,
+        queue_timeout: float | None = None,
+        output: OutputMode = "forward",
+        output_tail: int = OUTPUT_TAIL,
+        python_flags: Iterable[str] = (),
+        metrics: Metrics | bool = False,
+        max_memory: int | None = None,
+        max_cpu_time: int | None = None,
+        max_open_files: int | None = None,
+        max_rss: int | None = None,
+        rss_interval: float = RSS_INTERVAL,
+        kill_grace: float = KILL_GRACE,
+        temp_dir: str | os.PathLike[str] | None = None,
+        cache_function: bool = False,
+    ) -> None:
+        if pool_size is not None and pool_size < 1:
+            error_msg = f"pool size must be positive: {pool_size}"
+            raise ValueError(error_msg)
+        if start_method not in {"spawn", "forkserver"}:
+            error_msg = f"invalid start method: {start_method!r}"
+            raise ValueError(error_msg)
+        if start_method == "forkserver":
+            if not hasattr(os, "fork"):  # pragma: no cover
+                raise ValueError("forkserver start method requires os.fork")
+            if pool_size is not None:
+                raise ValueError("forkserver start method does not support worker pool")
+            if transport == "pipe":
+                raise ValueError(
+                    "forkserver start method does not support pipe transport"
+                )
+        if transport not in {"file", "pipe"}:
+            error_msg = f"invalid transport: {transport!r}"
+            raise ValueError(error_msg)
+        if shm_threshold is not None and shm_threshold < 1:
+            error_msg = f"shm threshold must be positive: {shm_threshold}"
+            raise ValueError(error_msg)
         self._timeout = timeout
         self._callbacks: deque[ProcessCallback[..., AnyT]] = deque()
         self.initializer: InitializerArgs[..., Any] | None = None
+        self._pool_size = pool_size
+        self._pool: WorkerPool | None = None
+        self._start_method: Literal["spawn", "forkserver"] = start_method
+        self._preload = tuple(preload)
+        self._forkserver: ForkServer | None = None
+        self._transport: Literal["file", "pipe"] = transport
+        self._shm_threshold = shm_threshold
+        self._admission = _create_admission(max_concurrency, max_queue, queue_timeout)
+        _check_output(output, output_tail, pool_size, start_method)
+        self._output: OutputMode = output
+        self._output_tail = output_tail
+        self._output_callbacks: deque[OutputCallback] = deque()
+        self._python_flags = _check_python_flags(python_flags, pool_size, start_method)
+        self._metrics = _create_metrics(metrics, self._admission)
+        self._limits = _create_limits(
+            max_memory, max_cpu_time, max_open_files, pool_size
+        )
+        _check_rss(max_rss, rss_interval)
+        self._max_rss = max_rss
+        self._rss_interval = rss_interval
+        if kill_grace < 0:
+            error_msg = f"kill grace must not be negative: {kill_grace}"
+            raise ValueError(error_msg)
+        self._kill_grace = kill_grace
+        self._temp_dir = _create_temp_dir(temp_dir)
+        self._cache_function = cache_function
         self.use_jinja = use_jinja
 
     @property
@@ -38,6 +145,189 @@ class TimeoutExecutor(Callback[Any, AnyT], Generic[AnyT]):
         """deadline"""
         return self._timeout
 
+    @property
+    def pool_size(self) -> int | None:
+        """number of warm workers. `None` means a new process per call."""
+        return self._pool_size
+
+    @property
+    def pool(self) -> WorkerPool:
+        """warm worker pool.
+
+        workers start on first access.
+        """
+        if self._pool_size is None:
+            raise AttributeError("executor has no worker pool")
+        if self._pool is None or self._pool.closed:
+            from timeout_executor.pool import WorkerPool
+
+            self._pool = WorkerPool(
+                self._pool_size, self.initializer, temp_dir=self._temp_dir
+            )
+        return self._pool
+
+    @property
+    def start_method(self) -> Literal["spawn", "forkserver"]:
+        """how to start a process per call"""
+        return self._start_method
+
+    @property
+    def preload(self) -> tuple[str, ...]:
+        """modules imported once in fork server"""
+        return self._preload
+
+    @property
+    def forkserver(self) -> ForkServer:
+        """fork server.
+
+        fork server starts on first access.
+        """
+        if self._start_method != "forkserver":
+            raise AttributeError("executor has no fork server")
+        if self._forkserver is None or self._forkserver.closed:
+            from timeout_executor.forkserver import ForkServer
+
+            self._forkserver = ForkServer(self._preload)
+        return self._forkserver
+
+    @property
+    def transport(self) -> Literal["file", "pipe"]:
+        """how to send payload and receive result.
+
+        `file` uses temp files, `pipe` uses pipes without touching the disk.
+        """
+        return self._transport
+
+    @property
+    def shm_threshold(self) -> int | None:
+        """minimum size of buffer in bytes to pass through shared memory.
+
+        `None` means all buffers are copied into pickle stream.
+        """
+        return self._shm_threshold
+
+    @property
+    def admission(self) -> Admission | None:
+        """limit of running processes.
+
+        `None` means no limit.
+        calls over the limit wait in a fifo queue before the process starts,
+        and the deadline of a call starts after it leaves the queue.
+        """
+        return self._admission
+
+    @property
+    def output(self) -> OutputMode:
+        """how to handle stdout and stderr of process.
+
+        `forward` writes lines to stdout and stderr of current process
+        as soon as they are written.
+        `capture` only keeps the last lines.
+        `inherit` lets process write to stdout and stderr of current process.
+        `discard` drops all output.
+
+        worker pool and forkserver start method write to stdout and stderr
+        of current process, so only `forward` and `inherit` are supported.
+        """
+        return self._output
+
+    @property
+    def output_tail(self) -> int:
+        """number of last lines of stdout and stderr kept per process"""
+        return self._output_tail
+
+    @property
+    def python_flags(self) -> tuple[str, ...]:
+        """interpreter flags of subprocess (ex: `-I`, `-S`)"""
+        return self._python_flags
+
+    @property
+    def metrics(self) -> Metrics | None:
+        """counters and histograms of calls. `None` means disabled.
+
+        export them with `metrics.export()` in prometheus text format.
+        """
+        return self._metrics
+
+    @property
+    def limits(self) -> ResourceLimits | None:
+        """limits of address space, cpu time and open files of each process.
+
+        `None` means no limit.
+        exceeding memory raises `MemoryLimitExceeded`,
+        exceeding cpu time raises `CpuLimitExceeded`.
+        """
+        return self._limits
+
+    @property
+    def max_rss(self) -> int | None:
+        """rss budget of each process in bytes, including its descendants.
+
+        `None` means no budget.
+        rss is sampled every `rss_interval` seconds by a thread
+        shared by all processes, and a process over budget is killed
+        with its descendants and raises `MemoryLimitExceeded`.
+        """
+        return self._max_rss
+
+    @property
+    def rss_interval(self) -> float:
+        """seconds between samples of rss of a process"""
+        return self._rss_interval
+
+    @property
+    def kill_grace(self) -> float:
+        """seconds between SIGTERM and SIGKILL after deadline.
+
+        each process leads its own process group,
+        so descendants of the process are terminated and killed with it.
+        """
+        return self._kill_grace
+
+    @property
+    def cache_function(self) -> bool:
+        """reuse serialized function across calls.
+
+        function is serialized on first call, so captured globals and closures
+        are frozen at that time. later changes are not seen by subprocess.
+        """
+        return self._cache_function
+
+    @property
+    def temp_dir(self) -> Path | None:
+        """base directory of temp files, system temp directory if `None`.
+
+        temp files of each process are in `<temp_dir>/timeout_executor/<pid>`.
+        directories of processes that no longer exist are removed
+        when the first executor of a process uses the same base directory.
+        """
+        return self._temp_dir
+
+    def output_callbacks(self) -> Iterable[OutputCallback]:
+        """return output callbacks"""
+        return self._output_callbacks.copy()
+
+    def add_output_callback(self, callback: OutputCallback) -> Self:
+        """add callback called with stream name and line for each new line.
+
+        only called for `forward` and `capture` output.
+        not supported by worker pool and forkserver start method.
+        """
+        if self._pool_size is not None:
+            raise ValueError("worker pool does not support output callbacks")
+        if self._start_method == "forkserver":
+            raise ValueError(
+                "forkserver start method does not support output callbacks"
+            )
+        self._output_callbacks.append(callback)
+        return self
+
+    def remove_output_callback(self, callback: OutputCallback) -> Self:
+        """remove output callback if exists"""
+        with suppress(ValueError):
+            self._output_callbacks.remove(callback)
+        return self
+
     @property
     def use_jinja(self) -> bool:
         """use jinja"""
@@ -45,6 +335,12 @@ class TimeoutExecutor(Callback[Any, AnyT], Generic[AnyT]):
 
     @use_jinja.setter
     def use_jinja(self, value: bool) -> None:
+        if value and self._pool_size is not None:
+            raise ValueError("jinja executor does not support worker pool")
+        if value and self._start_method == "forkserver":
+            raise ValueError("jinja executor does not support forkserver start method")
+        if value and self._python_flags:
+            raise ValueError("jinja executor does not support python flags")
         self._use_jinja = value
         if value:
             spec = find_spec("jinja2")
@@ -76,6 +372,8 @@ class TimeoutExecutor(Callback[Any, AnyT], Generic[AnyT]):
         Returns:
             async result container
         """
+        from timeout_executor.executor import apply_func
+
         return apply_func(self, func, *args, **kwargs)
 
     @overload
@@ -99,6 +397,8 @@ class TimeoutExecutor(Callback[Any, AnyT], Generic[AnyT]):
         Returns:
             async result container
         """
+        from timeout_executor.executor import delay_func
+
         return await delay_func(self, func, *args, **kwargs)
 
     @overload
@@ -126,6 +426,133 @@ class TimeoutExecutor(Callback[Any, AnyT], Generic[AnyT]):
         """
         return await self.delay(func, *args, **kwargs)
 
+    @overload
+    def map(
+        self,
+        func: Callable[[Any], Awaitable[T]],
+        iterable: Iterable[Any],
+        *,
+        concurrency: int | None = None,
+        ordered: bool = True,
+    ) -> Iterator[T]: ...
+    @overload
+    def map(
+        self,
+        func: Callable[[Any], T],
+        iterable: Iterable[Any],
+        *,
+        concurrency: int | None = None,
+        ordered: bool = True,
+    ) -> Iterator[T]: ...
+    def map(
+        self,
+        func: Callable[[Any], Any],
+        iterable: Iterable[Any],
+        *,
+        concurrency: int | None = None,
+        ordered: bool = True,
+    ) -> Iterator[Any]:
+        """run function for each item with deadline per item.
+
+        items are consumed lazily,
+        and at most `concurrency` processes run at the same time.
+        running processes are terminated if iteration stops early.
+
+        Args:
+            func: func(sync or async)
+            iterable: func args
+            concurrency: max number of running processes.
+                defaults to pool size if exists, else cpu count.
+            ordered: if false, yield results as they complete.
+
+        Returns:
+            iterator of results
+        """
+        return iter(self._batch(func, iterable, concurrency, ordered=ordered))
+
+    @overload
+    def map_async(
+        self,
+        func: Callable[[Any], Awaitable[T]],
+        iterable: Iterable[Any],
+        *,
+        concurrency: int | None = None,
+        ordered: bool = True,
+    ) -> AsyncIterator[T]: ...
+    @overload
+    def map_async(
+        self,
+        func: Callable[[Any], T],
+        iterable: Iterable[Any],
+        *,
+        concurrency: int | None = None,
+        ordered: bool = True,
+    ) -> AsyncIterator[T]: ...
+    def map_async(
+        self,
+        func: Callable[[Any], Any],
+        iterable: Iterable[Any],
+        *,
+        concurrency: int | None = None,
+        ordered: bool = True,
+    ) -> AsyncIterator[Any]:
+        """run function for each item with deadline per item.
+
+        async version of `map`
+
+        Args:
+            func: func(sync or async)
+            iterable: func args
+            concurrency: max number of running processes.
+                defaults to pool size if exists, else cpu count.
+            ordered: if false, yield results as they complete.
+
+        Returns:
+            async iterator of results
+        """
+        batch = self._batch(func, iterable, concurrency, ordered=ordered)
+        return batch.__aiter__()
+
+    def _batch(
+        self,
+        func: Callable[[Any], Any],
+        iterable: Iterable[Any],
+        concurrency: int | None,
+        *,
+        ordered: bool,
+    ) -> Batch[Any]:
+        from timeout_executor.batch import Batch
+
+        if concurrency is None:
+            concurrency = self._pool_size or os.cpu_count() or 1
+        return Batch(self, func, iterable, concurrency, ordered=ordered)
+
+    def shutdown(self) -> None:
+        """close worker pool and fork server if exists.
+
+        workers and fork server exit after all submitted tasks end.
+        """
+        self._close_pool()
+        if self._forkserver is not None:
+            self._forkserver.close()
+            self._forkserver = None
+
+    def _close_pool(self) -> None:
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.shutdown()
+
     @override
     def __repr__(self) -> str:
         return f"<{type(self).__name__}, timeout: {self.timeout:.2f}s>"
@@ -161,6 +588,7 @@ class TimeoutExecutor(Callback[Any, AnyT], Generic[AnyT]):
         self.initializer = InitializerArgs(
             function=initializer, args=args, kwargs=kwargs
         )
+        self._close_pool()
         return self
 
     def unset_initializer(self) -> Self:
@@ -172,4 +600,114 @@ class TimeoutExecutor(Callback[Any, AnyT], Generic[AnyT]):
             self
         """
         self.initializer = None
+        self._close_pool()
         return self
+
+
+def _create_admission(
+    max_concurrency: int | None, max_queue: int | None, queue_timeout: float | None
+) -> Admission | None:
+    if max_concurrency is None:
+        if max_queue is not None or queue_timeout is not None:
+            raise ValueError("max queue and queue timeout require max concurrency")
+        return None
+
+    from timeout_executor.admission import Admission
+
+    return Admission(max_concurrency, max_queue, queue_timeout)
+
+
+def _create_metrics(
+    metrics: Metrics | bool, admission: Admission | None
+) -> Metrics | None:
+    if metrics is False:
+        return None
+    if metrics is True:
+        from timeout_executor.metrics import Metrics
+
+        metrics = Metrics()
+    if admission is not None:
+        metrics._watch_admission(admission)  # noqa: SLF001
+    return metrics
+
+
+def _create_limits(
+    max_memory: int | None,
+    max_cpu_time: int | None,
+    max_open_files: int | None,
+    pool_size: int | None,
+) -> ResourceLimits | None:
+    from timeout_executor.limits import ResourceLimits
+
+    limits = ResourceLimits(max_memory, max_cpu_time, max_open_files)
+    if not any(x is not None for x in limits):
+        return None
+    for name, value in limits._asdict().items():
+        if value is not None and value < 1:
+            error_msg = f"{name.replace('_', ' ')} must be positive: {value}"
+            raise ValueError(error_msg)
+    if pool_size is not None:
+        raise ValueError("worker pool does not support resource limits")
+    if find_spec("resource") is None:  # pragma: no cover
+        raise ValueError("resource limits are not supported on this platform")
+    return limits
+
+
+def _create_temp_dir(temp_dir: str | os.PathLike[str] | None) -> Path | None:
+    if temp_dir is None:
+        return None
+    path = Path(temp_dir)
+    if path.exists() and not path.is_dir():
+        error_msg = f"temp dir is not a directory: {path}"
+        raise ValueError(error_msg)
+    return path
+
+
+def _check_rss(max_rss: int | None, rss_interval: float) -> None:
+    if max_rss is not None and max_rss < 1:
+        error_msg = f"max rss must be positive: {max_rss}"
+        raise ValueError(error_msg)
+    if rss_interval <= 0:
+        error_msg = f"rss interval must be positive: {rss_interval}"
+        raise ValueError(error_msg)
+
+
+def _check_python_flags(
+    python_flags: Iterable[str], pool_size: int | None, start_method: str
+) -> tuple[str, ...]:
+    flags = tuple(python_flags)
+    if not flags:
+        return flags
+    for flag in flags:
+        if not flag.startswith("-"):
+            error_msg = f"invalid python flag: {flag!r}"
+            raise ValueError(error_msg)
+    if pool_size is not None:
+        raise ValueError("worker pool does not support python flags")
+    if start_method == "forkserver":
+        raise ValueError("forkserver start method does not support python flags")
+    return flags
+
+
+def _check_output(
+    output: str, output_tail: int, pool_size: int | None, start_method: str
+) -> None:
+    if output not in OUTPUT_MODES:
+        error_msg = f"invalid output: {output!r}"
+        raise ValueError(error_msg)
+    if output_tail < 1:
+        error_msg = f"output tail must be positive: {output_tail}"
+        raise ValueError(error_msg)
+    # output of worker and forked process is not piped
+    if pool_size is not None:
+        name = "worker pool"
+    elif start_method == "forkserver":
+        name = "forkserver start method"
+    else:
+        return
+    if output in {"capture", "discard"}:
+        error_msg = f"{name} does not support {output} output"
+        raise ValueError(error_msg)
+    if output_tail != OUTPUT_TAIL:
+        error_msg = f"{name} does not support output tail"
+        raise ValueError(error_msg)
@@ -0,0 +1,293 @@
+from __future__ import annotations
+
+import math
+import threading
+import time
+from bisect import bisect_left
+from typing import TYPE_CHECKING, Any
+
+from typing_extensions import override
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator, Mapping
+
+    from timeout_executor.admission import Admission
+    from timeout_executor.result import AsyncResult
+
+__all__ = ["Metrics", "Counter", "Gauge", "Histogram", "export_prometheus"]
+
+PREFIX = "timeout_executor"
+SECONDS_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+BYTES_BUCKETS = tuple(float(1 << x) for x in range(8, 28, 2))
+"""256B to 64MiB"""
+
+
+class Counter:
+    """value that only goes up"""
+
+    __slots__ = ("name", "help", "_value", "_lock")
+    type = "counter"
+
+    def __init__(self, name: str, help: str) -> None:  # noqa: A002
+        self.name = name
+        self.help = help
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def value(self) -> float:
+        """current value"""
+        return self._value
+
+    def inc(self, amount: float = 1) -> None:
+        """increase value"""
+        with self._lock:
+            self._value += amount
+
+    def samples(self) -> Iterator[tuple[str, dict[str, str], float]]:
+        """suffix, labels and value of each sample"""
+        yield "", {}, self._value
+
+    @override
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__}: {self.name}={self._value}>"
+
+
+class Gauge(Counter):
+    """value that goes up and down"""
+
+    __slots__ = ()
+    type = "gauge"
+
+    def dec(self, amount: float = 1) -> None:
+        """decrease value"""
+        with self._lock:
+            self._value -= amount
+
+    def set(self, value: float) -> None:
+        """set value"""
+        with self._lock:
+            self._value = value
+
+
+class Histogram:
+    """distribution of observed values in cumulative buckets"""
+
+    __slots__ = ("name", "help", "buckets", "_counts", "_sum", "_count", "_lock")
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, buckets: Iterable[float]) -> None:  # noqa: A002
+        self.name = name
+        self.help = help
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    @property
+    def count(self) -> int:
+        """number of observed values"""
+        return self._count
+
+    @property
+    def sum(self) -> float:
+        """sum of observed values"""
+        return self._sum
+
+    def observe(self, value: float) -> None:
+        """add value"""
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+
+    def samples(self) -> Iterator[tuple[str, dict[str, str], float]]:
+        """suffix, labels and value of each sample"""
+        with self._lock:
+            counts, total, count = self._counts.copy(), self._sum, self._count
+        cumulative = 0
+        for bound, value in zip((*self.buckets, math.inf), counts):
+            cumulative += value
+            yield "_bucket", {"le": _format_value(bound)}, cumulative
+        yield "_sum", {}, total
+        yield "_count", {}, count
+
+    @override
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__}: {self.name} count={self._count}>"
+
+
+class Metrics:
+    """metrics of tasks run by executors.
+
+    one registry can be shared by executors.
+    `labels` are added to every sample (ex: name of executor).
+    """
+
+    __slots__ = (
+        "labels",
+        "submitted",
+        "succeeded",
+        "failed",
+        "timed_out",
+        "rejected",
+        "in_flight",
+        "queue_depth",
+        "spawn_seconds",
+        "run_seconds",
+        "input_bytes",
+        "output_bytes",
+        "_admissions",
+    )
+
+    def __init__(self, labels: Mapping[str, str] | None = None) -> None:
+        self.labels = dict(labels or {})
+        self.submitted = Counter(
+            f"{PREFIX}_tasks_submitted_total", "tasks started in a subprocess"
+        )
+        self.succeeded = Counter(
+            f"{PREFIX}_tasks_succeeded_total", "tasks ended with returncode 0"
+        )
+        self.failed = Counter(
+            f"{PREFIX}_tasks_failed_total", "tasks ended with error or nonzero code"
+        )
+        self.timed_out = Counter(
+            f"{PREFIX}_tasks_timed_out_total", "tasks terminated after deadline"
+        )
+        self.rejected = Counter(
+            f"{PREFIX}_tasks_rejected_total", "tasks rejected by admission control"
+        )
+        self.in_flight = Gauge(
+            f"{PREFIX}_tasks_in_flight", "tasks running in a subprocess"
+        )
+        self.queue_depth = Gauge(f"{PREFIX}_queue_depth", "tasks waiting for admission")
+        self.spawn_seconds = Histogram(
+            f"{PREFIX}_spawn_seconds",
+            "seconds from call to process start",
+            SECONDS_BUCKETS,
+        )
+        self.run_seconds = Histogram(
+            f"{PREFIX}_run_seconds",
+            "seconds from process start to process end",
+            SECONDS_BUCKETS,
+        )
+        self.input_bytes = Histogram(
+            f"{PREFIX}_input_bytes", "size of serialized arguments", BYTES_BUCKETS
+        )
+        self.output_bytes = Histogram(
+            f"{PREFIX}_output_bytes", "size of serialized result", BYTES_BUCKETS
+        )
+        self._admissions: list[Admission] = []
+
+    def metrics(self) -> list[Counter | Histogram]:
+        """all metrics"""
+        self.queue_depth.set(sum(x.queued for x in self._admissions))
+        return [
+            self.submitted,
+            self.succeeded,
+            self.failed,
+            self.timed_out,
+            self.rejected,
+            self.in_flight,
+            self.queue_depth,
+            self.spawn_seconds,
+            self.run_seconds,
+            self.input_bytes,
+            self.output_bytes,
+        ]
+
+    def export(self) -> str:
+        """prometheus text format"""
+        return export_prometheus(self)
+
+    def _watch_admission(self, admission: Admission) -> None:
+        """queue depth is read from admission when exported"""
+        self._admissions.append(admission)
+
+    def _on_start(self, result: AsyncResult[Any, Any]) -> None:
+        timing = result.timing.marks
+        self.submitted.inc()
+        self.in_flight.inc()
+        spawned = timing.get("spawned")
+        if spawned is not None:
+            self.spawn_seconds.observe(spawned - timing["start"])
+        # called from process monitor as soon as the process ends
+        if not result._terminator._add_exit_waiter(  # noqa: SLF001
+            lambda: self._on_exit(result, spawned)
+        ):
+            self._on_exit(result, spawned)
+
+    def _on_exit(self, result: AsyncResult[Any, Any], spawned: float | None) -> None:
+        self.in_flight.dec()
+        if spawned is not None:
+            self.run_seconds.observe(time.monotonic() - spawned)
+        if result._terminator.is_active:  # noqa: SLF001
+            self.timed_out.inc()
+        elif result._process.returncode == 0:  # noqa: SLF001
+            self.succeeded.inc()
+        else:
+            self.failed.inc()
+
+    @override
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__}: {self.labels}>"
+
+
+def export_prometheus(*metrics: Metrics) -> str:
+    """export metrics in prometheus text format.
+
+    samples of registries are grouped by metric name,
+    so registries should have different labels.
+    """
+    groups: dict[str, list[tuple[Counter | Histogram, dict[str, str]]]] = {}
+    for registry in metrics:
+        for metric in registry.metrics():
+            groups.setdefault(metric.name, []).append((metric, registry.labels))
+
+    lines: list[str] = []
+    for name, members in groups.items():
+        first, _ = members[0]
+        lines.append(f"# HELP {name} {first.help}")
+        lines.append(f"# TYPE {name} {first.type}")
+        for metric, labels in members:
+            for suffix, extra, value in metric.samples():
+                lines.append(
+                    f"{name}{suffix}{_format_labels(labels | extra)} "
+                    f"{_format_value(value)}"
+                )
+    return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels: Mapping[str, str]) -> str:
+    if not labels:
+        return ""
+    items = ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items())
+    return f"{{{items}}}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
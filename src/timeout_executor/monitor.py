@@ -0,0 +1,419 @@
+from __future__ import annotations
+
+import heapq
+import os
+import queue
+import selectors
+import threading
+import time
+from contextlib import suppress
+from functools import partial
+from itertools import count
+from typing import TYPE_CHECKING, Any, Callable
+
+from typing_extensions import override
+
+from timeout_executor.handle import ProcessHandle
+from timeout_executor.logging import logger
+from timeout_executor.output import OutputStream
+from timeout_executor.rusage import reap
+from timeout_executor.transport import PipeTransport
+
+if TYPE_CHECKING:
+    from timeout_executor.output import ProcessOutput
+    from timeout_executor.terminate import Terminator
+    from timeout_executor.types import ProcessType
+
+__all__ = ["ProcessMonitor", "get_monitor"]
+
+POLL_INTERVAL = 0.05
+"""interval to poll processes that can not be watched by pidfd"""
+
+
+class Watch:
+    """process watched by monitor"""
+
+    __slots__ = (
+        "terminator",
+        "process",
+        "output",
+        "transport",
+        "deadline",
+        "pidfd",
+        "expired",
+        "jitter",
+    )
+
+    def __init__(self, terminator: Terminator[Any, Any], deadline: float) -> None:
+        self.terminator = terminator
+        self.process: ProcessType = terminator.callback_args.process
+        self.output: ProcessOutput | None = terminator.output
+        transport = terminator.executor_args.transport
+        # transport of pooled task is handled by its worker
+        self.transport: PipeTransport | None = (
+            transport
+            if transport is not None and transport.read_fd is not None
+            else None
+        )
+        self.deadline = deadline
+        self.pidfd: int | None = None
+        self.expired = False
+        self.jitter: float | None = None
+        """delay between deadline and termination"""
+
+    @override
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__}: {self.terminator!r}>"
+
+
+class ProcessMonitor:
+    """watch all processes with a single thread.
+
+    ended processes are detected by pidfd on linux,
+    by exit notification for task handles, and by polling otherwise.
+    stdout and stderr pipes are drained from the same thread,
+    and so are payload and result pipes of pipe transport.
+    deadlines are kept in a min-heap and enforced from the same thread,
+    which wakes up only for the next expiring deadline.
+    delayed calls (ex: escalation to SIGKILL) share the same thread.
+    callbacks run in order on a separate dispatcher thread.
+    """
+
+    __slots__ = (
+        "_lock",
+        "_watches",
+        "_deadlines",
+        "_timers",
+        "_counter",
+        "_max_jitter",
+        "_ready",
+        "_polling",
+        "_selector",
+        "_wakeup_read",
+        "_wakeup_write",
+        "_thread",
+        "_dispatch_queue",
+        "_dispatcher",
+    )
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._watches: set[Watch] = set()
+        self._deadlines: list[tuple[float, int, Watch]] = []
+        self._timers: list[tuple[float, int, Callable[[], Any]]] = []
+        self._counter = count()
+        self._max_jitter = 0.0
+        self._ready: queue.SimpleQueue[Watch] = queue.SimpleQueue()
+        self._polling: set[Watch] = set()
+        self._selector = selectors.DefaultSelector()
+        self._wakeup_read, self._wakeup_write = os.pipe()
+        os.set_blocking(self._wakeup_read, False)
+        os.set_blocking(self._wakeup_write, False)
+        self._selector.register(self._wakeup_read, selectors.EVENT_READ)
+        self._dispatch_queue: queue.SimpleQueue[Callable[[], Any]] = queue.SimpleQueue()
+
+        self._thread = threading.Thread(
+            target=self._run, name="timeout-executor-monitor"
+        )
+        self._thread.daemon = True
+        self._dispatcher = threading.Thread(
+            target=self._dispatch, name="timeout-executor-dispatcher"
+        )
+        self._dispatcher.daemon = True
+        self._thread.start()
+        self._dispatcher.start()
+
+    def __len__(self) -> int:
+        return len(self._watches)
+
+    @property
+    def max_jitter(self) -> float:
+        """max delay between deadline and termination in seconds"""
+        return self._max_jitter
+
+    def register(self, terminator: Terminator[Any, Any]) -> None:
+        """watch process of terminator.
+
+        terminator is closed after deadline,
+        and callbacks run after the process ends.
+        """
+        watch = Watch(terminator, time.monotonic() + terminator.timeout)
+        with self._lock:
+            self._watches.add(watch)
+            heapq.heappush(
+                self._deadlines, (watch.deadline, next(self._counter), watch)
+            )
+            self._watch_process(watch)
+        logger.debug("%r watch %r", self, watch)
+        self._wakeup()
+
+    def call_later(self, delay: float, func: Callable[[], Any]) -> None:
+        """call function from monitor thread after delay"""
+        with self._lock:
+            heapq.heappush(
+                self._timers, (time.monotonic() + delay, next(self._counter), func)
+            )
+        self._wakeup()
+
+    def _watch_process(self, watch: Watch) -> None:
+        if watch.output is not None:
+            for stream in watch.output.streams:
+                self._selector.register(stream, selectors.EVENT_READ, stream)
+        if watch.transport is not None:
+            self._watch_transport(watch.transport)
+        process = watch.process
+        if isinstance(process, ProcessHandle):
+            process._add_exit_callback(lambda: self._notify(watch))  # noqa: SLF001
+            return
+        pidfd_open: Callable[[int], int] | None = getattr(os, "pidfd_open", None)
+        if pidfd_open is None:  # pragma: no cover
+            self._polling.add(watch)
+            return
+        try:
+            watch.pidfd = pidfd_open(process.pid)
+        except ProcessLookupError:
+            # already reaped
+            self._ready.put(watch)
+        except OSError:  # pragma: no cover
+            # pidfd is not supported by kernel
+            self._polling.add(watch)
+        else:
+            self._selector.register(watch.pidfd, selectors.EVENT_READ, watch)
+
+    def _watch_transport(self, transport: PipeTransport) -> None:
+        if transport.write_fd is not None:
+            self._selector.register(
+                transport.write_fd, selectors.EVENT_WRITE, transport
+            )
+        if transport.read_fd is not None:
+            self._selector.register(transport.read_fd, selectors.EVENT_READ, transport)
+
+    def _notify(self, watch: Watch) -> None:
+        self._ready.put(watch)
+        self._wakeup()
+
+    def _wakeup(self) -> None:
+        with suppress(BlockingIOError):
+            os.write(self._wakeup_write, b"\0")
+
+    def _run(self) -> None:
+        while True:
+            # locals of each step are released, so ended processes are not kept
+            self._run_once()
+
+    def _run_once(self) -> None:
+        timeout = self._next_timeout()
+        for key, _ in self._selector.select(timeout):
+            if key.fileobj == self._wakeup_read:
+                with suppress(BlockingIOError):
+                    while os.read(self._wakeup_read, 4096):
+                        pass
+                continue
+            if isinstance(key.data, OutputStream):
+                self._read_output(key.data)
+                continue
+            if isinstance(key.data, PipeTransport):
+                self._transfer(key.data, key.fd)
+                continue
+            self._check_pidfd(key.data)
+
+        while True:
+            try:
+                watch = self._ready.get_nowait()
+            except queue.Empty:
+                break
+            self._check(watch)
+
+        for watch in self._polling.copy():
+            self._check(watch)
+        self._check_deadlines()
+        self._run_timers()
+
+    def _next_timeout(self) -> float | None:
+        with self._lock:
+            deadline = self._next_deadline()
+            if self._timers:
+                timer = self._timers[0][0]
+                deadline = timer if deadline is None else min(deadline, timer)
+            polling = bool(self._polling)
+        timeout = None
+        if deadline is not None:
+            timeout = max(deadline - time.monotonic(), 0)
+        if polling:
+            timeout = POLL_INTERVAL if timeout is None else min(timeout, POLL_INTERVAL)
+        return timeout
+
+    def _read_output(self, stream: OutputStream) -> None:
+        if stream.eof:
+            return
+        lines = stream.read()
+        if lines:
+            output = stream.owner
+            output._feed(stream.name, lines)  # noqa: SLF001
+            self._dispatch_queue.put(
+                partial(output._run_callbacks, stream.name, lines)  # noqa: SLF001
+            )
+        if stream.eof:
+            with self._lock:
+                self._selector.unregister(stream)
+            stream.close()
+
+    def _close_output(self, output: ProcessOutput) -> None:
+        # read lines written before the process ended
+        for stream in output.streams:
+            self._read_output(stream)
+            if not stream.eof:
+                with self._lock:
+                    self._selector.unregister(stream)
+                stream.close()
+        output._close()  # noqa: SLF001
+        self._dispatch_queue.put(output._flush)  # noqa: SLF001
+
+    def _transfer(self, transport: PipeTransport, fd: int) -> None:
+        if fd == transport.write_fd:
+            done = transport.write_input()
+        else:
+            done = transport.read_output()
+        if done:
+            with self._lock:
+                self._selector.unregister(fd)
+
+    def _close_transport(self, transport: PipeTransport) -> None:
+        # read result written before the process ended
+        for fd in (transport.write_fd, transport.read_fd):
+            if fd is None:
+                continue
+            with self._lock, suppress(KeyError):
+                self._selector.unregister(fd)
+        transport.finish()
+
+    def _check_pidfd(self, watch: Watch) -> None:
+        if self._check(watch):
+            return
+        # pidfd is readable but returncode is not set yet:
+        # another thread is in `process.wait`. fallback to polling.
+        with self._lock:
+            self._close_pidfd(watch)
+            self._polling.add(watch)
+
+    def _check(self, watch: Watch) -> bool:
+        process = watch.process
+        if isinstance(process, ProcessHandle):
+            if process.poll() is None:
+                return False
+            rusage = process.rusage
+        else:
+            # reap with wait4 before poll to collect resource usage
+            rusage = reap(process)
+            if process.poll() is None:
+                return False
+        with self._lock:
+            if watch not in self._watches:
+                return True
+            self._watches.discard(watch)
+            self._polling.discard(watch)
+            self._close_pidfd(watch)
+        logger.debug("%r process ended: %r", self, watch)
+        watch.terminator._rusage = rusage  # noqa: SLF001
+        if watch.output is not None:
+            self._close_output(watch.output)
+        if watch.transport is not None:
+            self._close_transport(watch.transport)
+        watch.terminator._notify_exit()  # noqa: SLF001
+        self._dispatch_queue.put(watch.terminator._on_exit)  # noqa: SLF001
+        return True
+
+    def _next_deadline(self) -> float | None:
+        # ended processes are removed lazily from the heap
+        while self._deadlines:
+            deadline, _, watch = self._deadlines[0]
+            if watch in self._watches and not watch.expired:
+                return deadline
+            heapq.heappop(self._deadlines)
+        return None
+
+    def _check_deadlines(self) -> None:
+        now = time.monotonic()
+        expired: list[Watch] = []
+        with self._lock:
+            while (deadline := self._next_deadline()) is not None and deadline <= now:
+                _, _, watch = heapq.heappop(self._deadlines)
+                watch.expired = True
+                expired.append(watch)
+            if len(self._deadlines) > 2 * len(self._watches) + 64:
+                self._deadlines = [
+                    item for item in self._deadlines if item[2] in self._watches
+                ]
+                heapq.heapify(self._deadlines)
+        for watch in expired:
+            watch.jitter = time.monotonic() - watch.deadline
+            self._max_jitter = max(self._max_jitter, watch.jitter)
+            logger.debug(
+                "%r deadline exceeded: %r :: jitter: %.4fs", self, watch, watch.jitter
+            )
+            try:
+                watch.terminator._on_deadline()  # noqa: SLF001
+            except Exception:  # noqa: BLE001
+                logger.exception("%r failed to terminate: %r", self, watch)
+
+    def _run_timers(self) -> None:
+        now = time.monotonic()
+        funcs: list[Callable[[], Any]] = []
+        with self._lock:
+            while self._timers and self._timers[0][0] <= now:
+                funcs.append(heapq.heappop(self._timers)[2])
+        for func in funcs:
+            try:
+                func()
+            except Exception:  # noqa: BLE001, PERF203
+                logger.exception("%r error when run %r", self, func)
+
+    def _close_pidfd(self, watch: Watch) -> None:
+        if watch.pidfd is None:
+            return
+        self._selector.unregister(watch.pidfd)
+        os.close(watch.pidfd)
+        watch.pidfd = None
+
+    def _dispatch(self) -> None:
+        while True:
+            func = self._dispatch_queue.get()
+            try:
+                func()
+            except Exception:  # noqa: BLE001
+                logger.exception("%r error when run %r", self, func)
+            # do not keep the last terminator while waiting
+            del func
+
+    @override
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__}: watches: {len(self._watches)}>"
+
+
+_monitor: ProcessMonitor | None = None
+_monitor_lock = threading.Lock()
+
+
+def get_monitor() -> ProcessMonitor:
+    """process monitor of current process.
+
+    monitor starts on first call.
+    """
+    global _monitor  # noqa: PLW0603
+    if _monitor is not None:
+        return _monitor
+    with _monitor_lock:
+        if _monitor is None:
+            _monitor = ProcessMonitor()
+    return _monitor
+
+
+def _reset_monitor() -> None:
+    # threads of parent process do not exist in forked process
+    global _monitor, _monitor_lock  # noqa: PLW0603
+    _monitor = None
+    _monitor_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):  # pragma: no branch
+    os.register_at_fork(after_in_child=_reset_monitor)
@@ -0,0 +1,258 @@
+from __future__ import annotations
+
+import codecs
+import os
+import sys
+import threading
+from collections import deque
+from contextlib import contextmanager, suppress
+from typing import IO, TYPE_CHECKING, Any, Callable, Literal
+
+from typing_extensions import override
+
+from timeout_executor.logging import logger
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator, Iterable, Iterator
+
+    from typing_extensions import TypeAlias
+
+__all__ = ["ProcessOutput", "OutputStream", "OutputCallback", "OutputMode"]
+
+OutputCallback: TypeAlias = "Callable[[str, str], Any]"
+"""callback called with stream name(`stdout` or `stderr`) and line"""
+OutputMode: TypeAlias = 'Literal["forward", "capture", "inherit", "discard"]'
+
+OUTPUT_MODES: frozenset[str] = frozenset(["forward", "capture", "inherit", "discard"])
+OUTPUT_TAIL = 1000
+"""default number of last lines of stdout and stderr kept per process"""
+CHUNK_SIZE = 1 << 16
+MAX_LINE_SIZE = 1 << 16
+"""a line longer than this is split, so a partial line is bounded"""
+
+
+class OutputStream:
+    """pipe of stdout or stderr, read without blocking"""
+
+    __slots__ = ("name", "owner", "eof", "_file", "_decoder", "_partial")
+
+    def __init__(self, name: str, file: IO[str], owner: ProcessOutput) -> None:
+        self.name = name
+        self.owner = owner
+        self.eof = False
+        self._file = file
+        self._decoder = codecs.getincrementaldecoder(
+            getattr(file, "encoding", None) or "utf-8"
+        )(errors="replace")
+        self._partial = ""
+        os.set_blocking(file.fileno(), False)
+
+    def fileno(self) -> int:
+        """fd of pipe"""
+        return self._file.fileno()
+
+    def read(self) -> list[str]:
+        """read all available lines.
+
+        sets `eof` if the pipe is closed.
+        """
+        chunks: list[bytes] = []
+        while True:
+            try:
+                data = os.read(self.fileno(), CHUNK_SIZE)
+            except BlockingIOError:
+                break
+            except OSError:
+                self.eof = True
+                break
+            if not data:
+                self.eof = True
+                break
+            chunks.append(data)
+
+        text = self._partial + self._decoder.decode(b"".join(chunks), final=self.eof)
+        *lines, self._partial = text.split("\n")
+        lines = [line + "\n" for line in lines]
+        if self._partial and (self.eof or len(self._partial) > MAX_LINE_SIZE):
+            lines.append(self._partial)
+            self._partial = ""
+        return lines
+
+    def close(self) -> None:
+        """close pipe"""
+        self.eof = True
+        with suppress(OSError):
+            self._file.close()
+
+    @override
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__}: {self.name}>"
+
+
+class ProcessOutput:
+    """stdout and stderr of a process.
+
+    pipes are drained continuously by the process monitor,
+    so a chatty process never blocks on a full pipe.
+    only the last lines are kept.
+    callbacks run in order on the dispatcher thread.
+    """
+
+    __slots__ = (
+        "streams",
+        "_lines",
+        "_callbacks",
+        "_listeners",
+        "_lock",
+        "_closed",
+        "_flushed",
+    )
+
+    def __init__(
+        self,
+        stdout: IO[str] | None,
+        stderr: IO[str] | None,
+        tail: int = OUTPUT_TAIL,
+        callbacks: Iterable[OutputCallback] = (),
+    ) -> None:
+        self.streams = tuple(
+            OutputStream(name, file, self)
+            for name, file in (("stdout", stdout), ("stderr", stderr))
+            if file is not None
+        )
+        self._lines: deque[tuple[str, str]] = deque(maxlen=tail)
+        self._callbacks: deque[OutputCallback] = deque(callbacks)
+        self._listeners: list[Listener] = []
+        self._lock = threading.Lock()
+        self._closed = False
+        self._flushed = False
+
+    @property
+    def closed(self) -> bool:
+        """all lines are read"""
+        return self._closed
+
+    @property
+    def flushed(self) -> bool:
+        """all callbacks are called for all lines"""
+        return self._flushed
+
+    def lines(self, name: str | None = None) -> list[str]:
+        """last lines of stream. `None` means all streams."""
+        with self._lock:
+            return [line for key, line in self._lines if name is None or key == name]
+
+    def add_callback(self, callback: OutputCallback) -> None:
+        """add callback called for each new line"""
+        self._callbacks.append(callback)
+
+    def remove_callback(self, callback: OutputCallback) -> None:
+        """remove callback if exists"""
+        with suppress(ValueError):
+            self._callbacks.remove(callback)
+
+    async def iter_lines(self) -> AsyncIterator[tuple[str, str]]:
+        """yield stream name and line until the process ends.
+
+        starts from the last lines kept.
+        if the consumer is slower than the process,
+        the oldest lines not yet consumed are dropped.
+        """
+        with self._listen(replay=True) as listener:
+            while True:
+                while listener.pending:
+                    yield listener.pending.popleft()
+                if self._closed and not listener.pending:
+                    return
+                await listener.wait()
+
+    async def wait_flushed(self) -> None:
+        """wait until callbacks are called for all lines"""
+        with self._listen(replay=False) as listener:
+            while not self._flushed:
+                await listener.wait()
+
+    @contextmanager
+    def _listen(self, *, replay: bool) -> Iterator[Listener]:
+        listener = Listener(self._lines.maxlen)
+        with self._lock:
+            if replay:
+                listener.pending.extend(self._lines)
+            self._listeners.append(listener)
+        try:
+            yield listener
+        finally:
+            with self._lock:
+                self._listeners.remove(listener)
+            listener.close()
+
+    def _feed(self, name: str, lines: list[str]) -> None:
+        """called from monitor thread"""
+        with self._lock:
+            self._lines.extend((name, line) for line in lines)
+            for listener in self._listeners:
+                listener.push(name, lines)
+
+    def _close(self) -> None:
+        """called from monitor thread after the last lines"""
+        with self._lock:
+            self._closed = True
+            for listener in self._listeners:
+                listener.push("", [])
+
+    def _run_callbacks(self, name: str, lines: list[str]) -> None:
+        """called from dispatcher thread"""
+        for callback in self._callbacks.copy():
+            for line in lines:
+                try:
+                    callback(name, line)
+                except Exception:  # noqa: BLE001, PERF203
+                    logger.exception("%r error when run %r", self, callback)
+
+    def _flush(self) -> None:
+        """called from dispatcher thread after the last callbacks"""
+        with self._lock:
+            self._flushed = True
+            for listener in self._listeners:
+                listener.push("", [])
+
+    @override
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__}: {', '.join(x.name for x in self.streams)}>"
+
+
+class Listener:
+    """wake up event loop from other threads"""
+
+    __slots__ = ("pending", "_read_fd", "_write_fd")
+
+    def __init__(self, maxlen: int | None) -> None:
+        self.pending: deque[tuple[str, str]] = deque(maxlen=maxlen)
+        self._read_fd, self._write_fd = os.pipe()
+        os.set_blocking(self._read_fd, False)
+        os.set_blocking(self._write_fd, False)
+
+    def push(self, name: str, lines: list[str]) -> None:
+        """add lines and wake up waiter"""
+        self.pending.extend((name, line) for line in lines)
+        with suppress(BlockingIOError):
+            os.write(self._write_fd, b"\0")
+
+    async def wait(self) -> None:
+        """wait for next push"""
+        import anyio
+
+        await anyio.wait_readable(self._read_fd)
+        with suppress(BlockingIOError):
+            os.read(self._read_fd, CHUNK_SIZE)
+
+    def close(self) -> None:
+        """close pipe"""
+        os.close(self._read_fd)
+        os.close(self._write_fd)
+
+
+def forward(name: str, line: str) -> None:
+    """write line to stdout or stderr of current process"""
+    stream = sys.stdout if name == "stdout" else sys.stderr
+    stream.write(line)
@@ -0,0 +1,278 @@
+from __future__ import annotations
+
+import os
+import shlex
+import subprocess
+import sys
+import threading
+from collections import deque
+from contextlib import suppress
+from typing import TYPE_CHECKING, Any
+from uuid import uuid4
+
+import cloudpickle
+from typing_extensions import override
+
+from timeout_executor.const import (
+    TIMEOUT_EXECUTOR_INIT_FILE,
+    TIMEOUT_EXECUTOR_WORKER_FDS,
+    WORKER_COMMAND,
+)
+from timeout_executor.handle import ProcessHandle
+from timeout_executor.janitor import get_janitor, process_dir
+from timeout_executor.logging import logger
+from timeout_executor.transport import read_frame, write_frame
+
+if TYPE_CHECKING:
+    from pathlib import Path
+    from typing import BinaryIO
+
+    from timeout_executor.transport import PipeTransport
+    from timeout_executor.types import InitializerArgs
+
+__all__ = ["WorkerPool", "PooledProcess"]
+
+
+class PooledProcess(ProcessHandle):
+    """handle of a task submitted to worker pool"""
+
+    __slots__ = ("_pool", "_input_file", "_transport", "_worker")
+
+    def __init__(
+        self,
+        pool: WorkerPool,
+        input_file: Path | None,
+        transport: PipeTransport | None = None,
+    ) -> None:
+        super().__init__(pool.command)
+        self._pool = pool
+        self._input_file = input_file
+        self._transport = transport
+        self._worker: Worker | None = None
+
+    @override
+    def send_signal(self, sig: int) -> None:
+        self._pool._signal_task(self, sig)  # noqa: SLF001
+
+
+class Worker:
+    """warm subprocess waiting for tasks"""
+
+    __slots__ = ("process", "task", "_pool", "_tasks", "_done", "_thread")
+
+    def __init__(self, pool: WorkerPool) -> None:
+        self._pool = pool
+        self.task: PooledProcess | None = None
+
+        task_read, task_write = os.pipe()
+        done_read, done_write = os.pipe()
+        env = os.environ | {
+            TIMEOUT_EXECUTOR_WORKER_FDS: f"{task_read},{done_write}",
+            TIMEOUT_EXECUTOR_INIT_FILE: ""
+            if pool.init_file is None
+            else str(pool.init_file),
+        }
+        try:
+            self.process = subprocess.Popen(  # noqa: S603
+                pool.command, env=env, pass_fds=(task_read, done_write)
+            )
+        except BaseException:
+            os.close(task_write)
+            os.close(done_read)
+            raise
+        finally:
+            os.close(task_read)
+            os.close(done_write)
+
+        self._tasks: BinaryIO = os.fdopen(task_write, "wb")
+        self._done: BinaryIO = os.fdopen(done_read, "rb")
+        self._thread = threading.Thread(
+            target=self._watch, name=f"timeout-executor-worker-{self.process.pid}"
+        )
+        self._thread.daemon = True
+        self._thread.start()
+        logger.debug("%r start worker", self)
+
+    def send(self, task: PooledProcess) -> None:
+        """send task to worker process"""
+        if task._transport is None:  # noqa: SLF001
+            write_frame(self._tasks, b"f", str(task._input_file).encode())  # noqa: SLF001
+        else:
+            write_frame(self._tasks, b"p", task._transport.input_args)  # noqa: SLF001
+        self._tasks.flush()
+        self.task = task
+        task._worker = self  # noqa: SLF001
+        task._set_pid(self.process.pid)  # noqa: SLF001
+
+    def retire(self) -> None:
+        """let worker process exit after current task"""
+        with suppress(OSError):
+            self._tasks.close()
+
+    def _watch(self) -> None:
+        try:
+            while (output := read_frame(self._done)) is not None:
+                # first byte is returncode of task
+                self._end_task(int(output[:1]), output[1:])
+                self._pool._on_idle(self)  # noqa: SLF001
+        finally:
+            returncode = self.process.wait()
+            logger.debug("%r end worker :: returncode: %d", self, returncode)
+            self._end_task(returncode)
+            self._done.close()
+            self.retire()
+            self._pool._on_exit(self)  # noqa: SLF001
+
+    def _end_task(self, returncode: int, output: bytes = b"") -> None:
+        with self._pool._lock:  # noqa: SLF001
+            task, self.task = self.task, None
+        if task is None:
+            return
+        if task._transport is not None:  # noqa: SLF001
+            task._transport.set_output(output)  # noqa: SLF001
+        task._set_returncode(returncode)  # noqa: SLF001
+
+    @override
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__}: {self.process.pid}>"
+
+
+class WorkerPool:
+    """pool of warm workers.
+
+    a worker is killed and respawned only when its task is terminated.
+    """
+
+    __slots__ = (
+        "_size",
+        "_lock",
+        "_workers",
+        "_idle",
+        "_pending",
+        "_closed",
+        "_temp_dir",
+        "init_file",
+        "command",
+    )
+
+    def __init__(
+        self,
+        size: int,
+        initializer: InitializerArgs[..., Any] | None = None,
+        *,
+        temp_dir: Path | None = None,
+    ) -> None:
+        if size < 1:
+            error_msg = f"pool size must be positive: {size}"
+            raise ValueError(error_msg)
+
+        self._size = size
+        self._lock = threading.RLock()
+        self._workers: set[Worker] = set()
+        self._idle: deque[Worker] = deque()
+        self._pending: deque[PooledProcess] = deque()
+        self._closed = False
+        self.command = shlex.split(f'{sys.executable} -c "{WORKER_COMMAND}"')
+
+        self._temp_dir: Path | None = None
+        self.init_file: Path | None = None
+        if initializer is not None:
+            self._temp_dir = process_dir(temp_dir) / f"pool-{uuid4()}"
+            self._temp_dir.mkdir(exist_ok=False)
+            self.init_file = self._temp_dir / "init.b"
+            with self.init_file.open("wb+") as file:
+                cloudpickle.dump(
+                    (initializer.function, initializer.args, initializer.kwargs), file
+                )
+
+        with self._lock:
+            for _ in range(size):
+                self._spawn()
+
+    @property
+    def size(self) -> int:
+        """number of workers"""
+        return self._size
+
+    @property
+    def closed(self) -> bool:
+        """pool is closed or not"""
+        return self._closed
+
+    def submit(
+        self, input_file: Path | None, transport: PipeTransport | None = None
+    ) -> PooledProcess:
+        """submit task input file or payload to pool"""
+        task = PooledProcess(self, input_file, transport)
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("pool is closed")
+            self._pending.append(task)
+            self._dispatch()
+        return task
+
+    def close(self) -> None:
+        """stop accepting tasks.
+
+        workers exit after all submitted tasks end.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._dispatch()
+        logger.debug("%r closed", self)
+
+    def _spawn(self) -> None:
+        worker = Worker(self)
+        self._workers.add(worker)
+        self._idle.append(worker)
+
+    def _dispatch(self) -> None:
+        while self._idle and self._pending:
+            worker, task = self._idle.popleft(), self._pending.popleft()
+            try:
+                worker.send(task)
+            except OSError:
+                self._pending.appendleft(task)
+                continue
+            logger.debug("%r send task to %r", self, worker)
+
+        if self._closed and not self._pending:
+            while self._idle:
+                self._idle.popleft().retire()
+
+    def _on_idle(self, worker: Worker) -> None:
+        with self._lock:
+            self._idle.append(worker)
+            self._dispatch()
+
+    def _on_exit(self, worker: Worker) -> None:
+        with self._lock:
+            self._workers.discard(worker)
+            with suppress(ValueError):
+                self._idle.remove(worker)
+            if not self._closed or self._pending:
+                self._spawn()
+                self._dispatch()
+            elif not self._workers and self._temp_dir is not None:
+                get_janitor().remove(self._temp_dir)
+
+    def _signal_task(self, task: PooledProcess, sig: int) -> None:
+        with self._lock:
+            if task.returncode is not None:
+                return
+            worker = task._worker  # noqa: SLF001
+            if worker is None:
+                self._pending.remove(task)
+                task._set_returncode(-sig)  # noqa: SLF001
+                self._dispatch()
+                return
+            if worker.task is not task:
+                return
+            logger.debug("%r send signal %d to %r", self, sig, worker)
+            worker.process.send_signal(sig)
+
+    @override
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__}: size: {self._size}>"
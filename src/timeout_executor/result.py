@@ -1,25 +1,35 @@
 from __future__ import annotations
 
-import shutil
+import os
+import signal
 import subprocess
+import weakref
 from functools import cached_property, partial
 from typing import TYPE_CHECKING, Any, Generic, Literal, overload
 
 import anyio
 import cloudpickle
 from anyio.lowlevel import checkpoint
-from async_wrapper import async_to_sync, sync_to_async
+from async_wrapper import async_to_sync
 from typing_extensions import ParamSpec, Self, TypeVar, override
 
+from timeout_executor.janitor import get_janitor
+from timeout_executor.limits import CpuLimitExceeded, MemoryLimitExceeded
 from timeout_executor.logging import logger
 from timeout_executor.serde import SerializedError, loads_error
+from timeout_executor.stream import StreamResult
+from timeout_executor.timing import unpack_marks
 from timeout_executor.types import Callback, ProcessCallback
 
 if TYPE_CHECKING:
-    from collections.abc import Awaitable, Iterable
+    from collections.abc import AsyncIterator, Awaitable, Iterable
+    from pathlib import Path
 
+    from timeout_executor.output import OutputCallback
+    from timeout_executor.rusage import ResourceUsage
     from timeout_executor.terminate import Terminator
-    from timeout_executor.types import ExecutorArgs
+    from timeout_executor.timing import Timing
+    from timeout_executor.types import ExecutorArgs, ProcessType
 
 
 __all__ = ["AsyncResult"]
@@ -28,22 +38,36 @@ P = ParamSpec("P")
 T = TypeVar("T", infer_variance=True)
 
 SENTINEL = object()
+OUTPUT_FLUSH_TIMEOUT = 1
+"""max time to wait for output callbacks after the process ends"""
 
 
 class AsyncResult(Callback[P, T], Generic[P, T]):
     """async result container"""
 
-    __slots__ = ("_process", "_executor_args", "_result")
+    __slots__ = ("_process", "_executor_args", "_result", "_items", "_cleanup")
 
     _result: Any
 
-    def __init__(
-        self, process: subprocess.Popen[str], executor_args: ExecutorArgs[P, T]
-    ) -> None:
+    def __init__(self, process: ProcessType, executor_args: ExecutorArgs[P, T]) -> None:
         self._process = process
 
         self._executor_args = executor_args
         self._result = SENTINEL
+        self._items: list[Any] = []
+        temp_dir = (
+            None
+            if executor_args.output_file is None
+            else executor_args.output_file.parent
+        )
+        segment_prefix = executor_args.executor.segment_prefix
+        # temp files and segments of result dropped without loading output.
+        # finalizer runs at most once, so it is a no-op after cleanup.
+        self._cleanup = (
+            None
+            if temp_dir is None and segment_prefix is None
+            else weakref.finalize(self, _remove_temp_files, temp_dir, segment_prefix)
+        )
 
     @property
     def _func_name(self) -> str:
@@ -54,11 +78,15 @@ class AsyncResult(Callback[P, T], Generic[P, T]):
         return self._executor_args.terminator
 
     @cached_property
-    def _input(self) -> anyio.Path:
+    def _input(self) -> anyio.Path | None:
+        if self._executor_args.input_file is None:
+            return None
         return anyio.Path(self._executor_args.input_file)
 
     @cached_property
-    def _output(self) -> anyio.Path:
+    def _output(self) -> anyio.Path | None:
+        if self._executor_args.output_file is None:
+            return None
         return anyio.Path(self._executor_args.output_file)
 
     @cached_property
@@ -69,6 +97,11 @@ class AsyncResult(Callback[P, T], Generic[P, T]):
             else anyio.Path(self._executor_args.init_file)
         )
 
+    @property
+    def is_done(self) -> bool:
+        """check if process is ended"""
+        return self._process.returncode is not None
+
     @property
     def has_result(self) -> bool:
         """check if result is available"""
@@ -113,12 +146,78 @@ class AsyncResult(Callback[P, T], Generic[P, T]):
         finally:
             with anyio.CancelScope(shield=True):
                 self._executor_args.terminator.close("async result")
+                if not self.has_result:
+                    # timed out, killed or ended without result
+                    self._remove_temp_files()
+                await self._wait_output()
                 await checkpoint()
 
+    @property
+    def timing(self) -> Timing:
+        """timestamps of each phase of the call.
+
+        marks of subprocess are available after the result is loaded.
+        """
+        return self._executor_args.timing
+
+    @property
+    def rusage(self) -> ResourceUsage | None:
+        """cpu time, peak memory, page faults and context switches of process.
+
+        available after the process ends.
+        `None` if not collected (ex: worker pool runs many tasks in a process).
+        """
+        return self._terminator.rusage
+
+    @property
+    def stdout(self) -> str:
+        """last lines of stdout"""
+        output = self._terminator.output
+        return "" if output is None else "".join(output.lines("stdout"))
+
+    @property
+    def stderr(self) -> str:
+        """last lines of stderr"""
+        output = self._terminator.output
+        return "" if output is None else "".join(output.lines("stderr"))
+
+    async def iter_output(self) -> AsyncIterator[tuple[str, str]]:
+        """yield stream name(`stdout` or `stderr`) and line as written.
+
+        starts from the last lines kept, and ends when the process ends.
+        """
+        output = self._terminator.output
+        if output is None:
+            return
+        async for item in output.iter_lines():
+            yield item
+
+    def add_output_callback(self, callback: OutputCallback) -> Self:
+        """add callback called with stream name and line for each new line"""
+        output = self._terminator.output
+        if output is not None:
+            output.add_callback(callback)
+        return self
+
+    def remove_output_callback(self, callback: OutputCallback) -> Self:
+        """remove output callback if exists"""
+        output = self._terminator.output
+        if output is not None:
+            output.remove_callback(callback)
+        return self
+
+    async def _wait_output(self) -> None:
+        # forwarded output is written before the result is returned
+        output = self._terminator.output
+        if output is None or self._process.returncode is None:
+            return
+        with anyio.move_on_after(OUTPUT_FLUSH_TIMEOUT):
+            await output.wait_flushed()
+
     async def _wait(self, timeout: float) -> None:
         try:
             logger.debug("%r wait process :: deadline: %.2fs", self, timeout)
-            await _wait_process(self._process, timeout, self._input)
+            await _wait_process(self._process, self._terminator, timeout, self._input)
         except subprocess.TimeoutExpired as exc:
             raise TimeoutError(exc.timeout) from exc
         except TimeoutError as exc:
@@ -126,7 +225,33 @@ class AsyncResult(Callback[P, T], Generic[P, T]):
                 raise TimeoutError(timeout) from exc
             raise
 
+    async def iter_values(self, timeout: float | None = None) -> AsyncIterator[Any]:
+        """yield items of generator or async generator function as produced.
+
+        deadline is enforced for the whole generator.
+        stopping iteration early stops the generator in subprocess.
+        result of process is the return value of generator.
+        """
+        stream = self._executor_args.stream
+        if stream is None:
+            await self.delay(timeout)
+            items, self._items = self._items, []
+            for item in items:
+                yield item
+            return
+
+        try:
+            async for frame in stream.iter_frames():
+                yield cloudpickle.loads(frame)
+        finally:
+            stream.close()
+        await self.delay(timeout)
+
     async def _delay(self, timeout: float) -> T:
+        stream = self._executor_args.stream
+        if stream is not None and not stream.active:
+            # items not received are dropped
+            stream.close()
         if self._process.returncode is None:
             await self.wait(timeout, do_async=True)
         return await self._load_output()
@@ -136,6 +261,10 @@ class AsyncResult(Callback[P, T], Generic[P, T]):
             logger.debug("%r has result.", self)
             if isinstance(self._result, SerializedError):
                 self._result = loads_error(self._result)
+            if isinstance(self._result, StreamResult):
+                self._items, self._result = self._result
+            if isinstance(self._result, MemoryError):
+                self._result = self._memory_limit_error(self._result)
             if isinstance(self._result, BaseException):
                 raise self._result
             return self._result
@@ -143,21 +272,95 @@ class AsyncResult(Callback[P, T], Generic[P, T]):
         if self._process.returncode is None:
             raise RuntimeError("process is running")
 
-        if self._executor_args.terminator.is_active:
-            raise TimeoutError(self._executor_args.timeout)
+        self._check_killed()
+
+        if self._output is None:
+            return await self._load_output_from_transport()
 
         if not await self._output.exists():
             raise FileNotFoundError(self._output)
 
+        timing = self._executor_args.timing
+        timing.mark("load_start")
         logger.debug("%r before load output: %s", self, self._output)
         async with await self._output.open("rb") as file:
             value = await file.read()
             self._result = cloudpickle.loads(value)
+        self._observe_output(value)
+        timing.update(unpack_marks(value))
+        timing.mark("loaded")
         logger.debug("%r after load output :: size: %d", self, len(value))
-        await _async_rmtree(self._output.parent)
+        # removed by janitor thread without waiting
+        self._remove_temp_files()
+        timing.mark("cleaned")
         logger.debug("%r remove temp files: %s", self, self._output.parent)
         return await self._load_output()
 
+    async def _load_output_from_transport(self) -> T:
+        transport = self._executor_args.transport
+        if transport is None:  # pragma: no cover
+            raise RuntimeError("no output file and transport")
+
+        timing = self._executor_args.timing
+        timing.mark("load_start")
+        logger.debug("%r before load output: %r", self, transport)
+        value = await transport.wait_output()
+        if not value:
+            error_msg = f"process ended without result: {self._func_name}"
+            raise EOFError(error_msg)
+        self._result = cloudpickle.loads(value)
+        self._observe_output(value)
+        timing.update(unpack_marks(value))
+        timing.mark("loaded")
+        logger.debug("%r after load output :: size: %d", self, len(value))
+        self._remove_temp_files()
+        return await self._load_output()
+
+    def _remove_temp_files(self) -> None:
+        if self._cleanup is not None:
+            self._cleanup()
+
+    def _memory_limit_error(self, error: MemoryError) -> MemoryError:
+        limits = self._executor_args.executor.limits
+        if (
+            limits is None
+            or limits.max_memory is None
+            or isinstance(error, MemoryLimitExceeded)
+        ):
+            return error
+        error_msg = f"memory limit exceeded: {limits.max_memory} bytes"
+        new_error = MemoryLimitExceeded(error_msg)
+        new_error.__cause__ = error
+        return new_error
+
+    def _check_killed(self) -> None:
+        """raise if the process was killed without result"""
+        if self._terminator.error is not None:
+            raise self._terminator.error
+        if self._terminator.is_active:
+            raise TimeoutError(self._executor_args.timeout)
+        self._check_cpu_limit()
+
+    def _check_cpu_limit(self) -> None:
+        limits = self._executor_args.executor.limits
+        if limits is None or limits.max_cpu_time is None:
+            return
+        returncode = self._process.returncode
+        rusage = self._terminator.rusage
+        # SIGKILL if SIGXCPU is ignored by user code
+        if returncode == -signal.SIGXCPU or (
+            returncode == -signal.SIGKILL
+            and rusage is not None
+            and rusage.cpu_time >= limits.max_cpu_time
+        ):
+            error_msg = f"cpu time limit exceeded: {limits.max_cpu_time}s"
+            raise CpuLimitExceeded(error_msg)
+
+    def _observe_output(self, value: bytes) -> None:
+        metrics = self._executor_args.executor.metrics
+        if metrics is not None:
+            metrics.output_bytes.observe(len(value))
+
     @override
     def __repr__(self) -> str:
         return f"<{type(self).__name__}: {self._func_name}>"
@@ -178,17 +381,40 @@ class AsyncResult(Callback[P, T], Generic[P, T]):
 
 
 async def _wait_process(
-    process: subprocess.Popen[str], timeout: float, input_file: anyio.Path
+    process: ProcessType,
+    terminator: Terminator[Any, Any],
+    timeout: float,
+    input_file: anyio.Path | None,
 ) -> None:
-    wait_func = partial(sync_to_async(process.wait), timeout)
-
     try:
         with anyio.fail_after(timeout):
-            await wait_func()
+            await _wait_exit(terminator)
     finally:
         with anyio.CancelScope(shield=True):
-            if process.returncode is not None:
+            if process.returncode is not None and input_file is not None:
                 await input_file.unlink(missing_ok=True)
 
 
-_async_rmtree = sync_to_async(shutil.rmtree)
+async def _wait_exit(terminator: Terminator[Any, Any]) -> None:
+    """wait for the process to end without worker thread.
+
+    process monitor writes to a pipe after the process ends,
+    and event loop waits until the pipe is readable.
+    """
+    read_fd, write_fd = os.pipe()
+    waiter = partial(os.write, write_fd, b"\0")
+    try:
+        if terminator._add_exit_waiter(waiter):  # noqa: SLF001
+            await anyio.wait_readable(read_fd)
+    finally:
+        terminator._remove_exit_waiter(waiter)  # noqa: SLF001
+        os.close(read_fd)
+        os.close(write_fd)
+
+
+def _remove_temp_files(temp_dir: Path | None, segment_prefix: str | None) -> None:
+    janitor = get_janitor()
+    if temp_dir is not None:
+        janitor.remove(temp_dir)
+    if segment_prefix is not None:
+        janitor.remove_segments(segment_prefix)
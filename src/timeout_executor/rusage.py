@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import os
+import sys
+import threading
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+if TYPE_CHECKING:
+    import resource
+    import subprocess
+    from collections.abc import Sequence
+
+__all__ = ["ResourceUsage"]
+
+# ru_maxrss is in kilobytes on linux, in bytes on macos
+_MAXRSS_SCALE = 1 if sys.platform == "darwin" else 1024
+# fallback if `Popen` does not have `_waitpid_lock`
+_WAITPID_LOCK = threading.Lock()
+
+
+class ResourceUsage(NamedTuple):
+    """resource usage of an ended process, same as `os.wait4`"""
+
+    user_time: float
+    """cpu seconds in user mode"""
+    system_time: float
+    """cpu seconds in kernel mode"""
+    max_rss: int
+    """peak resident set size in bytes"""
+    minor_faults: int
+    """page faults served without i/o"""
+    major_faults: int
+    """page faults that required i/o"""
+    voluntary_switches: int
+    """context switches while waiting for a resource"""
+    involuntary_switches: int
+    """context switches forced by the scheduler"""
+
+    @property
+    def cpu_time(self) -> float:
+        """cpu seconds in user and kernel mode"""
+        return self.user_time + self.system_time
+
+    @classmethod
+    def from_rusage(cls, value: resource.struct_rusage) -> ResourceUsage:
+        """convert result of `os.wait4` or `resource.getrusage`"""
+        return cls(
+            value.ru_utime,
+            value.ru_stime,
+            value.ru_maxrss * _MAXRSS_SCALE,
+            value.ru_minflt,
+            value.ru_majflt,
+            value.ru_nvcsw,
+            value.ru_nivcsw,
+        )
+
+    @classmethod
+    def from_fields(cls, fields: Sequence[str]) -> ResourceUsage:
+        """parse fields written by `str` of each value"""
+        user_time, system_time, *counts = fields
+        return cls(float(user_time), float(system_time), *map(int, counts))
+
+
+def reap(process: subprocess.Popen[Any]) -> ResourceUsage | None:
+    """reap ended process with `os.wait4` and set its returncode.
+
+    Returns:
+        resource usage of process.
+        `None` if the process is running, already reaped,
+        or another thread is waiting for it.
+    """
+    wait4 = getattr(os, "wait4", None)
+    if wait4 is None or process.returncode is not None:  # pragma: no cover
+        return None
+    # `Popen.wait` and `Popen.poll` hold this lock while they call `waitpid`.
+    # without it, another thread can reap the same pid between our check
+    # and `wait4`, and the returncode set by one of them is lost.
+    # it is a private attribute of cpython, so fall back to a lock of this module,
+    # which still serializes `reap` calls.
+    lock: threading.Lock = getattr(process, "_waitpid_lock", _WAITPID_LOCK)
+    if not lock.acquire(blocking=False):
+        return None
+    try:
+        if process.returncode is not None:
+            return None
+        try:
+            pid, status, usage = wait4(process.pid, os.WNOHANG)
+        except ChildProcessError:
+            return None
+        if pid == 0:
+            return None
+        process.returncode = os.waitstatus_to_exitcode(status)
+        return ResourceUsage.from_rusage(usage)
+    finally:
+        lock.release()
@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import mmap
+import os
+import tempfile
+from contextlib import suppress
+from typing import TYPE_CHECKING, Any
+
+import cloudpickle
+from typing_extensions import override
+
+if TYPE_CHECKING:
+    from pickle import PickleBuffer
+
+__all__ = [
+    "dumps",
+    "manifest_path",
+    "remove_segment",
+    "remove_segments",
+    "segment_dir",
+    "SEGMENT_PREFIX",
+]
+
+SEGMENT_PREFIX = "timeout_executor_shm_"
+_SHM_DIR = "/dev/shm"  # noqa: S108
+
+
+def segment_dir() -> str:
+    """directory for shared memory segments.
+
+    tmpfs if exists, else temp dir.
+    """
+    return _SHM_DIR if os.path.isdir(_SHM_DIR) else tempfile.gettempdir()  # noqa: PTH112
+
+
+def manifest_path(prefix: str) -> str:
+    """path of file listing names of segments created with prefix"""
+    return os.path.join(segment_dir(), f"{prefix}names")  # noqa: PTH118
+
+
+def dumps(
+    value: Any,
+    threshold: int,
+    segments: list[str] | None = None,
+    *,
+    prefix: str = SEGMENT_PREFIX,
+    manifest: str | None = None,
+) -> bytes:
+    """dump value with out-of-band buffers.
+
+    buffers(pickle protocol 5) larger than threshold are written
+    to a shared memory segment instead of pickle stream.
+    loading the result with `cloudpickle.loads` maps the segment without copy,
+    and removes the segment.
+
+    Args:
+        value: value to dump
+        threshold: minimum size of buffer in bytes to place in shared memory
+        segments: if given, created segment path is appended
+        prefix: prefix of segment name
+        manifest: if given, created segment name is appended to this file
+
+    Returns:
+        pickled value
+    """
+    buffers: list[memoryview] = []
+
+    def buffer_callback(buffer: PickleBuffer) -> bool:
+        try:
+            view = buffer.raw()
+        except BufferError:
+            # non-contiguous buffer
+            return True
+        if not view.nbytes or view.nbytes < threshold:
+            return True
+        buffers.append(view)
+        return False
+
+    stream = cloudpickle.dumps(value, protocol=5, buffer_callback=buffer_callback)
+    if not buffers:
+        return stream
+
+    path = _write_segment(buffers, prefix, manifest)
+    if segments is not None:
+        segments.append(path)
+    payload = SharedPayload(stream, path, tuple(view.nbytes for view in buffers))
+    return cloudpickle.dumps(payload, protocol=5)
+
+
+def remove_segment(path: str) -> None:
+    """remove shared memory segment if exists"""
+    with suppress(FileNotFoundError):
+        os.unlink(path)  # noqa: PTH108
+
+
+class SharedPayload:
+    """pickle stream with buffers in shared memory segment"""
+
+    __slots__ = ("stream", "path", "sizes")
+
+    def __init__(self, stream: bytes, path: str, sizes: tuple[int, ...]) -> None:
+        self.stream = stream
+        self.path = path
+        self.sizes = sizes
+
+    @override
+    def __reduce__(self) -> tuple[Any, tuple[bytes, str, tuple[int, ...]]]:
+        return _load_payload, (self.stream, self.path, self.sizes)
+
+
+def remove_segments(prefix: str) -> None:
+    """remove shared memory segments listed in manifest of prefix"""
+    manifest = manifest_path(prefix)
+    try:
+        with open(manifest) as file:  # noqa: PTH123
+            names = file.read().split()
+    except FileNotFoundError:
+        return
+    directory = segment_dir()
+    for name in names:
+        remove_segment(os.path.join(directory, name))  # noqa: PTH118
+    remove_segment(manifest)
+
+
+def _write_segment(buffers: list[memoryview], prefix: str, manifest: str | None) -> str:
+    fd, path = tempfile.mkstemp(prefix=prefix, dir=segment_dir())
+    try:
+        with os.fdopen(fd, "wb") as file:
+            if manifest is not None:
+                # listed before writing, so a process killed while writing does not leak
+                with open(manifest, "a") as manifest_file:  # noqa: PTH123
+                    manifest_file.write(f"{os.path.basename(path)}\n")  # noqa: PTH119
+            for view in buffers:
+                file.write(view)
+    except BaseException:
+        remove_segment(path)
+        raise
+    return path
+
+
+def _load_payload(stream: bytes, path: str, sizes: tuple[int, ...]) -> Any:
+    with open(path, "rb") as file:  # noqa: PTH123
+        # copy-on-write: loaded buffers are writable without touching the segment
+        segment = mmap.mmap(file.fileno(), sum(sizes), access=mmap.ACCESS_COPY)
+    # mapping is alive until all buffers are released
+    remove_segment(path)
+
+    view = memoryview(segment)
+    buffers: list[memoryview] = []
+    offset = 0
+    for size in sizes:
+        buffers.append(view[offset : offset + size])
+        offset += size
+    return cloudpickle.loads(stream, buffers=buffers)
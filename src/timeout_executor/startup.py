@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import os
+import re
+import time
+from typing import TYPE_CHECKING, Any, Callable, NamedTuple
+
+from typing_extensions import override
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+__all__ = ["ImportTime", "StartupReport", "parse_import_time", "profile_startup"]
+
+_IMPORT_TIME = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)\s*$")
+MAX_IMPORT_LINES = 100_000
+
+
+class ImportTime(NamedTuple):
+    """one line of `-X importtime`"""
+
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+class StartupReport:
+    """startup cost of subprocess"""
+
+    __slots__ = ("imports", "elapsed")
+
+    def __init__(self, imports: list[ImportTime], elapsed: float) -> None:
+        self.imports = imports
+        self.elapsed = elapsed
+
+    @property
+    def import_us(self) -> int:
+        """total import time in microseconds"""
+        return sum(x.cumulative_us for x in self.imports if x.depth == 0)
+
+    def modules(self) -> set[str]:
+        """imported modules"""
+        return {x.module for x in self.imports}
+
+    def top(self, size: int = 10) -> list[ImportTime]:
+        """top-level imports that take the longest"""
+        imports = [x for x in self.imports if x.depth == 0]
+        imports.sort(key=lambda x: x.cumulative_us, reverse=True)
+        return imports[:size]
+
+    def format(self, size: int = 10) -> str:
+        """human readable report"""
+        lines = [
+            f"elapsed: {self.elapsed * 1000:.1f}ms",
+            f"import: {self.import_us / 1000:.1f}ms ({len(self.imports)} modules)",
+        ]
+        lines.extend(
+            f"{x.cumulative_us / 1000:>10.1f}ms  {x.module}" for x in self.top(size)
+        )
+        return "\n".join(lines)
+
+    @override
+    def __repr__(self) -> str:
+        return (
+            f"<{type(self).__name__}: elapsed={self.elapsed:.3f}s, "
+            f"modules={len(self.imports)}>"
+        )
+
+
+def parse_import_time(lines: Iterable[str]) -> list[ImportTime]:
+    """parse stderr of `python -X importtime`. other lines are ignored."""
+    result: list[ImportTime] = []
+    for line in lines:
+        match = _IMPORT_TIME.match(line)
+        if match is None:
+            continue
+        self_us, cumulative_us, indent, module = match.groups()
+        result.append(
+            ImportTime(module, int(self_us), int(cumulative_us), (len(indent) - 1) // 2)
+        )
+    return result
+
+
+def profile_startup(
+    func: Callable[..., Any] = os.getpid,
+    *args: Any,
+    python_flags: Iterable[str] = (),
+    timeout: float = 60,
+    **kwargs: Any,
+) -> StartupReport:
+    """run function in subprocess with `-X importtime` and report startup cost.
+
+    default function does nothing but returns pid,
+    so the report shows fixed overhead of a call.
+
+    Args:
+        func: func(sync or async)
+        *args: func args
+        python_flags: interpreter flags of subprocess (ex: `-I`, `-S`)
+        timeout: deadline
+        **kwargs: func kwargs
+
+    Returns:
+        imports of subprocess and elapsed time of the call
+    """
+    from timeout_executor.main import TimeoutExecutor
+
+    executor = TimeoutExecutor(
+        timeout,
+        output="capture",
+        output_tail=MAX_IMPORT_LINES,
+        python_flags=(*python_flags, "-Ximporttime"),
+    )
+    start = time.perf_counter()
+    result = executor.apply(func, *args, **kwargs)
+    result.result()
+    elapsed = time.perf_counter() - start
+    return StartupReport(parse_import_time(result.stderr.splitlines()), elapsed)
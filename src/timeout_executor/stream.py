@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import inspect
+import os
+from contextlib import suppress
+from os import environ
+from typing import TYPE_CHECKING, Any, Callable, NamedTuple
+
+import anyio
+from typing_extensions import override
+
+from timeout_executor.const import TIMEOUT_EXECUTOR_STREAM_FD
+from timeout_executor.transport import HEADER, write_frame
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncGenerator, AsyncIterator, Generator
+
+__all__ = ["ItemStream", "StreamResult", "is_stream_function", "send_items"]
+
+CHUNK_SIZE = 1 << 16
+
+
+class StreamResult(NamedTuple):
+    """items of generator collected in subprocess.
+
+    used when items can not be sent as produced (ex: worker pool).
+    """
+
+    items: list[Any]
+    value: Any
+
+
+def is_stream_function(func: Callable[..., Any]) -> bool:
+    """check if function is generator or async generator function"""
+    return inspect.isgeneratorfunction(func) or inspect.isasyncgenfunction(func)
+
+
+class ItemStream:
+    """receive items of generator as produced through a pipe"""
+
+    __slots__ = ("_read_fd", "_write_fd", "_active")
+
+    def __init__(self) -> None:
+        self._read_fd: int | None = None
+        self._write_fd: int | None = None
+        self._active = False
+
+    def open(self) -> None:
+        """create pipe for new process"""
+        if self._read_fd is not None:
+            raise RuntimeError("pipe is already opened")
+        self._read_fd, self._write_fd = os.pipe()
+        os.set_blocking(self._read_fd, False)
+
+    @property
+    def child_fd(self) -> int:
+        """fd passed to subprocess"""
+        if self._write_fd is None:
+            raise RuntimeError("pipe is not opened")
+        return self._write_fd
+
+    @property
+    def active(self) -> bool:
+        """items are being received"""
+        return self._active
+
+    def start(self) -> None:
+        """close fd of subprocess in current process"""
+        if self._write_fd is not None:
+            os.close(self._write_fd)
+            self._write_fd = None
+
+    def close(self) -> None:
+        """close pipe.
+
+        generator in subprocess stops at next item.
+        """
+        self.start()
+        if self._read_fd is not None:
+            os.close(self._read_fd)
+            self._read_fd = None
+
+    async def iter_frames(self) -> AsyncIterator[bytes]:
+        """yield payload of each item until subprocess closes the pipe"""
+        if self._read_fd is None:
+            return
+        if self._active:
+            raise RuntimeError("items are already being received")
+        self._active = True
+        buffer = bytearray()
+        try:
+            while self._read_fd is not None:
+                try:
+                    data = os.read(self._read_fd, CHUNK_SIZE)
+                except BlockingIOError:
+                    await anyio.wait_readable(self._read_fd)
+                    continue
+                if not data:
+                    return
+                buffer += data
+                while len(buffer) >= HEADER.size:
+                    (size,) = HEADER.unpack_from(buffer)
+                    end = HEADER.size + size
+                    if len(buffer) < end:
+                        break
+                    frame = bytes(buffer[HEADER.size : end])
+                    del buffer[:end]
+                    yield frame
+        finally:
+            self._active = False
+
+    @override
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__}: {self._read_fd}>"
+
+
+def send_items(
+    generator: Generator[Any, Any, Any] | AsyncGenerator[Any, Any],
+    dumps: Callable[[Any], bytes],
+) -> Any:
+    """send items of generator to parent process as produced.
+
+    only using in subprocess.
+    if there is no pipe for items, all items are collected into `StreamResult`.
+
+    Returns:
+        return value of generator
+    """
+    stream_fd = environ.get(TIMEOUT_EXECUTOR_STREAM_FD, "")
+    if not stream_fd:
+        items: list[Any] = []
+        value = _drain(generator, items.append)
+        return StreamResult(items, value)
+
+    file = os.fdopen(int(stream_fd), "wb")
+
+    def send(item: Any) -> None:
+        write_frame(file, dumps(item))
+        file.flush()
+
+    try:
+        return _drain(generator, send)
+    finally:
+        with suppress(OSError):
+            file.close()
+
+
+def _drain(
+    generator: Generator[Any, Any, Any] | AsyncGenerator[Any, Any],
+    send: Callable[[Any], Any],
+) -> Any:
+    if inspect.isasyncgen(generator):
+        return anyio.run(_drain_async, generator, send)
+    while True:
+        try:
+            item = next(generator)  # pyright: ignore[reportArgumentType]
+        except StopIteration as exc:
+            return exc.value
+        try:
+            send(item)
+        except BrokenPipeError:
+            # parent stopped receiving items
+            generator.close()  # pyright: ignore[reportAttributeAccessIssue]
+            return None
+
+
+async def _drain_async(
+    generator: AsyncGenerator[Any, Any], send: Callable[[Any], Any]
+) -> None:
+    async for item in generator:
+        try:
+            send(item)
+        except BrokenPipeError:
+            # parent stopped receiving items
+            await generator.aclose()
+            return
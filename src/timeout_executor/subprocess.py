@@ -2,22 +2,42 @@
 
 from __future__ import annotations
 
+import io
+import json
+import os
+import selectors
+import signal
+import sys
+import time
+import traceback
+from contextlib import suppress
 from functools import partial
-from inspect import isawaitable
+from importlib import import_module
+from inspect import isasyncgen, isawaitable, isgenerator
 from os import environ
 from pathlib import Path
-from typing import TYPE_CHECKING, Any, Callable
+from typing import TYPE_CHECKING, Any, Callable, NoReturn
 
-import anyio
 import cloudpickle
-from anyio.lowlevel import checkpoint
 
 from timeout_executor.const import (
+    TIMEOUT_EXECUTOR_FORKSERVER_FDS,
     TIMEOUT_EXECUTOR_INIT_FILE,
+    TIMEOUT_EXECUTOR_INPUT_FD,
     TIMEOUT_EXECUTOR_INPUT_FILE,
+    TIMEOUT_EXECUTOR_LIMITS,
+    TIMEOUT_EXECUTOR_PRELOAD,
+    TIMEOUT_EXECUTOR_WORKER_FDS,
 )
+from timeout_executor.limits import apply_limits
+from timeout_executor.rusage import ResourceUsage
+from timeout_executor.timing import pack_marks
+from timeout_executor.transport import read_frame, write_frame
 
 if TYPE_CHECKING:
+    from collections.abc import Awaitable
+    from typing import BinaryIO
+
     from typing_extensions import ParamSpec, TypeVar
 
     P = ParamSpec("P")
@@ -25,69 +45,270 @@ if TYPE_CHECKING:
 
 __all__ = []
 
+_marks: dict[str, float] = {}
+"""timing marks of current task, sent with the result"""
+
+
+def mark(name: str) -> None:
+    _marks[name] = time.monotonic()
+
 
 def run_in_subprocess() -> None:
+    mark("ready")
+    input_fd = environ.get(TIMEOUT_EXECUTOR_INPUT_FD, "")
+    if input_fd:
+        with os.fdopen(int(input_fd), "rb") as file_io:
+            init_args, input_args = read_frame(file_io), read_frame(file_io)
+    else:
+        init_file = environ.get(TIMEOUT_EXECUTOR_INIT_FILE, "")
+        init_args = Path(init_file).read_bytes() if init_file else None
+        input_args = Path(environ.get(TIMEOUT_EXECUTOR_INPUT_FILE, "")).read_bytes()
+
+    apply_limits(environ.get(TIMEOUT_EXECUTOR_LIMITS, ""))
+    mark("init_start")
+    if init_args:
+        run_initializer(init_args)
+    mark("init_end")
+    run_task(input_args or b"")
+
+
+def run_in_worker() -> None:
     init_file = environ.get(TIMEOUT_EXECUTOR_INIT_FILE, "")
     if init_file:
-        with Path(init_file).open("rb") as file_io:
-            init_func, init_args, init_kwargs = cloudpickle.load(file_io)
-        init_func(*init_args, **init_kwargs)
+        run_initializer(Path(init_file).read_bytes())
+
+    task_fd, done_fd = map(int, environ[TIMEOUT_EXECUTOR_WORKER_FDS].split(","))
+    with os.fdopen(task_fd, "rb") as tasks, os.fdopen(done_fd, "wb") as done:
+        while (task := read_frame(tasks)) is not None:
+            _marks.clear()
+            mark("ready")
+            # f: input file path, p: input payload
+            kind, value = task[:1], task[1:]
+            output = io.BytesIO()
+            # returncode of task, same as exit code of a subprocess
+            status = b"0"
+            try:
+                if kind == b"f":
+                    run_task(Path(value.decode()).read_bytes())
+                else:
+                    run_task(value, output)
+            except Exception:  # noqa: BLE001
+                status = b"1"
+            write_frame(done, status, output.getvalue())
+            done.flush()
+
+
+def run_in_forkserver() -> None:
+    for module in environ.get(TIMEOUT_EXECUTOR_PRELOAD, "").split(","):
+        if module:
+            import_module(module)
+
+    request_fd, event_fd = map(int, environ[TIMEOUT_EXECUTOR_FORKSERVER_FDS].split(","))
+    wakeup_read, wakeup_write = os.pipe()
+    os.set_blocking(wakeup_read, False)
+    os.set_blocking(wakeup_write, False)
+    signal.set_wakeup_fd(wakeup_write)
+    signal.signal(signal.SIGCHLD, _ignore_signal)
+
+    selector = selectors.DefaultSelector()
+    selector.register(request_fd, selectors.EVENT_READ)
+    selector.register(wakeup_read, selectors.EVENT_READ)
+    inherited_fds = (request_fd, event_fd, wakeup_read, wakeup_write)
+
+    children: set[int] = set()
+    buffer, accept = b"", True
+    with os.fdopen(event_fd, "wb", 0) as events:
+        while accept or children:
+            for key, _ in selector.select():
+                if key.fd == wakeup_read:
+                    with suppress(BlockingIOError):
+                        while os.read(wakeup_read, 4096):
+                            pass
+                    for pid, returncode, usage in _reap_children(children):
+                        fields = " ".join(map(str, usage))
+                        events.write(f"exit {pid} {returncode} {fields}\n".encode())
+                    continue
+
+                data = os.read(request_fd, 65536)
+                if not data:
+                    accept = False
+                    selector.unregister(request_fd)
+                    continue
+
+                *lines, buffer = (buffer + data).split(b"\n")
+                for line in lines:
+                    request = json.loads(line)
+                    pid = _fork(request, selector, inherited_fds)
+                    children.add(pid)
+                    events.write(f"spawn {request['id']} {pid}\n".encode())
+
+
+def _ignore_signal(*args: Any) -> None: ...
+
+
+def _fork(
+    request: dict[str, Any],
+    selector: selectors.BaseSelector,
+    inherited_fds: tuple[int, ...],
+) -> int:
+    pid = os.fork()
+    if pid == 0:
+        selector.close()
+        for fd in inherited_fds:
+            os.close(fd)
+        _run_forked(request["input"], request["init"], request["env"])
+    return pid
 
-    input_file = Path(environ.get(TIMEOUT_EXECUTOR_INPUT_FILE, ""))
-    with input_file.open("rb") as file_io:
-        func, args, kwargs, output_file = cloudpickle.load(file_io)
 
-    new_func = output_to_file(output_file)(func)
+def _reap_children(children: set[int]) -> list[tuple[int, int, ResourceUsage]]:
+    result: list[tuple[int, int, ResourceUsage]] = []
+    while children:
+        try:
+            pid, status, usage = os.wait4(-1, os.WNOHANG)
+        except ChildProcessError:
+            children.clear()
+            break
+        if pid == 0:
+            break
+        children.discard(pid)
+        result.append((
+            pid,
+            os.waitstatus_to_exitcode(status),
+            ResourceUsage.from_rusage(usage),
+        ))
+    return result
+
+
+def _run_forked(input_file: str, init_file: str, env: dict[str, str]) -> NoReturn:
+    # descendants are killed with the process
+    os.setsid()
+    signal.set_wakeup_fd(-1)
+    signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+    environ.clear()
+    environ.update(env)
+
+    _marks.clear()
+    mark("ready")
+    returncode = 0
+    try:
+        apply_limits(environ.get(TIMEOUT_EXECUTOR_LIMITS, ""))
+        mark("init_start")
+        if init_file:
+            run_initializer(Path(init_file).read_bytes())
+        mark("init_end")
+        run_task(Path(input_file).read_bytes())
+    except SystemExit as exc:
+        returncode = exc.code if isinstance(exc.code, int) else int(bool(exc.code))
+    except BaseException:  # noqa: BLE001
+        traceback.print_exc()
+        returncode = 1
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os._exit(returncode)
+
+
+def run_initializer(payload: bytes) -> None:
+    init_func, init_args, init_kwargs = cloudpickle.loads(payload)
+    init_func(*init_args, **init_kwargs)
+
+
+def run_task(payload: bytes, output: BinaryIO | None = None) -> None:
+    func_payload, args, kwargs, output_file, shm_threshold, shm_prefix = (
+        cloudpickle.loads(payload)
+    )
+    # loaded for each task, so tasks in a warm worker do not share state
+    func = (
+        cloudpickle.loads(func_payload)
+        if isinstance(func_payload, bytes)
+        else func_payload
+    )
+
+    new_func = output_to_file(
+        output_file if output is None else output, shm_threshold, shm_prefix
+    )(func)
     new_func(*args, **kwargs)
 
 
-def dumps_value(value: Any) -> bytes:
+def dumps_value(
+    value: Any, shm_threshold: int | None = None, shm_prefix: str | None = None
+) -> bytes:
     if isinstance(value, BaseException):
         from timeout_executor.serde import dumps_error
 
         return dumps_error(value)
+    if shm_threshold is not None:
+        from timeout_executor.shm import dumps, manifest_path
+
+        if shm_prefix is None:
+            return dumps(value, shm_threshold)
+        # segments are listed, so parent removes them without scanning
+        return dumps(
+            value, shm_threshold, prefix=shm_prefix, manifest=manifest_path(shm_prefix)
+        )
     return cloudpickle.dumps(value)
 
 
-def output_to_file(file: str) -> Callable[[Callable[P, T]], Callable[P, T]]:
+def write_output(file: str | int | BinaryIO, dump: bytes) -> None:
+    if not isinstance(file, (str, int)):
+        file.write(dump)
+        return
+    # int: fd of pipe
+    with open(file, "wb" if isinstance(file, int) else "wb+") as file_io:  # noqa: PTH123
+        file_io.write(dump)
+
+
+def output_to_file(
+    file: str | int | BinaryIO,
+    shm_threshold: int | None = None,
+    shm_prefix: str | None = None,
+) -> Callable[[Callable[P, T]], Callable[P, T]]:
     def wrapper(func: Callable[P, T]) -> Callable[P, T]:
         func = wrap_function_as_sync(func)
 
         def inner(*args: P.args, **kwargs: P.kwargs) -> T:
             dump = b""
+            mark("run_start")
             try:
-                result = func(*args, **kwargs)
+                result: Any = func(*args, **kwargs)
+                if isgenerator(result) or isasyncgen(result):
+                    from timeout_executor.stream import send_items
+
+                    dumps = partial(
+                        dumps_value, shm_threshold=shm_threshold, shm_prefix=shm_prefix
+                    )
+                    result = send_items(result, dumps)
             except BaseException as exc:
+                mark("run_end")
                 dump = dumps_value(exc)
                 raise
             else:
-                dump = dumps_value(result)
+                mark("run_end")
+                dump = dumps_value(result, shm_threshold, shm_prefix)
                 return result
             finally:
-                with open(file, "wb+") as file_io:  # noqa: PTH123
-                    file_io.write(dump)
+                if dump:
+                    mark("dumped")
+                    dump += pack_marks(_marks)
+                write_output(file, dump)
 
         return inner
 
     return wrapper
 
 
-def wrap_function_as_async(func: Callable[P, Any]) -> Callable[P, Any]:
-    async def wrapped(*args: P.args, **kwargs: P.kwargs) -> Any:
-        await checkpoint()
+def wrap_function_as_sync(func: Callable[P, Any]) -> Callable[P, Any]:
+    def wrapped(*args: P.args, **kwargs: P.kwargs) -> Any:
         result = func(*args, **kwargs)
-        if isawaitable(result):
-            return await result
-        return result
-
-    return wrapped
+        if not isawaitable(result):
+            return result
+        # event loop is only needed for async function
+        import anyio
 
+        return anyio.run(_await, result)
 
-def wrap_function_as_sync(func: Callable[P, Any]) -> Callable[P, Any]:
-    async_wrapped = wrap_function_as_async(func)
+    return wrapped
 
-    def wrapped(*args: P.args, **kwargs: P.kwargs) -> Any:
-        new_func = partial(async_wrapped, *args, **kwargs)
-        return anyio.run(new_func)
 
-    return wrapped
+async def _await(awaitable: Awaitable[T]) -> T:
+    return await awaitable
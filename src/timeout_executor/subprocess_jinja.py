@@ -2,10 +2,12 @@
 
 from __future__ import annotations
 
+import os
 from functools import partial
-from inspect import isawaitable
+from inspect import isasyncgen, isawaitable, isgenerator
 from os import environ
 from pathlib import Path
+from time import monotonic as _monotonic
 from typing import TYPE_CHECKING, Any, Callable
 
 import anyio
@@ -14,8 +16,13 @@ from anyio.lowlevel import checkpoint
 
 from timeout_executor.const import (
     TIMEOUT_EXECUTOR_INIT_FILE,
+    TIMEOUT_EXECUTOR_INPUT_FD,
     TIMEOUT_EXECUTOR_INPUT_FILE,
+    TIMEOUT_EXECUTOR_LIMITS,
 )
+from timeout_executor.limits import apply_limits
+from timeout_executor.timing import pack_marks
+from timeout_executor.transport import read_frame
 
 if TYPE_CHECKING:
     from typing_extensions import ParamSpec, TypeVar
@@ -25,46 +32,92 @@ if TYPE_CHECKING:
 
 __all__ = []
 
+_marks: dict[str, float] = {}
+
+
+def _mark(name: str) -> None:
+    _marks[name] = _monotonic()
+
 
 def run_in_subprocess() -> None:
-    init_file = environ.get(TIMEOUT_EXECUTOR_INIT_FILE, "")
-    if init_file:
-        with Path(init_file).open("rb") as file_io:
-            _, init_args, init_kwargs = cloudpickle.load(file_io)
+    _mark("ready")
+    input_fd = environ.get(TIMEOUT_EXECUTOR_INPUT_FD, "")
+    if input_fd:
+        with os.fdopen(int(input_fd), "rb") as file_io:
+            init_payload, input_payload = read_frame(file_io), read_frame(file_io)
+    else:
+        init_file = environ.get(TIMEOUT_EXECUTOR_INIT_FILE, "")
+        init_payload = Path(init_file).read_bytes() if init_file else None
+        input_file = Path(environ.get(TIMEOUT_EXECUTOR_INPUT_FILE, ""))
+        input_payload = input_file.read_bytes()
+
+    apply_limits(environ.get(TIMEOUT_EXECUTOR_LIMITS, ""))
+    _mark("init_start")
+    if init_payload:
+        _, init_args, init_kwargs = cloudpickle.loads(init_payload)
         init_func(*init_args, **init_kwargs)  # type: ignore  # noqa: F821
+    _mark("init_end")
 
-    input_file = Path(environ.get(TIMEOUT_EXECUTOR_INPUT_FILE, ""))
-    with input_file.open("rb") as file_io:
-        _, args, kwargs, output_file = cloudpickle.load(file_io)
+    _, args, kwargs, output_file, shm_threshold, shm_prefix = cloudpickle.loads(
+        input_payload or b""
+    )
 
-    new_func = output_to_file(output_file)(func)  # type: ignore # noqa: F821
+    new_func = output_to_file(output_file, shm_threshold, shm_prefix)(func)  # type: ignore # noqa: F821
     new_func(*args, **kwargs)
 
 
-def dumps_value(value: Any) -> bytes:
+def dumps_value(
+    value: Any, shm_threshold: int | None = None, shm_prefix: str | None = None
+) -> bytes:
     if isinstance(value, BaseException):
         from timeout_executor.serde import dumps_error
 
         return dumps_error(value)
+    if shm_threshold is not None:
+        from timeout_executor.shm import dumps, manifest_path
+
+        if shm_prefix is None:
+            return dumps(value, shm_threshold)
+        # segments are listed, so parent removes them without scanning
+        return dumps(
+            value, shm_threshold, prefix=shm_prefix, manifest=manifest_path(shm_prefix)
+        )
     return cloudpickle.dumps(value)
 
 
-def output_to_file(file: str) -> Callable[[Callable[P, T]], Callable[P, T]]:
+def output_to_file(
+    file: str | int, shm_threshold: int | None = None, shm_prefix: str | None = None
+) -> Callable[[Callable[P, T]], Callable[P, T]]:
     def wrapper(func: Callable[P, T]) -> Callable[P, T]:
         func = wrap_function_as_sync(func)
 
         def inner(*args: P.args, **kwargs: P.kwargs) -> T:
             dump = b""
+            _mark("run_start")
             try:
-                result = func(*args, **kwargs)
+                result: Any = func(*args, **kwargs)
+                if isgenerator(result) or isasyncgen(result):
+                    from timeout_executor.stream import send_items
+
+                    dumps = partial(
+                        dumps_value, shm_threshold=shm_threshold, shm_prefix=shm_prefix
+                    )
+                    result = send_items(result, dumps)
             except BaseException as exc:
+                _mark("run_end")
                 dump = dumps_value(exc)
                 raise
             else:
-                dump = dumps_value(result)
+                _mark("run_end")
+                dump = dumps_value(result, shm_threshold, shm_prefix)
                 return result
             finally:
-                with open(file, "wb+") as file_io:  # noqa: PTH123
+                if dump:
+                    _mark("dumped")
+                    dump += pack_marks(_marks)
+                # int: fd of pipe
+                mode = "wb" if isinstance(file, int) else "wb+"
+                with open(file, mode) as file_io:  # noqa: PTH123
                     file_io.write(dump)
 
         return inner
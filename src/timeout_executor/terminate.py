@@ -1,24 +1,36 @@
 from __future__ import annotations
 
-import subprocess
-import sys
+import os
+import signal
 import threading
 from collections import deque
 from contextlib import suppress
+from functools import partial
 from itertools import chain
 from typing import TYPE_CHECKING, Any, Callable, Generic
 
 from psutil import pid_exists
 from typing_extensions import ParamSpec, Self, TypeVar, override
 
+from timeout_executor.handle import ProcessHandle
 from timeout_executor.logging import logger
+from timeout_executor.monitor import get_monitor
 from timeout_executor.types import Callback, CallbackArgs, ExecutorArgs, ProcessCallback
 
 if TYPE_CHECKING:
     from collections.abc import Iterable
 
+    from timeout_executor.output import ProcessOutput
+    from timeout_executor.rusage import ResourceUsage
+    from timeout_executor.types import ProcessType
+
 __all__ = []
 
+GROUP_CHECK_INTERVAL = 0.05
+"""seconds between checks of killed process group"""
+GROUP_CHECK_COUNT = 40
+"""checks of killed process group before giving up"""
+
 P = ParamSpec("P")
 T = TypeVar("T", infer_variance=True)
 
@@ -35,14 +47,16 @@ class Terminator(Callback[P, T], Generic[P, T]):
         "_init_callbacks",
         "_callbacks",
         "_callback_args",
-        "_callback_thread",
-        "_terminator_thread",
+        "_started",
+        "output",
+        "_callbacks_done",
+        "_exit_lock",
+        "_exited",
+        "_exit_waiters",
+        "_rusage",
+        "_error",
     )
 
-    _process: subprocess.Popen[str] | None
-    _callback_thread: threading.Thread | None
-    _terminator_thread: threading.Thread | None
-
     def __init__(
         self,
         executor_args_factory: Callable[[Terminator[P, T]], ExecutorArgs[P, T]],
@@ -53,8 +67,15 @@ class Terminator(Callback[P, T], Generic[P, T]):
         self._init_callbacks = callbacks
         self._callbacks: deque[ProcessCallback[P, T]] = deque()
 
-        self._callback_thread = None
-        self._terminator_thread = None
+        self._started = False
+        self.output: ProcessOutput | None = None
+        """stdout and stderr of process. will be set in executor."""
+        self._callbacks_done = threading.Event()
+        self._exit_lock = threading.Lock()
+        self._exited = False
+        self._exit_waiters: list[Callable[[], Any]] = []
+        self._rusage: ResourceUsage | None = None
+        self._error: BaseException | None = None
 
         self._callback_args: CallbackArgs[P, T] | None = None
 
@@ -78,26 +99,6 @@ class Terminator(Callback[P, T], Generic[P, T]):
             raise AttributeError("already has callback args")
         self._callback_args = value
 
-    @property
-    def callback_thread(self) -> threading.Thread:
-        """callback thread.
-
-        will be set in start method.
-        """
-        if self._callback_thread is None:
-            raise AttributeError("there is no callback thread")
-        return self._callback_thread
-
-    @property
-    def terminator_thread(self) -> threading.Thread:
-        """terminator thread.
-
-        will be set in start method.
-        """
-        if self._terminator_thread is None:
-            raise AttributeError("there is no terminator thread")
-        return self._terminator_thread
-
     @property
     def timeout(self) -> float:
         return self._executor_args.timeout
@@ -107,54 +108,58 @@ class Terminator(Callback[P, T], Generic[P, T]):
         """process is terminated or not."""
         return self._is_active
 
+    @property
+    def rusage(self) -> ResourceUsage | None:
+        """resource usage of process. will be set by process monitor."""
+        return self._rusage
+
+    @property
+    def error(self) -> BaseException | None:
+        """reason why the process was killed before deadline"""
+        return self._error
+
     def start(self) -> None:
-        """watch process and run callbacks."""
-        if self._terminator_thread is not None or self._callback_thread is not None:
+        """watch process and run callbacks.
+
+        process is watched by the process monitor shared by all processes.
+        """
+        if self._started:
             raise PermissionError("already started")
-        self._start_callback_thread()
-        self._start_terminator_thread()
-
-    def _start_terminator_thread(self) -> None:
-        logger.debug("%r create terminator thread", self)
-        self._terminator_thread = threading.Thread(
-            target=terminate,
-            args=(self,),
-            name=f"{self.func_name}-callback-{self.executor_args.executor.unique_id}",
-        )
-        self._terminator_thread.daemon = True
-        self._terminator_thread.start()
-        logger.debug(
-            "%r terminator thread: %d", self, self._terminator_thread.ident or -1
-        )
+        self._started = True
+        get_monitor().register(self)
 
-    def _start_callback_thread(self) -> None:
-        logger.debug("%r create callback thread", self)
-        self._callback_thread = threading.Thread(
-            target=callback,
-            args=(self,),
-            name=f"{self.func_name}-terminator-{self.executor_args.executor.unique_id}",
-        )
-        self._callback_thread.daemon = True
-        self._callback_thread.start()
-        logger.debug("%r callback thread: %d", self, self._callback_thread.ident or -1)
+    def wait_callbacks(self, timeout: float | None = None) -> bool:
+        """wait for callbacks to end.
+
+        Returns:
+            false if timeout
+        """
+        return self._callbacks_done.wait(timeout)
 
     def close(self, name: str | None = None) -> None:
-        """run callbacks and terminate process."""
+        """terminate process if running."""
+        self._terminate(name)
+
+    def _terminate(self, name: str | None = None) -> None:
         logger.debug("%r try to terminate process from %s", self, name or "unknown")
         process = self.callback_args.process
         if process.returncode is None:
-            if pid_exists(process.pid):
+            if _process_exists(process):
+                if self._is_active:
+                    # already terminating
+                    return
+                # set before terminate: waiters may wake up before it returns
+                self._is_active = True
                 try:
-                    process.terminate()
+                    self._send_signal(signal.SIGTERM)
                 except ProcessLookupError:
+                    self._is_active = False
                     logger.warning(
                         "%r process has no return code "
                         "but cant find process :: pid: %d",
                         self,
                         process.pid,
                     )
-                else:
-                    self._is_active = True
             else:
                 logger.warning(
                     "%r process has no return code but cant find process :: pid: %d",
@@ -162,14 +167,104 @@ class Terminator(Callback[P, T], Generic[P, T]):
                     process.pid,
                 )
 
-        if process.stdout is not None:
-            text = process.stdout.read()
-            if text:
-                sys.stdout.write(text)
-        if process.stderr is not None:
-            text = process.stderr.read()
-            if text:
-                sys.stderr.write(text)
+    def _process_group(self) -> int | None:
+        """process group led by process. `None` if process does not own one."""
+        if not self._executor_args.executor.process_group or not hasattr(os, "killpg"):
+            return None
+        pid = self.callback_args.process.pid
+        # fork server has not forked the process yet
+        return pid if pid > 0 else None
+
+    def _send_signal(self, sig: int) -> None:
+        """send signal to process group, or process if it does not own one"""
+        group = self._process_group()
+        if group is None:
+            self.callback_args.process.send_signal(sig)
+        else:
+            try:
+                os.killpg(group, sig)
+            except ProcessLookupError:
+                # forked process has not started a new session yet
+                self.callback_args.process.send_signal(sig)
+        if sig == signal.SIGTERM:
+            grace = self._executor_args.executor.kill_grace
+            get_monitor().call_later(grace, self._escalate)
+
+    def _escalate(self) -> None:
+        """kill process and descendants still running after grace period"""
+        process = self.callback_args.process
+        group = self._process_group()
+        if group is None:
+            if process.returncode is None:
+                logger.warning("%r kill process after grace period", self)
+                with suppress(ProcessLookupError):
+                    process.kill()
+            return
+        try:
+            os.killpg(group, signal.SIGKILL)
+        except ProcessLookupError:
+            # nothing of the group survived
+            return
+        logger.warning("%r kill process group %d after grace period", self, group)
+        self._check_group(group, GROUP_CHECK_COUNT)
+
+    def _check_group(self, group: int, count: int) -> None:
+        try:
+            os.killpg(group, 0)
+        except ProcessLookupError:
+            logger.debug("%r process group %d ended", self, group)
+            return
+        except PermissionError:  # pragma: no cover
+            # pid is reused by a process of another user
+            return
+        if count <= 0:
+            logger.error("%r process group %d survived SIGKILL", self, group)
+            return
+        get_monitor().call_later(
+            GROUP_CHECK_INTERVAL, partial(self._check_group, group, count - 1)
+        )
+
+    def _set_error(self, error: BaseException) -> None:
+        if self._error is None:
+            self._error = error
+
+    def _add_exit_waiter(self, waiter: Callable[[], Any]) -> bool:
+        """call waiter from monitor thread after the process ends.
+
+        Returns:
+            false if the process has already ended
+        """
+        with self._exit_lock:
+            if self._exited:
+                return False
+            self._exit_waiters.append(waiter)
+            return True
+
+    def _remove_exit_waiter(self, waiter: Callable[[], Any]) -> None:
+        with self._exit_lock, suppress(ValueError):
+            self._exit_waiters.remove(waiter)
+
+    def _notify_exit(self) -> None:
+        """wake up waiters. called from monitor thread."""
+        with self._exit_lock:
+            self._exited = True
+            waiters, self._exit_waiters = self._exit_waiters, []
+            for waiter in waiters:
+                try:
+                    waiter()
+                except Exception:  # noqa: PERF203, BLE001
+                    logger.exception("%r error when wake up %r", self, waiter)
+
+    def _on_deadline(self) -> None:
+        """terminate process after deadline"""
+        self._terminate("process monitor")
+
+    def _on_exit(self) -> None:
+        """run callbacks after the process ends"""
+        try:
+            self.run_callbacks(self.callback_args, self.func_name)
+        finally:
+            self._callbacks_done.set()
 
     @override
     def __repr__(self) -> str:
@@ -190,7 +285,7 @@ class Terminator(Callback[P, T], Generic[P, T]):
         if (
             self.is_active
             or self.callback_args.process.returncode is not None
-            or not self.callback_thread.is_alive()
+            or self._callbacks_done.is_set()
         ):
             logger.warning("%r already ended -> skip add callback %r", self, callback)
             return self
@@ -204,16 +299,7 @@ class Terminator(Callback[P, T], Generic[P, T]):
         return self
 
 
-def terminate(terminator: Terminator[Any, Any]) -> None:
-    try:
-        with suppress(TimeoutError, subprocess.TimeoutExpired):
-            terminator.callback_args.process.wait(terminator.timeout)
-    finally:
-        terminator.close("terminator thread")
-
-
-def callback(terminator: Terminator[Any, Any]) -> None:
-    try:
-        terminator.callback_args.process.wait()
-    finally:
-        terminator.run_callbacks(terminator.callback_args, terminator.func_name)
+def _process_exists(process: ProcessType) -> bool:
+    if isinstance(process, ProcessHandle):
+        return True
+    return pid_exists(process.pid)
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import math
+import struct
+import time
+from typing import TYPE_CHECKING
+
+from typing_extensions import override
+
+if TYPE_CHECKING:
+    from collections.abc import Mapping
+
+__all__ = ["Timing", "MARKS", "PHASES", "CHILD_MARKS"]
+
+MARKS = (
+    # parent
+    "start",
+    "serialized",
+    "input_written",
+    "spawned",
+    # subprocess
+    "ready",
+    "init_start",
+    "init_end",
+    "run_start",
+    "run_end",
+    "dumped",
+    # parent
+    "load_start",
+    "loaded",
+    "cleaned",
+)
+"""marks of a call in order"""
+CHILD_MARKS = MARKS[4:10]
+"""marks sent from subprocess with the result"""
+PHASES: dict[str, str] = {
+    "serialize": "serialized",
+    "write_input": "input_written",
+    "spawn": "spawned",
+    "startup": "ready",
+    "read_input": "init_start",
+    "initializer": "init_end",
+    "load_function": "run_start",
+    "run": "run_end",
+    "write_result": "dumped",
+    "wait": "load_start",
+    "load": "loaded",
+    "cleanup": "cleaned",
+}
+"""phase name and the mark that ends the phase.
+a phase starts at the last mark before its end mark."""
+
+_MAGIC = b"TETIMING"
+_TRAILER = struct.Struct(f"!{len(CHILD_MARKS)}d")
+
+
+class Timing:
+    """timestamps of a call.
+
+    `time.monotonic` is shared by processes on the same host,
+    so marks of subprocess are comparable with marks of parent.
+    """
+
+    __slots__ = ("_marks",)
+
+    def __init__(self) -> None:
+        self._marks: dict[str, float] = {"start": time.monotonic()}
+
+    def mark(self, name: str) -> None:
+        """record current time"""
+        self._marks[name] = time.monotonic()
+
+    def update(self, marks: Mapping[str, float]) -> None:
+        """add marks recorded elsewhere"""
+        self._marks.update(marks)
+
+    @property
+    def marks(self) -> dict[str, float]:
+        """recorded marks"""
+        return self._marks.copy()
+
+    @property
+    def total(self) -> float:
+        """seconds from start to last mark"""
+        return max(self._marks.values()) - self._marks["start"]
+
+    def phases(self) -> dict[str, float | None]:
+        """seconds taken by each phase.
+
+        `None` if the phase did not happen or is not recorded
+        (ex: subprocess is killed, worker pool runs initializer once).
+        """
+        result: dict[str, float | None] = {}
+        last = self._marks["start"]
+        for name, end in PHASES.items():
+            value = self._marks.get(end)
+            if value is None:
+                result[name] = None
+                continue
+            result[name] = max(value - last, 0.0)
+            last = value
+        return result
+
+    @override
+    def __repr__(self) -> str:
+        phases = ", ".join(
+            f"{name}={value * 1000:.1f}ms"
+            for name, value in self.phases().items()
+            if value is not None
+        )
+        return f"<{type(self).__name__}: {phases}>"
+
+
+def pack_marks(marks: Mapping[str, float]) -> bytes:
+    """pack marks of subprocess, appended to the result.
+
+    `pickle.loads` ignores bytes after the pickled value,
+    so the result can be loaded as before.
+    """
+    values = (marks.get(name, math.nan) for name in CHILD_MARKS)
+    return _TRAILER.pack(*values) + _MAGIC
+
+
+def unpack_marks(data: bytes) -> dict[str, float]:
+    """unpack marks appended by `pack_marks`. empty if there is none."""
+    size = _TRAILER.size + len(_MAGIC)
+    if len(data) < size or not data.endswith(_MAGIC):
+        return {}
+    values = _TRAILER.unpack_from(data, len(data) - size)
+    return {
+        name: value for name, value in zip(CHILD_MARKS, values) if not math.isnan(value)
+    }
@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+import os
+import struct
+import threading
+from contextlib import suppress
+from functools import partial
+from typing import TYPE_CHECKING, Any, Callable
+
+from typing_extensions import override
+
+if TYPE_CHECKING:
+    from typing import BinaryIO
+
+__all__ = ["PipeTransport", "read_frame", "write_frame"]
+
+HEADER = struct.Struct("!Q")
+CHUNK_SIZE = 1 << 16
+
+
+def write_frame(file: BinaryIO, *data: bytes) -> None:
+    """write length-prefixed data"""
+    file.write(HEADER.pack(sum(map(len, data))))
+    for chunk in data:
+        file.write(chunk)
+
+
+def read_frame(file: BinaryIO) -> bytes | None:
+    """read length-prefixed data. `None` if stream is closed."""
+    header = file.read(HEADER.size)
+    if not header:
+        return None
+    if len(header) < HEADER.size:
+        raise EOFError("stream closed while reading frame header")
+    (size,) = HEADER.unpack(header)
+    data = file.read(size)
+    if len(data) < size:
+        raise EOFError("stream closed while reading frame")
+    return data
+
+
+class PipeTransport:
+    """send payload and receive result through pipes instead of temp files.
+
+    pipes are written and read without blocking by the process monitor,
+    so no thread is used per process.
+    """
+
+    __slots__ = (
+        "input_args",
+        "init_args",
+        "_fds",
+        "_write_fd",
+        "_read_fd",
+        "_pending",
+        "_buffer",
+        "_eof",
+        "_output",
+        "_done",
+        "_lock",
+        "_waiters",
+    )
+
+    def __init__(self, input_args: bytes = b"", init_args: bytes | None = None) -> None:
+        self.input_args = input_args
+        """function payload"""
+        self.init_args = init_args
+        """initializer payload"""
+        self._fds: tuple[int, int, int, int] | None = None
+        self._write_fd: int | None = None
+        self._read_fd: int | None = None
+        self._pending = memoryview(b"")
+        self._buffer = bytearray()
+        self._eof = False
+        self._output = b""
+        self._done = False
+        self._lock = threading.Lock()
+        self._waiters: list[Callable[[], Any]] = []
+
+    def open(self) -> None:
+        """create pipes for new process"""
+        if self._fds is not None:
+            raise RuntimeError("pipes are already opened")
+        input_read, input_write = os.pipe()
+        output_read, output_write = os.pipe()
+        self._fds = (input_read, input_write, output_read, output_write)
+
+    @property
+    def output_fd(self) -> int | None:
+        """output fd of child process. `None` if pipes are not opened."""
+        return None if self._fds is None else self._fds[3]
+
+    @property
+    def child_fds(self) -> tuple[int, int]:
+        """input and output fds of child process"""
+        if self._fds is None:
+            raise RuntimeError("pipes are not opened")
+        return self._fds[0], self._fds[3]
+
+    @property
+    def write_fd(self) -> int | None:
+        """fd to write input. `None` if not started or closed."""
+        return self._write_fd
+
+    @property
+    def read_fd(self) -> int | None:
+        """fd to read output. `None` if not started or closed."""
+        return self._read_fd
+
+    def start(self) -> None:
+        """close child fds.
+
+        input is written and output is read by the process monitor.
+        """
+        if self._fds is None:
+            raise RuntimeError("pipes are not opened")
+        input_read, input_write, output_read, output_write = self._fds
+        self._fds = None
+        os.close(input_read)
+        os.close(output_write)
+        os.set_blocking(input_write, False)
+        os.set_blocking(output_read, False)
+        self._write_fd, self._read_fd = input_write, output_read
+        init_args = self.init_args or b""
+        self._pending = memoryview(
+            b"".join((
+                HEADER.pack(len(init_args)),
+                init_args,
+                HEADER.pack(len(self.input_args)),
+                self.input_args,
+            ))
+        )
+
+    def close(self) -> None:
+        """close pipes if process is not created"""
+        if self._fds is None:
+            return
+        for fd in self._fds:
+            with suppress(OSError):
+                os.close(fd)
+        self._fds = None
+
+    def write_input(self) -> bool:
+        """write input without blocking. called from process monitor.
+
+        Returns:
+            true if all input is written or child process closed the pipe
+        """
+        if self._write_fd is None:
+            return True
+        try:
+            while self._pending:
+                size = os.write(self._write_fd, self._pending[:CHUNK_SIZE])
+                self._pending = self._pending[size:]
+        except BlockingIOError:
+            return False
+        except OSError:
+            # child process ended without reading input
+            self._pending = memoryview(b"")
+        return True
+
+    def read_output(self) -> bool:
+        """read output without blocking. called from process monitor.
+
+        Returns:
+            true if child process closed the pipe
+        """
+        if self._read_fd is None or self._eof:
+            return True
+        try:
+            while data := os.read(self._read_fd, CHUNK_SIZE):
+                self._buffer += data
+        except BlockingIOError:
+            return False
+        except OSError:
+            pass
+        self._eof = True
+        return True
+
+    def finish(self) -> None:
+        """read output left, close pipes and set output.
+
+        called from process monitor after child process ends.
+        """
+        self.read_output()
+        for fd in (self._write_fd, self._read_fd):
+            if fd is not None:
+                with suppress(OSError):
+                    os.close(fd)
+        self._write_fd = self._read_fd = None
+        output, self._buffer = bytes(self._buffer), bytearray()
+        self.set_output(output)
+
+    def set_output(self, value: bytes) -> None:
+        """set result received from child process"""
+        with self._lock:
+            self._output = value
+            self._done = True
+            waiters, self._waiters = self._waiters, []
+            for waiter in waiters:
+                waiter()
+
+    async def wait_output(self) -> bytes:
+        """wait for result received from child process on event loop.
+
+        empty bytes if child process ended without result.
+        """
+        import anyio
+
+        read_fd, write_fd = os.pipe()
+        waiter = partial(os.write, write_fd, b"\0")
+        try:
+            with self._lock:
+                done = self._done
+                if not done:
+                    self._waiters.append(waiter)
+            if not done:
+                await anyio.wait_readable(read_fd)
+        finally:
+            with self._lock, suppress(ValueError):
+                self._waiters.remove(waiter)
+            os.close(read_fd)
+            os.close(write_fd)
+        return self._output
+
+    @override
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__}: size: {len(self.input_args)}>"
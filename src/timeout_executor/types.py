@@ -9,6 +9,7 @@ from typing import TYPE_CHECKING, Any, Callable, Generic
 from typing_extensions import ParamSpec, TypeVar
 
 from timeout_executor.logging import logger
+from timeout_executor.timing import Timing
 
 if sys.version_info < (3, 11):  # pragma: no cover
     from exceptiongroup import ExceptionGroup
@@ -21,8 +22,12 @@ if TYPE_CHECKING:
     from typing_extensions import Self, TypeAlias
 
     from timeout_executor.executor import Executor
+    from timeout_executor.handle import ProcessHandle
     from timeout_executor.result import AsyncResult
+    from timeout_executor.rusage import ResourceUsage
+    from timeout_executor.stream import ItemStream
     from timeout_executor.terminate import Terminator
+    from timeout_executor.transport import PipeTransport
 
 
 __all__ = ["ExecutorArgs", "CallbackArgs", "ProcessCallback", "Callback"]
@@ -50,14 +55,20 @@ class ExecutorArgs(Generic[P, T]):
     """target function name"""
     terminator: Terminator[P, T]
     """terminator"""
-    input_file: Path
+    input_file: Path | None
     """function args input file"""
-    output_file: Path
+    output_file: Path | None
     """function result output file"""
     init_file: Path | None
     """initializer file"""
     timeout: float
     """timeout"""
+    transport: PipeTransport | None = field(default=None)
+    """pipe transport. `None` if using temp files."""
+    stream: ItemStream | None = field(default=None)
+    """pipe for items of generator. `None` if function is not generator."""
+    timing: Timing = field(default_factory=Timing)
+    """timestamps of each phase of the call"""
 
 
 @dataclass(**_DATACLASS_NON_FROZEN_KWARGS)
@@ -74,13 +85,18 @@ class State:
 class CallbackArgs(Generic[P, T]):
     """callback args"""
 
-    process: subprocess.Popen[str]
+    process: ProcessType
     """target process"""
     result: AsyncResult[P, T]
     """process result"""
     state: State = field(init=False, default_factory=State)
     """process state"""
 
+    @property
+    def rusage(self) -> ResourceUsage | None:
+        """resource usage of ended process"""
+        return self.result.rusage
+
 
 @dataclass(**_DATACLASS_NON_FROZEN_KWARGS)
 class InitializerArgs(Generic[P, T]):
@@ -122,3 +138,4 @@ class Callback(ABC, Generic[P, T]):
 
 
 ProcessCallback: TypeAlias = "Callable[[CallbackArgs[P, T]], Any]"
+ProcessType: TypeAlias = "subprocess.Popen[str] | ProcessHandle"
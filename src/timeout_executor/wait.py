@@ -0,0 +1,329 @@
+from __future__ import annotations
+
+import os
+import queue
+import threading
+import time
+from contextlib import suppress
+from functools import partial
+from typing import TYPE_CHECKING, Any, Callable, Literal, NamedTuple
+
+from typing_extensions import override
+
+from timeout_executor.logging import logger
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator, Iterable, Iterator
+
+    from timeout_executor.result import AsyncResult
+
+__all__ = [
+    "FIRST_COMPLETED",
+    "FIRST_EXCEPTION",
+    "ALL_COMPLETED",
+    "DoneAndNotDone",
+    "as_completed",
+    "as_completed_async",
+    "wait",
+    "wait_async",
+]
+
+FIRST_COMPLETED = "FIRST_COMPLETED"
+FIRST_EXCEPTION = "FIRST_EXCEPTION"
+ALL_COMPLETED = "ALL_COMPLETED"
+
+ReturnWhen = Literal["FIRST_COMPLETED", "FIRST_EXCEPTION", "ALL_COMPLETED"]
+
+
+class DoneAndNotDone(NamedTuple):
+    """result of `wait`"""
+
+    done: set[AsyncResult[..., Any]]
+    """results of ended processes"""
+    not_done: set[AsyncResult[..., Any]]
+    """results of running processes"""
+
+
+class Watcher:
+    """watch many results with a single queue.
+
+    each result is notified once by process monitor after its process ends,
+    including processes terminated after deadline.
+    """
+
+    __slots__ = ("_queue", "_pending", "_waiters", "_lock", "_wakeup_fds")
+
+    def __init__(self, results: Iterable[AsyncResult[..., Any]] = ()) -> None:
+        self._queue: queue.SimpleQueue[AsyncResult[..., Any]] = queue.SimpleQueue()
+        self._pending: set[AsyncResult[..., Any]] = set()
+        self._waiters: dict[AsyncResult[..., Any], Callable[[], Any]] = {}
+        self._lock = threading.Lock()
+        self._wakeup_fds: tuple[int, int] | None = None
+        for result in results:
+            self.add(result)
+
+    def add(self, result: AsyncResult[..., Any]) -> None:
+        """watch result"""
+        if result in self._pending:
+            return
+        self._pending.add(result)
+        waiter = partial(self._on_exit, result)
+        if result._terminator._add_exit_waiter(waiter):  # noqa: SLF001
+            self._waiters[result] = waiter
+        else:
+            # process has already ended
+            self._queue.put(result)
+
+    @property
+    def pending(self) -> set[AsyncResult[..., Any]]:
+        """results not returned yet"""
+        return self._pending.copy()
+
+    def get(self, timeout: float | None = None) -> AsyncResult[..., Any] | None:
+        """get next result of ended process.
+
+        `None` if no process ended until timeout or nothing is pending.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._pending:
+            try:
+                result = self._queue.get(timeout=_remaining(deadline))
+            except queue.Empty:
+                return None
+            if result in self._pending:
+                self._pop(result)
+                return result
+        return None
+
+    async def get_async(
+        self, timeout: float | None = None
+    ) -> AsyncResult[..., Any] | None:
+        """get next result of ended process.
+
+        waits on event loop, so it is cancelled without leaving a thread behind.
+        """
+        import anyio
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        read_fd = self._wakeup_fd()
+        while self._pending:
+            result = self._get_nowait()
+            if result is not None:
+                return result
+            with anyio.move_on_after(_remaining(deadline)) as scope:
+                await anyio.wait_readable(read_fd)
+            if scope.cancelled_caught:
+                return None
+            with suppress(BlockingIOError):
+                while os.read(read_fd, 4096):
+                    pass
+        return None
+
+    def close(self) -> None:
+        """stop watching pending results"""
+        for result, waiter in self._waiters.items():
+            result._terminator._remove_exit_waiter(waiter)  # noqa: SLF001
+        self._waiters.clear()
+        with self._lock:
+            fds, self._wakeup_fds = self._wakeup_fds, None
+        if fds is not None:
+            for fd in fds:
+                os.close(fd)
+
+    def _get_nowait(self) -> AsyncResult[..., Any] | None:
+        while True:
+            try:
+                result = self._queue.get_nowait()
+            except queue.Empty:
+                return None
+            if result in self._pending:
+                self._pop(result)
+                return result
+
+    def _pop(self, result: AsyncResult[..., Any]) -> None:
+        self._pending.remove(result)
+        self._waiters.pop(result, None)
+
+    def _wakeup_fd(self) -> int:
+        with self._lock:
+            if self._wakeup_fds is None:
+                read_fd, write_fd = os.pipe()
+                os.set_blocking(read_fd, False)
+                os.set_blocking(write_fd, False)
+                self._wakeup_fds = (read_fd, write_fd)
+            return self._wakeup_fds[0]
+
+    def _on_exit(self, result: AsyncResult[..., Any]) -> None:
+        # called from monitor thread
+        self._queue.put(result)
+        with self._lock:
+            if self._wakeup_fds is not None:
+                with suppress(BlockingIOError):
+                    os.write(self._wakeup_fds[1], b"\0")
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    @override
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__}: pending: {len(self._pending)}>"
+
+
+def as_completed(
+    results: Iterable[AsyncResult[..., Any]], timeout: float | None = None
+) -> Iterator[AsyncResult[..., Any]]:
+    """yield results as processes end.
+
+    Args:
+        results: async results
+        timeout: total deadline. `None` means no deadline.
+
+    Raises:
+        TimeoutError: if some processes are still running after timeout
+
+    Returns:
+        iterator of async results
+    """
+    watcher = Watcher(results)
+    deadline = None if timeout is None else time.monotonic() + timeout
+    try:
+        while watcher:
+            result = watcher.get(_remaining(deadline))
+            if result is None:
+                error_msg = f"{len(watcher)} results are not completed"
+                raise TimeoutError(error_msg)
+            yield result
+    finally:
+        watcher.close()
+
+
+async def as_completed_async(
+    results: Iterable[AsyncResult[..., Any]], timeout: float | None = None
+) -> AsyncIterator[AsyncResult[..., Any]]:
+    """yield results as processes end.
+
+    async version of `as_completed`
+
+    Args:
+        results: async results
+        timeout: total deadline. `None` means no deadline.
+
+    Raises:
+        TimeoutError: if some processes are still running after timeout
+
+    Returns:
+        async iterator of async results
+    """
+    watcher = Watcher(results)
+    deadline = None if timeout is None else time.monotonic() + timeout
+    try:
+        while watcher:
+            result = await watcher.get_async(_remaining(deadline))
+            if result is None:
+                error_msg = f"{len(watcher)} results are not completed"
+                raise TimeoutError(error_msg)
+            yield result
+    finally:
+        watcher.close()
+
+
+def wait(
+    results: Iterable[AsyncResult[..., Any]],
+    timeout: float | None = None,
+    return_when: ReturnWhen = ALL_COMPLETED,
+) -> DoneAndNotDone:
+    """wait for processes to end.
+
+    Args:
+        results: async results
+        timeout: total deadline. `None` means no deadline.
+        return_when: when to return.
+            one of `FIRST_COMPLETED`, `FIRST_EXCEPTION`, `ALL_COMPLETED`
+
+    Returns:
+        results of ended processes and running processes
+    """
+    _check_return_when(return_when)
+    watcher = Watcher(results)
+    deadline = None if timeout is None else time.monotonic() + timeout
+    done: set[AsyncResult[..., Any]] = set()
+    try:
+        while watcher:
+            result = watcher.get(_remaining(deadline))
+            if result is None:
+                break
+            done.add(result)
+            if return_when == FIRST_COMPLETED or (
+                return_when == FIRST_EXCEPTION and _has_error(result)
+            ):
+                break
+    finally:
+        watcher.close()
+    return DoneAndNotDone(done, watcher.pending)
+
+
+async def wait_async(
+    results: Iterable[AsyncResult[..., Any]],
+    timeout: float | None = None,
+    return_when: ReturnWhen = ALL_COMPLETED,
+) -> DoneAndNotDone:
+    """wait for processes to end.
+
+    async version of `wait`
+
+    Args:
+        results: async results
+        timeout: total deadline. `None` means no deadline.
+        return_when: when to return.
+            one of `FIRST_COMPLETED`, `FIRST_EXCEPTION`, `ALL_COMPLETED`
+
+    Returns:
+        results of ended processes and running processes
+    """
+    _check_return_when(return_when)
+    watcher = Watcher(results)
+    deadline = None if timeout is None else time.monotonic() + timeout
+    done: set[AsyncResult[..., Any]] = set()
+    try:
+        while watcher:
+            result = await watcher.get_async(_remaining(deadline))
+            if result is None:
+                break
+            done.add(result)
+            if return_when == FIRST_COMPLETED or (
+                return_when == FIRST_EXCEPTION and await _has_error_async(result)
+            ):
+                break
+    finally:
+        watcher.close()
+    return DoneAndNotDone(done, watcher.pending)
+
+
+def _remaining(deadline: float | None) -> float | None:
+    if deadline is None:
+        return None
+    return max(deadline - time.monotonic(), 0)
+
+
+def _check_return_when(return_when: str) -> None:
+    if return_when not in {FIRST_COMPLETED, FIRST_EXCEPTION, ALL_COMPLETED}:
+        error_msg = f"invalid return condition: {return_when!r}"
+        raise ValueError(error_msg)
+
+
+def _has_error(result: AsyncResult[..., Any]) -> bool:
+    try:
+        result.result()
+    except Exception as exc:  # noqa: BLE001
+        logger.debug("%r has error: %r", result, exc)
+        return True
+    return False
+
+
+async def _has_error_async(result: AsyncResult[..., Any]) -> bool:
+    try:
+        await result.delay()
+    except Exception as exc:  # noqa: BLE001
+        logger.debug("%r has error: %r", result, exc)
+        return True
+    return False
@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import heapq
+import os
+import threading
+import time
+from contextlib import suppress
+from itertools import count
+from typing import TYPE_CHECKING, Any
+
+import psutil
+from typing_extensions import override
+
+from timeout_executor.const import RSS_INTERVAL
+from timeout_executor.limits import MemoryLimitExceeded
+from timeout_executor.logging import logger
+
+if TYPE_CHECKING:
+    from timeout_executor.terminate import Terminator
+
+__all__ = ["MemoryWatchdog", "get_watchdog"]
+
+
+class MemoryWatch:
+    """process sampled by watchdog"""
+
+    __slots__ = ("terminator", "max_rss", "interval", "peak_rss")
+
+    def __init__(
+        self, terminator: Terminator[Any, Any], max_rss: int, interval: float
+    ) -> None:
+        self.terminator = terminator
+        self.max_rss = max_rss
+        self.interval = interval
+        self.peak_rss = 0
+
+    @override
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__}: {self.terminator!r}>"
+
+
+class MemoryWatchdog:
+    """sample rss of all watched processes with a single thread.
+
+    rss of a process includes its descendants.
+    a process over budget is killed with its descendants,
+    and its result raises `MemoryLimitExceeded`.
+    """
+
+    __slots__ = ("_lock", "_condition", "_schedule", "_counter", "_thread")
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._condition = threading.Condition(self._lock)
+        self._schedule: list[tuple[float, int, MemoryWatch]] = []
+        self._counter = count()
+        self._thread = threading.Thread(target=self._run, name="timeout-executor-rss")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def __len__(self) -> int:
+        return len(self._schedule)
+
+    def register(
+        self,
+        terminator: Terminator[Any, Any],
+        max_rss: int,
+        interval: float = RSS_INTERVAL,
+    ) -> MemoryWatch:
+        """sample process of terminator until it ends"""
+        watch = MemoryWatch(terminator, max_rss, interval)
+        with self._condition:
+            heapq.heappush(
+                self._schedule, (time.monotonic(), next(self._counter), watch)
+            )
+            self._condition.notify()
+        logger.debug("%r watch %r", self, watch)
+        return watch
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._schedule:
+                    self._condition.wait()
+                when, _, watch = self._schedule[0]
+                delay = when - time.monotonic()
+                if delay > 0:
+                    # woken up early by register
+                    self._condition.wait(delay)
+                    continue
+                heapq.heappop(self._schedule)
+
+            if self._sample(watch):
+                with self._condition:
+                    heapq.heappush(
+                        self._schedule,
+                        (time.monotonic() + watch.interval, next(self._counter), watch),
+                    )
+
+    def _sample(self, watch: MemoryWatch) -> bool:
+        """check rss of process.
+
+        Returns:
+            false if the process should not be watched anymore
+        """
+        process = watch.terminator.callback_args.process
+        if process.returncode is not None:
+            return False
+        if process.pid < 0:
+            # task is waiting for a worker
+            return True
+        try:
+            processes = _process_tree(process.pid)
+        except psutil.Error:
+            return process.returncode is None
+        rss = 0
+        for item in processes:
+            with suppress(psutil.Error):
+                rss += item.memory_info().rss
+        watch.peak_rss = max(watch.peak_rss, rss)
+        if rss <= watch.max_rss:
+            return True
+
+        logger.warning(
+            "%r kill process over rss budget :: rss: %d, max: %d",
+            self,
+            rss,
+            watch.max_rss,
+        )
+        error_msg = f"rss limit exceeded: {rss} bytes > {watch.max_rss} bytes"
+        watch.terminator._set_error(MemoryLimitExceeded(error_msg))  # noqa: SLF001
+        # descendants first: they are reparented after the process is killed
+        for item in reversed(processes[1:]):
+            with suppress(psutil.Error):
+                item.kill()
+        with suppress(ProcessLookupError):
+            process.kill()
+        return False
+
+    @override
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__}: watches: {len(self._schedule)}>"
+
+
+def _process_tree(pid: int) -> list[psutil.Process]:
+    process = psutil.Process(pid)
+    return [process, *process.children(recursive=True)]
+
+
+_watchdog: MemoryWatchdog | None = None
+_watchdog_lock = threading.Lock()
+
+
+def get_watchdog() -> MemoryWatchdog:
+    """memory watchdog of current process.
+
+    watchdog starts on first call.
+    """
+    global _watchdog  # noqa: PLW0603
+    if _watchdog is not None:
+        return _watchdog
+    with _watchdog_lock:
+        if _watchdog is None:
+            _watchdog = MemoryWatchdog()
+    return _watchdog
+
+
+def _reset_watchdog() -> None:
+    # threads of parent process do not exist in forked process
+    global _watchdog, _watchdog_lock  # noqa: PLW0603
+    _watchdog = None
+    _watchdog_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):  # pragma: no branch
+    os.register_at_fork(after_in_child=_reset_watchdog)